@@ -0,0 +1,247 @@
+"""Incremental analytics over the append-only result store.
+
+``ResultAggregator.refresh`` tails ``ResultStore.scan`` from the last position
+it saw and folds each new record into rolling counters:
+
+* results per ``(day, skill, start_seniority, final_result, failed)``
+* per-question ``[asked, correct]`` totals per ``(day, skill, start_seniority)``
+
+The position and the counters are checkpointed to
+``results/analytics_checkpoint.json``, so a restart resumes instead of
+rescanning history, and dashboard queries only touch the counters.  A store
+line that is not valid JSON is skipped and counted in ``bad_lines``; a
+checkpoint that is incomplete or from an older layout is ignored and history
+is rescanned.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from result_store import ResultStore
+
+CHECKPOINT_FILE = os.path.join("results", "analytics_checkpoint.json")
+CHECKPOINT_VERSION = 2
+UNKNOWN = "unknown"
+
+log = logging.getLogger(__name__)
+
+
+def _record_day(record: dict) -> str:
+    stamp = record.get("datetime") or record.get("timestamp") or ""
+    try:
+        return datetime.fromisoformat(stamp).date().isoformat()
+    except ValueError:
+        return UNKNOWN
+
+
+def _keep(day, sk, start, skill, since, until, start_seniority) -> bool:
+    """Whether a counter row passes the dashboard filters (``since``/``until`` as ISO days)."""
+
+    if skill and sk != skill or start_seniority and start != start_seniority:
+        return False
+    if since or until:
+        return day != UNKNOWN and (since or "") <= day <= (until or "9999-12-31")
+    return True
+
+
+def _iso(day: date | None) -> str | None:
+    return day.isoformat() if day else None
+
+
+class ResultAggregator:
+    """Rolling counters over a ``ResultStore`` with checkpoint/resume."""
+
+    def __init__(self, store: ResultStore, checkpoint_path: str | None = CHECKPOINT_FILE,
+                 checkpoint_every: int = 10000):
+        self.store = store
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.position = (0, 0)
+        self.records = 0
+        self.bad_lines = 0
+        self.outcomes = {}   # (day, skill, start, label, failed) -> count
+        self.questions = {}  # (day, skill, start, question_id) -> [asked, correct]
+        self._lock = threading.Lock()          # counters, held only to fold in a chunk
+        self._refresh_lock = threading.Lock()  # one scan at a time
+        self._thread: threading.Thread | None = None
+        if checkpoint_path:
+            self.load_checkpoint()
+
+    # --------------------------------------------------------------------- #
+    # Ingest
+
+    def add(self, record: dict):
+        day = _record_day(record)
+        skill = record.get("skill", UNKNOWN)
+        start = record.get("start_seniority", UNKNOWN)
+        key = (day, skill, start, record.get("final_result") or UNKNOWN, bool(record.get("failed")))
+        # read every answer first, so a malformed record changes nothing
+        answers = [((day, skill, start, a["question_id"]), bool(a["is_correct"]))
+                   for a in record.get("answer_history") or ()]
+        self.outcomes[key] = self.outcomes.get(key, 0) + 1
+        for qkey, correct in answers:
+            stats = self.questions.get(qkey)
+            if stats is None:
+                stats = self.questions[qkey] = [0, 0]
+            stats[0] += 1
+            stats[1] += correct
+        self.records += 1
+
+    def refresh(self, chunk: int = 1000) -> int:
+        """Fold in every record appended since the last call; return how many.
+
+        The store is read without holding the counter lock; records are folded
+        in ``chunk`` at a time, so dashboard queries only wait for a chunk.
+        """
+
+        with self._refresh_lock:
+            new = 0
+            pending = []
+
+            def bad_line(at, line):
+                log.warning("Skipping unreadable store line at %s: %r", at, line[:80])
+                pending.append((at, None))
+
+            def fold():
+                nonlocal new
+                self._fold(pending)
+                before, new = new, new + len(pending)
+                if self.checkpoint_path and new // self.checkpoint_every != before // self.checkpoint_every:
+                    self.save_checkpoint()
+                pending.clear()
+
+            for at, record in self.store.scan(*self.position, on_bad_line=bad_line):
+                pending.append((at, record))
+                if len(pending) >= chunk:
+                    fold()
+            fold()
+            if new and self.checkpoint_path:
+                self.save_checkpoint()
+        return new
+
+    def _fold(self, pending: list):
+        with self._lock:
+            for position, record in pending:
+                if record is None:
+                    self.bad_lines += 1
+                else:
+                    try:
+                        self.add(record)
+                    except (AttributeError, KeyError, TypeError) as e:  # malformed record: skip it
+                        log.warning("Skipping result at %s: %r", position, e)
+                self.position = position
+
+    def start(self, interval: float = 5.0) -> "ResultAggregator":
+        """Keep refreshing from a daemon thread."""
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:  # keep tailing; the next refresh retries from the checkpoint
+                    log.exception("Analytics refresh failed")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name="analytics-tail", daemon=True)
+            self._thread.start()
+        return self
+
+    # --------------------------------------------------------------------- #
+    # Checkpoints
+
+    def save_checkpoint(self):
+        with self._lock:
+            payload = {
+                "version": CHECKPOINT_VERSION,
+                "position": list(self.position),
+                "records": self.records,
+                "bad_lines": self.bad_lines,
+                "outcomes": [list(key) + [count] for key, count in self.outcomes.items()],
+                "questions": [list(key) + stats for key, stats in self.questions.items()],
+            }
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f_out:
+            json.dump(payload, f_out, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f_in:
+                payload = json.load(f_in)
+        except (FileNotFoundError, ValueError):
+            return
+        try:  # all or nothing: a partial checkpoint means rescanning from the start
+            if payload["version"] != CHECKPOINT_VERSION:
+                raise ValueError(f"checkpoint version {payload['version']}")
+            position = tuple(payload["position"])
+            records, bad_lines = payload["records"], payload["bad_lines"]
+            outcomes = {tuple(row[:-1]): row[-1] for row in payload["outcomes"]}
+            questions = {tuple(row[:-2]): row[-2:] for row in payload["questions"]}
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning("Ignoring analytics checkpoint %s: %r", self.checkpoint_path, e)
+            return
+        self.position, self.records, self.bad_lines = position, records, bad_lines
+        self.outcomes, self.questions = outcomes, questions
+
+    # --------------------------------------------------------------------- #
+    # Queries (on a copy taken under the lock: the tail thread keeps adding)
+
+    def _outcomes(self) -> list:
+        with self._lock:
+            return list(self.outcomes.items())
+
+    def skills(self) -> list[str]:
+        return sorted({key[1] for key, _ in self._outcomes()})
+
+    def level_distribution(self, skill: str | None = None, since: date | None = None,
+                           until: date | None = None, start_seniority: str | None = None) -> dict:
+        """``{final_result: count}`` filtered by skill, start and day range."""
+
+        lo, hi = _iso(since), _iso(until)
+        dist = {}
+        for (day, sk, start, label, _), count in self._outcomes():
+            if not _keep(day, sk, start, skill, lo, hi, start_seniority):
+                continue
+            dist[label] = dist.get(label, 0) + count
+        return dict(sorted(dist.items()))
+
+    def failure_rate(self, skill: str | None = None, since: date | None = None,
+                     start_seniority: str | None = None) -> float:
+        lo = _iso(since)
+        total = failed = 0
+        for (day, sk, start, _, was_failed), count in self._outcomes():
+            if not _keep(day, sk, start, skill, lo, None, start_seniority):
+                continue
+            total += count
+            failed += count if was_failed else 0
+        return failed / total if total else 0.0
+
+    def question_stats(self, skill: str | None = None, since: date | None = None,
+                       until: date | None = None, start_seniority: str | None = None) -> dict:
+        """``{question_id: {"asked", "correct", "p_correct"}}`` under the same filters."""
+
+        with self._lock:
+            rows = [(key, asked, correct) for key, (asked, correct) in self.questions.items()]
+        lo, hi = _iso(since), _iso(until)
+        totals = {}
+        for (day, sk, start, qid), asked, correct in rows:
+            if not _keep(day, sk, start, skill, lo, hi, start_seniority):
+                continue
+            stats = totals.setdefault(qid, [0, 0])
+            stats[0] += asked
+            stats[1] += correct
+        return {
+            qid: {"asked": asked, "correct": correct, "p_correct": correct / asked}
+            for qid, (asked, correct) in totals.items()
+        }
+
+
+def this_week() -> date:
+    """Monday of the current week, for ``since=`` filters."""
+    today = date.today()
+    return today - timedelta(days=today.weekday())
@@ -0,0 +1,432 @@
+"""Headless HTTP/JSON API for the adaptive test.
+
+A small asyncio HTTP/1.1 server (keep-alive, no framework) over the same
+engine and session classes the Streamlit app uses, so mobile clients and load
+generators can run tests without a browser rerun per click:
+
+    POST /sessions                  {"skill", "start_seniority", "account"?, "seed"?, "mode"?}
+    GET  /sessions/{id}/question    current unanswered question
+    POST /sessions/{id}/answer      {"selected_index"}
+    GET  /sessions/{id}/summary     final result and answer history
+
+    POST /multi-sessions            {"skills", "start_seniority"?, "account"?, "seed"?}
+    GET  /multi-sessions/{id}/questions   pending question of every active skill
+    POST /multi-sessions/{id}/answers     {"answers": {skill: selected_index}}
+    GET  /multi-sessions/{id}/summary
+
+``"mode": "cat"`` runs the IRT adaptive test (``cat.py``) instead of the
+branching tree.  Answer keys never leave the server; question payloads (with
+``question_html``) come from a ``render_cache.RenderCache``.  Sessions are
+stored encoded through a ``session_store`` backend (``--sessions`` for
+SQLite), so they survive a restart.  Finished tests are appended to the result store like in the UI.
+Handlers fsync and query SQLite, so they run on the loop's default thread
+pool and the event loop only parses and writes HTTP.
+
+    python api_server.py [--host 127.0.0.1] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from cat import CatSession, ItemPool
+from engine import AdaptiveTestingEngine, AdaptiveTestSession
+from metrics import METRICS, start_http_server
+from multi_skill import MultiSkillSession
+from near_duplicates import load_duplicates
+from render_cache import RenderCache
+from result_store import ResultStore
+from session_store import (
+    MemoryBackend,
+    SessionConflict,
+    SessionNotFound,
+    SessionStore,
+    SQLiteBackend,
+)
+from snapshot import load_snapshot
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 431: "Request Header Fields Too Large",
+               500: "Internal Server Error"}
+
+log = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def request_seed(body: dict) -> int | None:
+    """Optional client ``seed``: an int in ``[0, 2**63)``, as sessions pack it."""
+
+    seed = body.get("seed")
+    if seed is None:
+        return None
+    if type(seed) is not int or not 0 <= seed < 2**63:
+        raise HTTPError(400, "seed must be an integer in [0, 2**63)")
+    return seed
+
+
+def public_question(session: AdaptiveTestSession, q, cache: RenderCache | None = None) -> dict | None:
+    """Client view of a served question: no answer keys."""
+
+    if q is None:
+        return None
+    if cache is not None:
+        return {**cache.get(q, session.perm_codes[-1]).public, "number": len(session.question_ids)}
+    return {
+        "id": q["id"],
+        "skill": q["skill"],
+        "level": AdaptiveTestingEngine.format_level_string(q["seniority"], q["level"]),
+        "question": q["question"],
+        "options": [opt["description"] for opt in q["options"]],
+        "number": len(session.question_ids),
+    }
+
+
+###############################################################################
+# -------------------------------  SERVICE  --------------------------------- #
+###############################################################################
+
+class QuizService:
+    """Route handlers; every handler takes the parsed JSON body."""
+
+    def __init__(self, engine: AdaptiveTestingEngine, results: ResultStore | None = None,
+                 store: SessionStore | None = None, render: RenderCache | None = None):
+        self.engine = engine
+        self.results = results
+        self.store = store or SessionStore(engine)
+        self.render = render
+
+    def _load(self, session_id: str, multi: bool = False) -> tuple[AdaptiveTestSession, str, int]:
+        try:
+            session, account, version = self.store.load(session_id)
+        except SessionNotFound:
+            raise HTTPError(404, "Unknown session") from None
+        if isinstance(session, MultiSkillSession) != multi:
+            raise HTTPError(404, "Unknown session")
+        return session, account, version
+
+    def _store(self, session_id: str, session: AdaptiveTestSession, account: str, version: int):
+        """Save what this request changed, unless another request saved first."""
+        try:
+            self.store.save(session_id, session, account, version)
+        except SessionConflict:
+            raise HTTPError(409, "Session was updated by another request; reload it") from None
+
+    def start_session(self, body: dict) -> tuple[int, dict]:
+        skill = body.get("skill")
+        if skill not in self.engine.skill_ids:
+            raise HTTPError(400, f"Unknown skill: {skill}")
+        mode = body.get("mode", "tree")
+        if mode not in ("tree", "cat") or mode == "cat" and self.store.pool is None:
+            raise HTTPError(400, f"Unsupported mode: {mode}")
+        start = body.get("start_seniority", "middle")
+        seed = request_seed(body)
+        try:
+            if mode == "cat":
+                session = CatSession(self.store.pool, skill, start, seed=seed)
+            else:
+                session = AdaptiveTestSession(self.engine, skill, start, seed=seed)
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+        question = session.get_next_question()
+        session_id = self.store.create(session, str(body.get("account", "")))
+        return 201, {
+            "session_id": session_id,
+            "question": public_question(session, question, self.render),
+        }
+
+    def current_question(self, session_id: str) -> tuple[int, dict]:
+        session, _, _ = self._load(session_id)
+        question = session.current_question
+        return 200, {
+            "is_finished": session.is_finished,
+            "question": public_question(session, question, self.render),
+        }
+
+    def submit_answer(self, session_id: str, body: dict) -> tuple[int, dict]:
+        session, account, version = self._load(session_id)
+        if session.is_finished:
+            raise HTTPError(409, "Session already finished")
+        idx = body.get("selected_index")
+        current = session.current_question
+        n_options = len(current["options"]) if current is not None else 0
+        if type(idx) is not int or not 0 <= idx < n_options:  # not bool either
+            raise HTTPError(400, "selected_index out of range")
+
+        result = session.submit_answer(idx)
+        if "error" in result:
+            raise HTTPError(409, result["error"])
+        answer = result["answer_history"]
+        question = None if result["is_finished"] else session.get_next_question()
+        self._store(session_id, session, account, version)
+        if session.is_finished:
+            self._save(session, account)
+        return 200, {
+            "is_correct": answer["is_correct"],
+            "is_finished": session.is_finished,
+            "final_result": session.final_result,
+            "question": public_question(session, question, self.render),
+        }
+
+    def summary(self, session_id: str) -> tuple[int, dict]:
+        session, account, _ = self._load(session_id)
+        return 200, {
+            "account": account,
+            "skill": session.skill,
+            "start_seniority": session.starting_seniority,
+            "is_finished": session.is_finished,
+            "final_result": session.final_result,
+            "failed": session.failed,
+            "answer_history": session.answer_history,
+        }
+
+    # --------------------------------------------------------------------- #
+    # Multi-skill sessions
+
+    def start_multi(self, body: dict) -> tuple[int, dict]:
+        skills = body.get("skills")
+        if not isinstance(skills, list) or not skills or len(set(skills)) != len(skills):
+            raise HTTPError(400, "skills must be a non-empty list of distinct skills")
+        unknown = [skill for skill in skills if skill not in self.engine.skill_ids]
+        if unknown:
+            raise HTTPError(400, f"Unknown skill: {unknown[0]}")
+        seed = request_seed(body)
+        try:
+            session = MultiSkillSession(
+                self.engine, skills, body.get("start_seniority", "middle"), seed=seed,
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+        account = str(body.get("account", ""))
+        questions = self._multi_questions(session)
+        session_id = self.store.create(session, account)
+        self._save_finished(session, set(), account)  # a skill may have had no question
+        return 201, {"session_id": session_id, "questions": questions}
+
+    def _multi_questions(self, session: MultiSkillSession) -> dict:
+        return {
+            skill: public_question(session.sessions[skill], q, self.render)
+            for skill, q in session.next_questions().items()
+        }
+
+    def _save_finished(self, session: MultiSkillSession, done: set, account: str):
+        """Save every skill that finished since *done*, by answer or by running out of questions."""
+        for skill in session.results:
+            if skill not in done:
+                self._save(session.sessions[skill], account)
+
+    def multi_questions(self, session_id: str) -> tuple[int, dict]:
+        session, account, version = self._load(session_id, multi=True)
+        before, done = session.encode(), set(session.results)
+        questions = self._multi_questions(session)
+        if session.encode() != before:  # newly started (or question-less) skills
+            self._store(session_id, session, account, version)
+            self._save_finished(session, done, account)
+        return 200, {"is_finished": session.is_finished, "questions": questions}
+
+    def multi_answers(self, session_id: str, body: dict) -> tuple[int, dict]:
+        session, account, version = self._load(session_id, multi=True)
+        answers = body.get("answers")
+        if not isinstance(answers, dict) or not answers:
+            raise HTTPError(400, "answers must map skills to selected_index")
+        for skill, idx in answers.items():
+            current = session.sessions[skill].current_question if skill in session.active else None
+            if current is None:
+                raise HTTPError(409, f"No active question for {skill}")
+            if type(idx) is not int or not 0 <= idx < len(current["options"]):
+                raise HTTPError(400, f"selected_index out of range for {skill}")
+
+        done = set(session.results)
+        results = {}
+        for skill, result in session.submit_answers(answers).items():
+            results[skill] = {
+                "is_correct": result["answer_history"]["is_correct"],
+                "is_finished": result["is_finished"],
+                "final_result": result["final_result"],
+            }
+        questions = self._multi_questions(session)
+        self._store(session_id, session, account, version)
+        self._save_finished(session, done, account)  # only once the answers are stored
+        return 200, {"results": results, "is_finished": session.is_finished, "questions": questions}
+
+    def multi_summary(self, session_id: str) -> tuple[int, dict]:
+        session, account, _ = self._load(session_id, multi=True)
+        return 200, {
+            "account": account,
+            "is_finished": session.is_finished,
+            "waiting": session.waiting,
+            "skills": {
+                skill: {
+                    "start_seniority": s.starting_seniority,
+                    "is_finished": s.is_finished,
+                    "final_result": s.final_result,
+                    "failed": s.failed,
+                    "answer_history": s.answer_history,
+                }
+                for skill, s in session.sessions.items()
+            },
+        }
+
+    def _save(self, session: AdaptiveTestSession, account: str):
+        if self.results is None:
+            return
+        self.results.append({
+            "account": account,
+            "skill": session.skill,
+            "start_seniority": session.starting_seniority,
+            "mode": "cat" if isinstance(session, CatSession) else "tree",
+            "final_result": session.final_result,
+            "failed": session.failed,
+            "answer_history": session.answer_history,
+            "seed": session.seed,
+            "datetime": datetime.now().isoformat(),
+        })
+
+    def dispatch(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+        if parts == ["sessions"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            return self.start_session(body)
+        if len(parts) == 3 and parts[0] == "sessions":
+            route = (method, parts[2])
+            if route == ("GET", "question"):
+                return self.current_question(parts[1])
+            if route == ("POST", "answer"):
+                return self.submit_answer(parts[1], body)
+            if route == ("GET", "summary"):
+                return self.summary(parts[1])
+        if parts == ["multi-sessions"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            return self.start_multi(body)
+        if len(parts) == 3 and parts[0] == "multi-sessions":
+            route = (method, parts[2])
+            if route == ("GET", "questions"):
+                return self.multi_questions(parts[1])
+            if route == ("POST", "answers"):
+                return self.multi_answers(parts[1], body)
+            if route == ("GET", "summary"):
+                return self.multi_summary(parts[1])
+        raise HTTPError(404, "Not found")
+
+
+###############################################################################
+# -----------------------------  HTTP LAYER  -------------------------------- #
+###############################################################################
+
+async def _read_request(reader: asyncio.StreamReader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    raw = await reader.readexactly(length) if length else b""
+    return method, path, headers, raw
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+async def handle_connection(service: QuizService, reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                method, path, headers, raw = await _read_request(reader)
+            except asyncio.LimitOverrunError:  # header larger than the stream limit
+                writer.write(_response(431, {"error": "Request header too large"}, False))
+                await writer.drain()
+                break
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                break
+            keep_alive = headers.get("connection", "").lower() != "close"
+            try:
+                body = json.loads(raw) if raw else {}
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Body must be a JSON object")
+                status, payload = await loop.run_in_executor(None, service.dispatch, method, path, body)
+            except json.JSONDecodeError:
+                status, payload = 400, {"error": "Invalid JSON"}
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception:  # never drop the connection on a handler bug
+                log.exception("%s %s failed", method, path)
+                status, payload = 500, {"error": "Internal server error"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def _expire_loop(store: SessionStore, interval: float = 60.0):
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.get_running_loop().run_in_executor(None, store.expire)
+
+
+async def serve(service: QuizService, host: str = "127.0.0.1", port: int = 8080):
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port
+    )
+    expiry = asyncio.create_task(_expire_loop(service.store))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        expiry.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive quiz HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--metrics-port", type=int,
+                        help="enable timing metrics and serve them on this port")
+    parser.add_argument("--sessions", metavar="SQLITE_PATH",
+                        help="keep sessions in this SQLite file (default: in memory)")
+    args = parser.parse_args()
+
+    questions, index = load_snapshot()
+    engine = AdaptiveTestingEngine(questions, track_exposure=True, index=index,
+                                   duplicates=load_duplicates(questions=questions))
+    engine.exposure.start()
+    if args.metrics_port:
+        METRICS.enable()
+        start_http_server(args.metrics_port)
+    backend = SQLiteBackend(args.sessions) if args.sessions else MemoryBackend()
+    store = SessionStore(engine, backend, pool=ItemPool(engine))
+    service = QuizService(engine, results=ResultStore(), store=store,
+                          render=RenderCache().warm(engine.questions))
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.results.close()
+        engine.exposure.flush()
+
+
+if __name__ == "__main__":
+    main()
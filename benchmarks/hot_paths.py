@@ -0,0 +1,206 @@
+"""Latency/throughput harness for the engine and session hot paths.
+
+Drives realistic candidate traffic (every skill, every start seniority,
+candidates of mixed ability) through:
+
+* ``AdaptiveTestingEngine.get_question``
+* ``AdaptiveTestSession.get_next_question`` / ``submit_answer``
+* the local result save (``ResultStore.append``, what ``save_result_to_file`` does)
+* the cold load path (``json.load`` and the snapshot)
+
+and reports throughput, p50/p99 latency and the memory each answer leaves
+behind.  The memory figures are net: traced bytes and allocator blocks still
+held after a run with every session kept alive, divided by the answers.
+Python offers no count of allocations made and freed along the way, so
+short-lived garbage does not show up in them.  With
+``--save`` the numbers become the baseline; later runs compare against it and
+exit non-zero when throughput or p50 regress beyond ``--tolerance``.
+
+    python -m benchmarks.hot_paths [--candidates 2000] [--save] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from engine import QUESTIONS_FILE, AdaptiveTestingEngine, AdaptiveTestSession, load_questions
+from result_store import ResultStore
+from snapshot import build_snapshot, load_snapshot
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SKILLS = ["html", "css", "javascript", "react", "github"]
+SENIORITIES = ["fresher", "junior", "middle", "senior"]
+
+
+def _summary(latencies_ns: list[int]) -> dict:
+    lat = sorted(latencies_ns)
+    total = sum(lat)
+    return {
+        "ops_per_s": round(len(lat) / (total / 1e9), 1) if total else 0.0,
+        "p50_us": round(lat[len(lat) // 2] / 1000, 2),
+        "p99_us": round(lat[min(len(lat) - 1, int(len(lat) * 0.99))] / 1000, 2),
+    }
+
+
+def bench_get_question(engine: AdaptiveTestingEngine, n: int, rng: random.Random) -> dict:
+    keys = [(rng.choice(SKILLS), rng.choice(SENIORITIES), rng.randint(1, 5)) for _ in range(n)]
+    clock = time.perf_counter_ns
+    lat = []
+    for skill, seniority, level in keys:
+        t0 = clock()
+        engine.get_question(skill, seniority, level, rng=rng)
+        lat.append(clock() - t0)
+    return _summary(lat)
+
+
+def bench_sessions(engine: AdaptiveTestingEngine, candidates: int, rng: random.Random) -> dict:
+    clock = time.perf_counter_ns
+    next_lat, submit_lat = [], []
+    for i in range(candidates):
+        ability = rng.random()
+        session = AdaptiveTestSession(engine, SKILLS[i % 5], SENIORITIES[(i // 5) % 4],
+                                      seed=rng.randrange(2**63))
+        while True:
+            t0 = clock()
+            q = session.get_next_question()
+            next_lat.append(clock() - t0)
+            if q is None:
+                break
+            session.prefetch()  # off the clock: the app runs it after rendering
+            want = rng.random() < ability
+            idx = next(j for j, opt in enumerate(q["options"]) if opt["isAnswerKey"] == want)
+            t0 = clock()
+            session.submit_answer(idx)
+            submit_lat.append(clock() - t0)
+    return {"get_next_question": _summary(next_lat), "submit_answer": _summary(submit_lat)}
+
+
+def bench_retained_per_answer(engine: AdaptiveTestingEngine, candidates: int) -> dict:
+    """Traced bytes and allocator blocks still held per answer, sessions kept alive."""
+
+    rng = random.Random(7)
+    sessions, answers = [], 0
+    tracemalloc.start()
+    blocks0 = sys.getallocatedblocks()
+    bytes0 = tracemalloc.get_traced_memory()[0]
+    for i in range(candidates):
+        session = AdaptiveTestSession(engine, SKILLS[i % 5], SENIORITIES[i % 4], seed=i)
+        while (q := session.get_next_question()) is not None:
+            session.submit_answer(rng.randrange(len(q["options"])))
+            answers += 1
+        sessions.append(session)
+    used = tracemalloc.get_traced_memory()[0] - bytes0
+    blocks = sys.getallocatedblocks() - blocks0
+    tracemalloc.stop()
+    return {"retained_bytes_per_answer": round(used / answers, 1),
+            "retained_blocks_per_answer": round(blocks / answers, 2)}
+
+
+def bench_result_save(n: int) -> dict:
+    record = {
+        "account": "candidate@example.com", "skill": "react", "final_result": "LEVELM3",
+        "failed": False, "seed": 1, "datetime": "2026-01-01T00:00:00",
+        "answer_history": [{"question_id": "1", "selected_index": 0, "is_correct": True}] * 5,
+    }
+    clock = time.perf_counter_ns
+    lat = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(tmp)
+        for _ in range(n):
+            t0 = clock()
+            store.append(record)
+            lat.append(clock() - t0)
+        store.close()
+    return _summary(lat)
+
+
+def bench_load(repeats: int) -> dict:
+    def json_path():
+        AdaptiveTestingEngine(load_questions(QUESTIONS_FILE))
+
+    def snapshot_path():
+        questions, index = load_snapshot()
+        AdaptiveTestingEngine(questions, index=index)
+
+    build_snapshot()
+    out = {}
+    for name, fn in (("json", json_path), ("snapshot", snapshot_path)):
+        lat = []
+        for _ in range(repeats):
+            t0 = time.perf_counter_ns()
+            fn()
+            lat.append(time.perf_counter_ns() - t0)
+        out[name] = _summary(lat)
+    return out
+
+
+def run(candidates: int) -> dict:
+    rng = random.Random(12345)
+    engine = AdaptiveTestingEngine(load_questions(), track_exposure=True, exposure_path=None)
+    sessions = bench_sessions(engine, candidates, rng)
+    load = bench_load(10)
+    return {
+        "get_question": bench_get_question(engine, candidates * 5, rng),
+        "get_next_question": sessions["get_next_question"],
+        "submit_answer": sessions["submit_answer"],
+        "result_save": bench_result_save(candidates),
+        "load_json": load["json"],
+        "load_snapshot": load["snapshot"],
+        "retained": bench_retained_per_answer(engine, min(candidates, 1000)),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of throughput or p50 beyond *tolerance* (fraction)."""
+
+    failures = []
+    for name, metrics in current.items():
+        base = baseline.get(name)
+        if not base or "ops_per_s" not in metrics:
+            continue
+        if metrics["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            failures.append(f"{name}: {metrics['ops_per_s']} ops/s < baseline {base['ops_per_s']}")
+        if metrics["p50_us"] > base["p50_us"] * (1 + tolerance):
+            failures.append(f"{name}: p50 {metrics['p50_us']} us > baseline {base['p50_us']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.candidates)
+    print(f"{'benchmark':<20}{'ops/s':>14}{'p50 us':>10}{'p99 us':>10}")
+    for name, m in results.items():
+        if "ops_per_s" in m:
+            print(f"{name:<20}{m['ops_per_s']:>14,.0f}{m['p50_us']:>10}{m['p99_us']:>10}")
+    kept = results["retained"]
+    print(f"retained per answer: {kept['retained_bytes_per_answer']} B, "
+          f"{kept['retained_blocks_per_answer']} blocks")
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f_out:
+            json.dump(results, f_out, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --save to create one.")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f_in:
+        failures = compare(results, json.load(f_in), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
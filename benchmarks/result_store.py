@@ -0,0 +1,74 @@
+"""Write and scan throughput: one pretty-printed file per result vs. the log.
+
+Run from the repository root:
+
+    python -m benchmarks.result_store [n_results]
+"""
+
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+from result_store import ResultStore
+
+
+def _record(i: int) -> dict:
+    return {
+        "account": f"candidate{i % 997}@example.com",
+        "skill": ["html", "css", "javascript", "react", "github"][i % 5],
+        "final_result": "LEVELM3",
+        "failed": False,
+        "answer_history": [
+            {"question_id": str(100 + j), "selected_index": j % 4, "is_correct": bool(j % 2)}
+            for j in range(5)
+        ],
+        "datetime": "2026-01-01T00:00:00",
+    }
+
+
+def _rate(n: int, seconds: float) -> str:
+    return f"{n / seconds:12,.0f} records/s"
+
+
+def main(n: int = 20000):
+    records = [_record(i) for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files_dir = os.path.join(tmp, "files")
+        os.makedirs(files_dir)
+        t0 = time.perf_counter()
+        for i, record in enumerate(records):
+            with open(os.path.join(files_dir, f"r{i}.json"), "w", encoding="utf-8") as f_out:
+                json.dump(record, f_out, indent=2, ensure_ascii=False)
+        t_write_files = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for path in glob.glob(os.path.join(files_dir, "*.json")):
+            with open(path, "r", encoding="utf-8") as f_in:
+                json.load(f_in)
+        t_scan_files = time.perf_counter() - t0
+
+        store = ResultStore(os.path.join(tmp, "store"))
+        t0 = time.perf_counter()
+        for record in records:
+            store.append(record)
+        store.close()
+        t_write_store = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scanned = sum(1 for _ in store.iter_records())
+        t_scan_store = time.perf_counter() - t0
+        assert scanned == n
+
+    print(f"results: {n}")
+    print(f"write  per-file : {_rate(n, t_write_files)}")
+    print(f"write  store    : {_rate(n, t_write_store)}")
+    print(f"scan   per-file : {_rate(n, t_scan_files)}")
+    print(f"scan   store    : {_rate(n, t_scan_store)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,76 @@
+"""Question search latency on a bank blown up to ``n`` questions.
+
+The bank is repeated (with a unique marker word per copy) until it holds *n*
+questions, indexed once, then queried with words drawn from the bank: one
+word, two words, a search-as-you-type prefix and filter-only listings.
+"Repeated" replays the last 50 queries, as paging or changing filters in
+the admin page does, which hits the index's LRU of recent matches.
+
+Run from the repository root:
+
+    python -m benchmarks.search [n_questions]
+"""
+
+import random
+import sys
+import time
+
+from engine import freeze_question, load_questions
+from search_index import QuestionSearchIndex, question_text, tokenize
+
+
+def _bank(n: int) -> list:
+    base = load_questions()
+    questions = []
+    for i in range(n):
+        q = dict(base[i % len(base)])
+        q["id"] = str(i + 1)
+        q["question"] = f"{q['question']} copy{i}"
+        questions.append(freeze_question(q))
+    return questions
+
+
+def _queries(questions, count: int, rng: random.Random) -> list[tuple[str, dict]]:
+    queries = []
+    for _ in range(count):
+        q = rng.choice(questions)
+        words = [w for w in tokenize(question_text(q)) if len(w) > 3] or ["the"]
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append((rng.choice(words), {}))
+        elif kind == 1:
+            queries.append((" ".join(rng.sample(words, min(2, len(words)))), {"skill": q["skill"]}))
+        elif kind == 2:
+            word = rng.choice(words)
+            queries.append((word[:rng.randint(3, len(word))], {}))
+        else:
+            queries.append(("", {"skill": q["skill"], "level": q["level"]}))
+    return queries
+
+
+def _run(index: QuestionSearchIndex, queries) -> dict:
+    lat = []
+    for query, filters in queries:
+        t0 = time.perf_counter_ns()
+        index.search(query, **filters)
+        lat.append(time.perf_counter_ns() - t0)
+    lat.sort()
+    return {
+        "p50_us": round(lat[len(lat) // 2] / 1000, 1),
+        "p99_us": round(lat[min(len(lat) - 1, int(len(lat) * 0.99))] / 1000, 1),
+    }
+
+
+def main(n: int = 100_000, n_queries: int = 2000):
+    questions = _bank(n)
+    t0 = time.perf_counter()
+    index = QuestionSearchIndex(questions)
+    print(f"index {n} questions : {time.perf_counter() - t0:8.2f} s, {len(index.terms)} terms")
+
+    queries = _queries(questions, n_queries, random.Random(0))
+    print(f"queries             : {_run(index, queries)}")
+    print(f"repeated queries    : {_run(index, queries[-50:] * 10)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
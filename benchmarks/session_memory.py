@@ -0,0 +1,73 @@
+"""Per-session memory: one engine per visitor vs. one shared engine.
+
+Run from the repository root:
+
+    python -m benchmarks.session_memory [n_sessions]
+"""
+
+import copy
+import json
+import random
+import sys
+import tracemalloc
+
+from engine import QUESTIONS_FILE, AdaptiveTestingEngine, AdaptiveTestSession, load_questions
+
+SKILLS = ["html", "css", "javascript", "react", "github"]
+
+
+def _measure(n_sessions: int, make_engine) -> float:
+    """Return traced bytes per session after each one answers a question."""
+
+    sessions = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n_sessions):
+        session = AdaptiveTestSession(make_engine(), SKILLS[i % len(SKILLS)], "middle")
+        session.get_next_question()
+        session.submit_answer(0)
+        session.get_next_question()
+        sessions.append(session)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n_sessions
+
+
+def main(n_sessions: int = 200):
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f_in:
+        raw = json.load(f_in)
+
+    # Old layout: st.cache_data hands every session its own copy of the list,
+    # and every session indexes that copy into its own engine.
+    per_session = _measure(n_sessions, lambda: _LegacyEngine(copy.deepcopy(raw)))
+
+    shared_engine = AdaptiveTestingEngine(load_questions())
+    shared = _measure(n_sessions, lambda: shared_engine)
+
+    print(f"sessions: {n_sessions}")
+    print(f"engine per session : {per_session / 1024:10.1f} KB/session")
+    print(f"shared engine      : {shared / 1024:10.1f} KB/session")
+
+
+class _LegacyEngine:
+    """The pre-sharing engine: a private dict index over a private list."""
+
+    def __init__(self, questions_data):
+        self.questions_by_key = {}
+        for q in questions_data:
+            key = f"{q['skill']}_{q['seniority']}_{q['level']}"
+            self.questions_by_key.setdefault(key, []).append(q)
+
+    def get_question(self, skill, seniority, level, **_):
+        pool = self.questions_by_key.get(f"{skill}_{seniority}_{level}", [])
+        return random.choice(pool) if pool else None
+
+    def record_exposure(self, question_id):
+        pass  # no exposure tracking before the shared engine
+
+    def related_ids(self, question_id):
+        return (question_id,)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
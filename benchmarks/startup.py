@@ -0,0 +1,42 @@
+"""Cold-start time: parse merged_file.json vs. load the prebuilt snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.startup [repeats]
+"""
+
+import json
+import sys
+import time
+
+from engine import QUESTIONS_FILE, AdaptiveTestingEngine
+from snapshot import build_snapshot, load_snapshot
+
+
+def _best_of(repeats: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _from_json():
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f_in:
+        AdaptiveTestingEngine(json.load(f_in))
+
+
+def _from_snapshot():
+    questions, index = load_snapshot()
+    AdaptiveTestingEngine(questions, index=index)
+
+
+def main(repeats: int = 20):
+    build_snapshot()
+    print(f"json.load + index : {_best_of(repeats, _from_json) * 1000:8.2f} ms")
+    print(f"snapshot          : {_best_of(repeats, _from_snapshot) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,215 @@
+"""Branching trees for the adaptive test, expressed as data.
+
+``TRANSITIONS`` maps ``(start_seniority, path_state, is_correct)`` to either
+the next path state (``"M5"`` = middle, level 5) or a final result label.
+``compile_tree`` turns it into an integer-indexed state machine so a session
+advances with a single tuple lookup per answer.  New start points or longer
+trees only need new table rows.
+"""
+
+SENIORITY_CODES = {"F": "fresher", "J": "junior", "M": "middle", "S": "senior"}
+
+# Results that mark the candidate as failed (below the lowest level tested)
+FAILED_RESULTS = frozenset({"LEVELF0", "LEVELJ0", "LEVELM0"})
+
+TRANSITIONS = {
+    # fresher – starts at F3
+    ("fresher", "F3", True):  "F5",
+    ("fresher", "F3", False): "F1",
+    ("fresher", "F5", True):  "J3",
+    ("fresher", "F5", False): "F4",
+    ("fresher", "F1", True):  "F2",
+    ("fresher", "F1", False): "LEVELF0",
+    ("fresher", "J3", True):  "J5",
+    ("fresher", "J3", False): "J1",
+    ("fresher", "F4", True):  "LEVELF4",
+    ("fresher", "F4", False): "LEVELF3",
+    ("fresher", "F2", True):  "LEVELF2",
+    ("fresher", "F2", False): "LEVELF1",
+    ("fresher", "J5", True):  "LEVELJ5",
+    ("fresher", "J5", False): "J4",
+    ("fresher", "J1", True):  "J2",
+    ("fresher", "J1", False): "LEVELF5",
+    ("fresher", "J4", True):  "LEVELJ4",
+    ("fresher", "J4", False): "LEVELJ3",
+    ("fresher", "J2", True):  "LEVELJ2",
+    ("fresher", "J2", False): "LEVELJ1",
+    # junior – starts at J3
+    ("junior", "J3", True):  "J5",
+    ("junior", "J3", False): "J1",
+    ("junior", "J5", True):  "M3",
+    ("junior", "J5", False): "J4",
+    ("junior", "J1", True):  "J2",
+    ("junior", "J1", False): "F3",
+    ("junior", "M3", True):  "M5",
+    ("junior", "M3", False): "M1",
+    ("junior", "J4", True):  "LEVELJ4",
+    ("junior", "J4", False): "LEVELJ3",
+    ("junior", "J2", True):  "LEVELJ2",
+    ("junior", "J2", False): "LEVELJ1",
+    ("junior", "F3", True):  "F5",
+    ("junior", "F3", False): "F1",
+    ("junior", "M5", True):  "LEVELM5",
+    ("junior", "M5", False): "M4",
+    ("junior", "M1", True):  "M2",
+    ("junior", "M1", False): "LEVELJ5",
+    ("junior", "F5", True):  "LEVELF5",
+    ("junior", "F5", False): "F4",
+    ("junior", "F1", True):  "F2",
+    ("junior", "F1", False): "LEVELF0",
+    ("junior", "M4", True):  "LEVELM4",
+    ("junior", "M4", False): "LEVELM3",
+    ("junior", "M2", True):  "LEVELM2",
+    ("junior", "M2", False): "LEVELM1",
+    ("junior", "F4", True):  "LEVELF4",
+    ("junior", "F4", False): "LEVELF3",
+    ("junior", "F2", True):  "LEVELF2",
+    ("junior", "F2", False): "LEVELF1",
+    # middle – starts at M3
+    ("middle", "M3", True):  "M5",
+    ("middle", "M3", False): "M1",
+    ("middle", "M5", True):  "S3",
+    ("middle", "M5", False): "M4",
+    ("middle", "M1", True):  "M2",
+    ("middle", "M1", False): "J3",
+    ("middle", "S3", True):  "S5",
+    ("middle", "S3", False): "S1",
+    ("middle", "M4", True):  "LEVELM4",
+    ("middle", "M4", False): "LEVELM3",
+    ("middle", "M2", True):  "LEVELM2",
+    ("middle", "M2", False): "LEVELM1",
+    ("middle", "J3", True):  "J5",
+    ("middle", "J3", False): "J1",
+    ("middle", "S5", True):  "LEVELS5",
+    ("middle", "S5", False): "S4",
+    ("middle", "S1", True):  "S2",
+    ("middle", "S1", False): "LEVELM5",
+    ("middle", "J5", True):  "LEVELJ5",
+    ("middle", "J5", False): "J4",
+    ("middle", "J1", True):  "J2",
+    ("middle", "J1", False): "LEVELJ0",
+    ("middle", "S4", True):  "LEVELS4",
+    ("middle", "S4", False): "LEVELS3",
+    ("middle", "S2", True):  "LEVELS2",
+    ("middle", "S2", False): "LEVELS1",
+    ("middle", "J4", True):  "LEVELJ4",
+    ("middle", "J4", False): "LEVELJ3",
+    ("middle", "J2", True):  "LEVELJ2",
+    ("middle", "J2", False): "LEVELJ1",
+    # senior – starts at S3
+    ("senior", "S3", True):  "S5",
+    ("senior", "S3", False): "S1",
+    ("senior", "S5", True):  "LEVELS5",
+    ("senior", "S5", False): "S4",
+    ("senior", "S1", True):  "S2",
+    ("senior", "S1", False): "M3",
+    ("senior", "S4", True):  "LEVELS4",
+    ("senior", "S4", False): "LEVELS3",
+    ("senior", "S2", True):  "LEVELS2",
+    ("senior", "S2", False): "LEVELS1",
+    ("senior", "M3", True):  "M5",
+    ("senior", "M3", False): "M1",
+    ("senior", "M5", True):  "LEVELM5",
+    ("senior", "M5", False): "M4",
+    ("senior", "M1", True):  "M2",
+    ("senior", "M1", False): "LEVELM0",
+    ("senior", "M4", True):  "LEVELM4",
+    ("senior", "M4", False): "LEVELM3",
+    ("senior", "M2", True):  "LEVELM2",
+    ("senior", "M2", False): "LEVELM1",
+}
+
+
+class BranchingTree:
+    """Compiled transition table.
+
+    States are numbered ``0..n-1`` (the same path name under two different
+    starts is two different states).  ``next_state[2 * state + is_correct]``
+    is the next state id, or ``~result_id`` (a negative int) when the answer
+    ends the test.
+    """
+
+    __slots__ = (
+        "start_state", "state_names", "state_start", "state_seniority",
+        "state_level", "next_state", "results", "result_failed",
+    )
+
+    def __init__(self, start_state, state_names, state_start, state_seniority,
+                 state_level, next_state, results, result_failed):
+        self.start_state = start_state
+        self.state_names = state_names
+        self.state_start = state_start
+        self.state_seniority = state_seniority
+        self.state_level = state_level
+        self.next_state = next_state
+        self.results = results
+        self.result_failed = result_failed
+
+    @property
+    def n_states(self) -> int:
+        return len(self.state_names)
+
+
+def parse_state(name: str) -> tuple[str, int]:
+    """``"M5"`` -> ``("middle", 5)``."""
+
+    try:
+        return SENIORITY_CODES[name[0]], int(name[1:])
+    except (KeyError, IndexError, ValueError):
+        raise ValueError(f"Invalid path state: {name!r}") from None
+
+
+def compile_tree(transitions: dict = TRANSITIONS,
+                 failed_results=FAILED_RESULTS) -> BranchingTree:
+    """Compile a ``(start, state, is_correct) -> target`` table.
+
+    Each start's root is the one state that is never a target.  A target is a
+    state when the table defines transitions for it, otherwise it must be a
+    result label (``LEVEL...``).
+    """
+
+    sources = {}
+    for start, name, _ in transitions:
+        sources.setdefault(start, []).append(name)
+
+    state_ids = {}
+    start_state = {}
+    for start, names in sources.items():
+        targets = {transitions[key] for key in transitions if key[0] == start}
+        roots = [n for n in dict.fromkeys(names) if n not in targets]
+        if len(roots) != 1:
+            raise ValueError(f"Start {start!r} needs exactly one root state, found {roots}")
+        for name in dict.fromkeys(roots + names):
+            state_ids[(start, name)] = len(state_ids)
+        start_state[start] = state_ids[(start, roots[0])]
+
+    result_ids = {}
+    next_state = [0] * (2 * len(state_ids))
+    for (start, name), sid in state_ids.items():
+        for is_correct in (False, True):
+            target = transitions.get((start, name, is_correct))
+            if target is None:
+                raise ValueError(f"Missing transition for {(start, name, is_correct)}")
+            if (start, target) in state_ids:
+                next_state[2 * sid + is_correct] = state_ids[(start, target)]
+            elif target.startswith("LEVEL"):
+                rid = result_ids.setdefault(target, len(result_ids))
+                next_state[2 * sid + is_correct] = ~rid
+            else:
+                raise ValueError(f"Undefined target state {target!r} under start {start!r}")
+
+    parsed = [parse_state(name) for _, name in state_ids]
+    results = tuple(result_ids)
+    return BranchingTree(
+        start_state=start_state,
+        state_names=tuple(name for _, name in state_ids),
+        state_start=tuple(start for start, _ in state_ids),
+        state_seniority=tuple(seniority for seniority, _ in parsed),
+        state_level=tuple(level for _, level in parsed),
+        next_state=tuple(next_state),
+        results=results,
+        result_failed=tuple(label in failed_results for label in results),
+    )
+
+
+DEFAULT_TREE = compile_tree()
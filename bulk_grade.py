@@ -0,0 +1,214 @@
+"""Offline grading of CSV answer sheets (paper tests, external LMS exports).
+
+One row per candidate and skill::
+
+    account,skill,start_seniority,answers[,datetime]
+    an@example.com,react,middle,"38:0;46:B;37:2"
+
+``answers`` lists ``question_id:option`` pairs in the order they were asked;
+the option is the 0-based index (or letter) in the bank's original option
+order.  Each sheet is walked through the compiled branching tree exactly like
+``AdaptiveTestSession.submit_answer`` would, checking that every question
+belongs to the state it was answered in, and produces the same result labels.
+
+Sheets are streamed in chunks to a process pool (bounded number of chunks in
+flight) and graded chunks are appended to the result store as they come back;
+rejected rows go to ``--errors``.
+
+    python bulk_grade.py sheets.csv [--workers N] [--chunk-rows 5000] [--errors rejected.csv]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from branching import DEFAULT_TREE, BranchingTree
+from engine import QUESTIONS_FILE, AdaptiveTestingEngine
+from result_store import STORE_DIR, ResultStore
+from snapshot import load_snapshot
+
+REQUIRED_COLUMNS = ("account", "skill", "start_seniority", "answers")
+
+_engine: AdaptiveTestingEngine | None = None  # one per worker process
+
+
+class SheetError(ValueError):
+    """An answer sheet that cannot be replayed through the tree."""
+
+
+def parse_answers(text: str) -> list[tuple[str, int]]:
+    """``"38:0;46:B"`` -> ``[("38", 0), ("46", 1)]``."""
+
+    pairs = []
+    for token in filter(None, (t.strip() for t in text.split(";"))):
+        qid, sep, option = token.partition(":")
+        option = option.strip()
+        if not sep or not option:
+            raise SheetError(f"Malformed answer {token!r}")
+        if option.isdecimal():  # not isdigit(): "²" is a digit but not a number
+            idx = int(option)
+        elif len(option) == 1 and option.isalpha():
+            idx = ord(option.upper()) - ord("A")
+        else:
+            raise SheetError(f"Malformed option {option!r}")
+        pairs.append((qid.strip(), idx))
+    return pairs
+
+
+def grade_sheet(engine: AdaptiveTestingEngine, row: dict,
+                tree: BranchingTree = DEFAULT_TREE) -> dict:
+    """Replay one sheet; return the record the app would have saved."""
+
+    missing = [c for c in REQUIRED_COLUMNS if row.get(c) is None]
+    if missing:  # short row: csv fills the missing fields with None
+        raise SheetError(f"Row is missing {', '.join(missing)}")
+    skill, start = row["skill"], row["start_seniority"]
+    if start not in tree.start_state:
+        raise SheetError(f"Invalid seniority: {start}")
+    state = tree.start_state[start]
+    result = None
+    history = []
+    for qid, idx in parse_answers(row["answers"]):
+        if result is not None:
+            raise SheetError("Answers continue after the test ended")
+        offset = engine.offset_by_id.get(qid)
+        if offset is None:
+            raise SheetError(f"Unknown question {qid}")
+        q = engine.questions[offset]
+        if (q["skill"], q["seniority"], q["level"]) != (
+            skill, tree.state_seniority[state], tree.state_level[state]
+        ):
+            raise SheetError(f"Question {qid} does not belong to step {tree.state_names[state]}")
+        if not 0 <= idx < len(q["options"]):
+            raise SheetError(f"Option {idx} out of range for question {qid}")
+
+        correct = bool(q["options"][idx]["isAnswerKey"])
+        history.append({"question_id": qid, "selected_index": idx, "is_correct": correct})
+        nxt = tree.next_state[2 * state + correct]
+        if nxt >= 0:
+            state = nxt
+        else:
+            result = ~nxt
+    if result is None:
+        raise SheetError("Sheet ends before the test does")
+
+    return {
+        "account": row["account"],
+        "skill": skill,
+        "start_seniority": start,
+        "final_result": tree.results[result],
+        "failed": tree.result_failed[result],
+        "answer_history": history,
+        "datetime": row.get("datetime") or datetime.now().isoformat(),
+        "source": "bulk",
+    }
+
+
+###############################################################################
+# -----------------------------  PROCESS POOL  ------------------------------ #
+###############################################################################
+
+def _init_worker(source: str):
+    global _engine
+    questions, index = load_snapshot(source)
+    _engine = AdaptiveTestingEngine(questions, index=index)
+
+
+def grade_chunk(rows: list[dict]) -> tuple[list[dict], list[tuple[dict, str]]]:
+    """Grade rows in a worker; return ``(records, [(row, reason), ...])``."""
+
+    records, rejected = [], []
+    for row in rows:
+        try:
+            records.append(grade_sheet(_engine, row))
+        except SheetError as e:
+            rejected.append((row, str(e)))
+    return records, rejected
+
+
+def iter_chunks(reader, size: int):
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade_file(path: str, store: ResultStore, *, source: str = QUESTIONS_FILE,
+               workers: int | None = None, chunk_rows: int = 5000,
+               errors_path: str | None = None) -> dict:
+    """Grade every sheet in *path* into *store*; return counts."""
+
+    load_snapshot(source)  # build the snapshot once before workers read it
+    workers = workers or os.cpu_count() or 1
+    counts = {"graded": 0, "rejected": 0}
+    errors_file = errors_writer = None
+
+    def drain(future):
+        nonlocal errors_file, errors_writer
+        records, rejected = future.result()
+        if records:
+            store.append_many(records)
+        counts["graded"] += len(records)
+        counts["rejected"] += len(rejected)
+        if rejected and errors_path:
+            if errors_writer is None:
+                errors_file = open(errors_path, "w", newline="", encoding="utf-8")
+                errors_writer = csv.writer(errors_file)
+                errors_writer.writerow(REQUIRED_COLUMNS + ("error",))
+            for row, reason in rejected:
+                errors_writer.writerow([row.get(c, "") for c in REQUIRED_COLUMNS] + [reason])
+
+    with open(path, newline="", encoding="utf-8") as f_in:
+        reader = csv.DictReader(f_in)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or ())]
+        if missing:
+            raise SheetError(f"Missing columns: {', '.join(missing)}")
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(source,)) as pool:
+            pending = deque()
+            for chunk in iter_chunks(reader, chunk_rows):
+                pending.append(pool.submit(grade_chunk, chunk))
+                if len(pending) >= 2 * workers:  # bound memory: results are written in order
+                    drain(pending.popleft())
+            while pending:
+                drain(pending.popleft())
+    if errors_file is not None:
+        errors_file.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade CSV answer sheets into the result store")
+    parser.add_argument("sheets")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    parser.add_argument("--errors", help="write rejected rows with the reason to this CSV")
+    args = parser.parse_args()
+
+    store = ResultStore(args.store)
+    t0 = time.perf_counter()
+    try:
+        counts = grade_file(args.sheets, store, source=args.questions, workers=args.workers,
+                            chunk_rows=args.chunk_rows, errors_path=args.errors)
+    except SheetError as e:
+        sys.exit(str(e))
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - t0
+    rate = counts["graded"] / elapsed * 60 if elapsed else 0
+    print(f"Graded {counts['graded']} sheets ({counts['rejected']} rejected) "
+          f"in {elapsed:.1f}s, {rate:,.0f} per minute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""Item statistics from real answers, for checking hand-set question levels.
+
+Every saved ``answer_history`` entry becomes one row of three flat arrays
+(session, item, correct); all statistics are ``np.bincount`` reductions over
+those arrays, so a million responses calibrate in seconds:
+
+* p-value – share of correct answers
+* point-biserial – correlation between the item and the session's rest score
+* IRT difficulty ``b`` (and discrimination ``a`` for 2PL) – marginal
+  maximum likelihood by EM over an ability grid, all items at once
+
+Each skill is its own scale.  ``flag_mismatches`` fits difficulty against
+the bucket rank (F1 < F2 < ... < S5) per skill and reports questions whose
+measured difficulty sits far from where their ``seniority``/``level`` puts
+them, with the false discovery rate controlled across the whole bank.
+
+    python calibration.py [--store results/store | --export exports] [--model 1pl|2pl] [--fdr 0.05] [--save]
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+from branching import SENIORITY_CODES
+from engine import QUESTIONS_FILE, load_questions
+from result_store import STORE_DIR, ResultStore
+
+SENIORITIES = list(SENIORITY_CODES.values())  # fresher, junior, middle, senior
+LEVELS = 5
+ITEM_PARAMS_FILE = os.path.join("results", "item_params.json")
+
+# Weak priors keep sparse items finite: difficulty ~ N(0, 3²), log a ~ N(0, 0.5²)
+B_VAR = 9.0
+LOG_A_VAR = 0.25
+
+
+def bucket_rank(seniority: str, level: int) -> int:
+    """0 for F1 up to 19 for S5."""
+    return SENIORITIES.index(seniority) * LEVELS + (level - 1)
+
+
+def rank_bucket(rank: int) -> tuple[str, int]:
+    rank = min(max(rank, 0), len(SENIORITIES) * LEVELS - 1)
+    return SENIORITIES[rank // LEVELS], rank % LEVELS + 1
+
+
+# --------------------------------------------------------------------------- #
+# Loading responses
+
+class Responses:
+    """Answers as flat arrays: ``person[i]`` answered ``item[i]``, ``correct[i]``."""
+
+    def __init__(self, person, item, correct, item_ids: list[str]):
+        self.person = np.asarray(person, dtype=np.int64)
+        self.item = np.asarray(item, dtype=np.int64)
+        self.correct = np.asarray(correct, dtype=np.float64)
+        self.item_ids = list(item_ids)
+        self.n_persons = int(self.person.max()) + 1 if len(self.person) else 0
+        self.n_items = len(self.item_ids)
+
+    def __len__(self):
+        return len(self.person)
+
+    def subset(self, mask) -> "Responses":
+        """Responses where *mask* holds, with persons renumbered densely."""
+
+        person = self.person[mask]
+        _, person = np.unique(person, return_inverse=True)
+        return Responses(person, self.item[mask], self.correct[mask], self.item_ids)
+
+
+def responses_from_records(records) -> Responses:
+    """Flatten result records (``ResultStore.iter_records()``) into ``Responses``."""
+
+    codes = {}
+    person, item, correct = [], [], []
+    n = 0
+    for record in records:
+        history = record.get("answer_history")
+        if not history:
+            continue
+        for answer in history:
+            person.append(n)
+            item.append(codes.setdefault(answer["question_id"], len(codes)))
+            correct.append(bool(answer["is_correct"]))
+        n += 1
+    return Responses(person, item, correct, list(codes))
+
+
+def responses_from_export(directory: str) -> Responses:
+    """Read the Arrow IPC files written by ``export_columnar``, memory-mapped."""
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    def read(name):
+        with pa.memory_map(os.path.join(directory, f"{name}.arrow")) as source:
+            return ipc.open_file(source).read_all()
+
+    answers = read("answers")
+    codes = read("question_codes")
+    item_ids = [None] * len(codes)
+    for code, qid in zip(codes["question_code"].to_pylist(), codes["question_id"].to_pylist()):
+        item_ids[code] = qid
+    _, person = np.unique(answers["result_id"].to_numpy(), return_inverse=True)
+    return Responses(
+        person,
+        answers["question_code"].to_numpy(),
+        answers["is_correct"].to_numpy(zero_copy_only=False),
+        item_ids,
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Classical statistics
+
+def classical_stats(r: Responses) -> dict:
+    """Per-item ``n``, ``p_value`` and ``point_biserial`` arrays.
+
+    The rest score is the session's share of correct answers on its *other*
+    questions; sessions with a single answer are left out of the correlation.
+    """
+
+    n_items = r.n_items
+    n = np.bincount(r.item, minlength=n_items).astype(np.float64)
+    p_value = np.bincount(r.item, r.correct, n_items) / np.maximum(n, 1)
+
+    person_n = np.bincount(r.person, minlength=r.n_persons)[r.person]
+    person_correct = np.bincount(r.person, r.correct, r.n_persons)[r.person]
+    keep = person_n > 1
+    x = r.correct[keep]
+    y = (person_correct[keep] - x) / (person_n[keep] - 1)
+    item = r.item[keep]
+
+    m = np.bincount(item, minlength=n_items).astype(np.float64)
+    sx = np.bincount(item, x, n_items)
+    sy = np.bincount(item, y, n_items)
+    sxy = np.bincount(item, x * y, n_items)
+    syy = np.bincount(item, y * y, n_items)
+    num = m * sxy - sx * sy
+    den = np.sqrt(np.maximum(m * sx - sx * sx, 0) * np.maximum(m * syy - sy * sy, 0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        point_biserial = np.where(den > 0, num / den, np.nan)
+
+    return {"n": n.astype(np.int64), "p_value": p_value, "point_biserial": point_biserial}
+
+
+# --------------------------------------------------------------------------- #
+# IRT
+
+def _log_sigmoid(z):
+    return -np.logaddexp(0.0, -z)
+
+
+def fit_irt(r: Responses, model: str = "2pl", max_iter: int = 100, tol: float = 1e-3,
+            grid_points: int = 15) -> dict:
+    """Marginal maximum-likelihood item parameters (EM over an ability grid).
+
+    Abilities are integrated out over ``grid_points`` quadrature nodes with
+    a N(0, 1) prior.  The E-step gathers an ``(item, answer, node)``
+    log-likelihood table per response and sums it per session; the M-step
+    takes Newton steps for ``b`` (and ``log a`` for 2PL) on the expected
+    counts per item and node, so each iteration is a few passes over the
+    response arrays.  Returns ``{"theta", "theta_se", "a", "b", "b_se",
+    "iterations"}`` with EAP abilities per session.
+    """
+
+    if model not in ("1pl", "2pl"):
+        raise ValueError(f"Invalid IRT model: {model}")
+    n_items = r.n_items
+    order = np.argsort(r.person, kind="stable")
+    item = r.item[order]
+    code = item + n_items * (r.correct[order] > 0)  # (answer, item) -> row of the table
+    starts = np.flatnonzero(np.r_[True, np.diff(r.person[order]) != 0])
+    person = r.person[order]
+
+    nodes = np.linspace(-4, 4, grid_points)
+    log_prior = -0.5 * nodes ** 2
+    log_prior -= np.logaddexp.reduce(log_prior)
+
+    n = np.bincount(item, minlength=n_items)
+    p0 = (np.bincount(code, minlength=2 * n_items)[n_items:] + 0.5) / (n + 1.0)
+    b = -np.log(p0 / (1 - p0))
+    log_a = np.zeros(n_items)
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        a = np.exp(log_a)
+        z = a[:, None] * (nodes[None, :] - b[:, None])
+        table = np.vstack([_log_sigmoid(-z), _log_sigmoid(z)])  # wrong rows, then right rows
+
+        # E-step: posterior over nodes per session
+        log_post = np.add.reduceat(table[code], starts, axis=0) + log_prior
+        log_post -= log_post.max(axis=1, keepdims=True)
+        post = np.exp(log_post)
+        post /= post.sum(axis=1, keepdims=True)
+
+        # Expected (answers, correct answers) per item and node
+        weights = post[person]
+        expected = np.empty((2 * n_items, grid_points))
+        for q in range(grid_points):
+            expected[:, q] = np.bincount(code, weights[:, q], 2 * n_items)
+        right = expected[n_items:]
+        total = expected[:n_items] + right
+
+        # M-step: Newton steps on b, then log a
+        old_b, old_log_a = b.copy(), log_a.copy()
+        for _ in range(3):
+            prob = 1 / (1 + np.exp(-a[:, None] * (nodes[None, :] - b[:, None])))
+            resid = right - total * prob
+            grad = -a * resid.sum(axis=1) - b / B_VAR
+            hess = a * a * (total * prob * (1 - prob)).sum(axis=1) + 1 / B_VAR
+            b = b + np.clip(grad / hess, -1, 1)
+            if model == "2pl":
+                prob = 1 / (1 + np.exp(-a[:, None] * (nodes[None, :] - b[:, None])))
+                dist = nodes[None, :] - b[:, None]
+                grad = a * (dist * (right - total * prob)).sum(axis=1) - log_a / LOG_A_VAR
+                hess = a * a * (dist * dist * total * prob * (1 - prob)).sum(axis=1) + 1 / LOG_A_VAR
+                log_a = log_a + np.clip(grad / hess, -0.5, 0.5)
+                a = np.exp(log_a)
+
+        if max(np.abs(b - old_b).max(initial=0), np.abs(log_a - old_log_a).max(initial=0)) < tol:
+            break
+
+    a = np.exp(log_a)
+    prob = 1 / (1 + np.exp(-a[:, None] * (nodes[None, :] - b[:, None])))
+    info = a * a * (total * prob * (1 - prob)).sum(axis=1) + 1 / B_VAR
+    theta = np.zeros(r.n_persons)
+    theta_se = np.ones(r.n_persons)
+    session = person[starts]
+    theta[session] = post @ nodes
+    theta_se[session] = np.sqrt(np.maximum(post @ nodes ** 2 - theta[session] ** 2, 0))
+    return {"theta": theta, "theta_se": theta_se, "a": a, "b": b,
+            "b_se": 1 / np.sqrt(info), "iterations": iterations}
+
+
+# --------------------------------------------------------------------------- #
+# Calibration report
+
+def calibrate(r: Responses, questions, model: str = "2pl") -> dict:
+    """``{question_id: {skill, seniority, level, n, p_value, point_biserial, a, b, b_se}}``.
+
+    Skills are fitted separately because no session crosses skills.
+    """
+
+    meta = {q["id"]: q for q in questions}
+    item_skill = np.array([meta[qid]["skill"] if qid in meta else "" for qid in r.item_ids])
+    classical = classical_stats(r)
+    a = np.ones(r.n_items)
+    b = np.full(r.n_items, np.nan)
+    b_se = np.full(r.n_items, np.nan)
+    for skill in np.unique(item_skill):
+        if not skill:
+            continue
+        irt = fit_irt(r.subset(item_skill[r.item] == skill), model)
+        mine = item_skill == skill
+        a[mine], b[mine], b_se[mine] = irt["a"][mine], irt["b"][mine], irt["b_se"][mine]
+
+    report = {}
+    for i, qid in enumerate(r.item_ids):
+        q = meta.get(qid)
+        if q is None or not classical["n"][i]:
+            continue
+        report[qid] = {
+            "skill": q["skill"],
+            "seniority": q["seniority"],
+            "level": q["level"],
+            "n": int(classical["n"][i]),
+            "p_value": float(classical["p_value"][i]),
+            "point_biserial": float(classical["point_biserial"][i]),
+            "a": float(a[i]),
+            "b": float(b[i]),
+            "b_se": float(b_se[i]),
+        }
+    return report
+
+
+def _benjamini_hochberg(p_values, fdr: float) -> np.ndarray:
+    """Mask of the p-values rejected at false discovery rate *fdr*."""
+
+    p_values = np.asarray(p_values, dtype=float)
+    order = np.argsort(p_values)
+    below = p_values[order] <= fdr * np.arange(1, len(p_values) + 1) / max(len(p_values), 1)
+    rejected = np.zeros(len(p_values), bool)
+    if below.any():
+        rejected[order[:np.flatnonzero(below)[-1] + 1]] = True
+    return rejected
+
+
+def flag_mismatches(report: dict, min_responses: int = 30, fdr: float = 0.05) -> list[dict]:
+    """Questions whose difficulty is out of line with their bucket.
+
+    Per skill, ``b`` is regressed on the bucket rank (weighted by responses).
+    A question's residual over the robust spread of the residuals, combined
+    with its own standard error, gives a two-sided p-value; the p-values of
+    every tested question are cut with Benjamini-Hochberg, so about *fdr* of
+    the flags are false alarms however many questions the bank holds.
+    ``suggested`` is the bucket whose fitted difficulty is closest to the
+    measured one.
+    """
+
+    tested = []  # (qid, row, residual, intercept, slope, p-value)
+    skills = sorted({row["skill"] for row in report.values()})
+    for skill in skills:
+        rows = [(qid, row) for qid, row in report.items()
+                if row["skill"] == skill and row["n"] >= min_responses]
+        if len(rows) < 3:
+            continue
+        rank = np.array([bucket_rank(row["seniority"], row["level"]) for _, row in rows], dtype=float)
+        b = np.array([row["b"] for _, row in rows])
+        w = np.array([row["n"] for _, row in rows], dtype=float)
+        se = np.array([row["b_se"] for _, row in rows])
+        if np.ptp(rank) == 0:
+            continue
+        slope, intercept = np.polyfit(rank, b, 1, w=np.sqrt(w))
+        resid = b - (intercept + slope * rank)
+        scale = 1.4826 * np.median(np.abs(resid - np.median(resid))) or resid.std() or 1.0
+        z = np.abs(resid) / np.sqrt(scale ** 2 + se ** 2)
+        for (qid, row), res, score in zip(rows, resid.tolist(), z.tolist()):
+            tested.append((qid, row, res, intercept, slope, math.erfc(score / math.sqrt(2))))
+
+    flags = []
+    rejected = _benjamini_hochberg([t[-1] for t in tested], fdr)
+    for (qid, row, res, intercept, slope, _), flagged in zip(tested, rejected):
+        if not flagged:
+            continue
+        suggested = (rank_bucket(round((row["b"] - intercept) / slope))
+                     if slope > 0 else (row["seniority"], row["level"]))
+        flags.append({
+            "id": qid,
+            "skill": row["skill"],
+            "seniority": row["seniority"],
+            "level": row["level"],
+            "b": row["b"],
+            "expected_b": float(row["b"] - res),
+            "direction": "harder" if res > 0 else "easier",
+            "suggested": {"seniority": suggested[0], "level": suggested[1]},
+            "n": row["n"],
+        })
+    return sorted(flags, key=lambda f: -abs(f["b"] - f["expected_b"]))
+
+
+def save_item_params(report: dict, path: str = ITEM_PARAMS_FILE):
+    params = {qid: {"a": row["a"], "b": row["b"], "n": row["n"]} for qid, row in report.items()}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f_out:
+        json.dump(params, f_out, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate question difficulty from saved answers")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--export", help="read an export_columnar output directory instead")
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--model", choices=["1pl", "2pl"], default="2pl")
+    parser.add_argument("--min-responses", type=int, default=30)
+    parser.add_argument("--fdr", type=float, default=0.05, help="false discovery rate of the flags")
+    parser.add_argument("--save", action="store_true", help=f"write item parameters to {ITEM_PARAMS_FILE}")
+    args = parser.parse_args()
+
+    if args.export:
+        responses = responses_from_export(args.export)
+    else:
+        responses = responses_from_records(ResultStore(args.store).iter_records())
+    report = calibrate(responses, load_questions(args.questions), args.model)
+    flags = flag_mismatches(report, args.min_responses, args.fdr)
+
+    print(f"{len(responses)} responses, {len(report)} questions, {len(flags)} flagged")
+    for f in flags:
+        s = f["suggested"]
+        print(f"{f['id']:>6} {f['skill']:<10} {f['seniority']}/{f['level']} "
+              f"b={f['b']:+.2f} (expected {f['expected_b']:+.2f}, {f['direction']}) "
+              f"-> {s['seniority']}/{s['level']}  n={f['n']}")
+    if args.save:
+        save_item_params(report)
+        print(f"Item parameters saved to {ITEM_PARAMS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
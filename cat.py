@@ -0,0 +1,381 @@
+"""IRT computerized adaptive testing, an alternative to the branching tree.
+
+``ItemPool`` precomputes, per skill, the Fisher information of every question
+at every point of an ability grid, plus each grid row's questions sorted by
+information.  ``CatSession`` keeps the ability posterior on the same grid:
+answering is one row addition, choosing the next question is a walk down the
+pre-sorted row nearest the current estimate.  The test stops as soon as the
+posterior standard error drops below ``se_threshold`` (or after
+``max_items``), and the ability is mapped back onto the usual ``LEVELxN``
+labels through the difficulty of each seniority/level bucket.
+
+Item parameters come from ``calibration.py --save``
+(``results/item_params.json``); uncalibrated questions get a difficulty
+spread evenly over F1..S5 by their bucket.  The session exposes the same
+interface as ``AdaptiveTestSession``.
+"""
+
+import json
+import random
+import struct
+
+import numpy as np
+
+from branching import DEFAULT_TREE, FAILED_RESULTS, SENIORITY_CODES, BranchingTree, parse_state
+from calibration import ITEM_PARAMS_FILE, bucket_rank, rank_bucket
+from engine import (
+    NO_QUESTION_LABEL,
+    AdaptiveTestingEngine,
+    code_to_perm,
+    perm_to_code,
+    shuffled_view,
+)
+from metrics import timed
+
+N_BUCKETS = 20
+GRID = np.linspace(-4, 4, 81)
+DEFAULT_A = 1.7        # uncalibrated discrimination (normal-ogive scaling)
+RANDOMESQUE = 3        # pick among the top-k informative questions (exposure control)
+CAT_SESSION_FORMAT = 2
+_CAT_HEADER = struct.Struct("<BQBBBeI")  # format, seed, n_questions, min, max, se threshold, correct mask
+_UNANSWERED = 0xFF
+_SENIORITY_LETTERS = {name: code for code, name in SENIORITY_CODES.items()}
+
+
+def default_difficulty(seniority: str, level: int) -> float:
+    """Uncalibrated guess: F1..S5 spread evenly over about [-2.4, 2.4]."""
+    return (bucket_rank(seniority, level) - (N_BUCKETS - 1) / 2) / 4
+
+
+def load_item_params(path: str = ITEM_PARAMS_FILE) -> dict:
+    """``{question_id: {"a", "b", ...}}`` saved by calibration, or ``{}``."""
+
+    try:
+        with open(path, "r", encoding="utf-8") as f_in:
+            return json.load(f_in)
+    except FileNotFoundError:
+        return {}
+
+
+def reachable_results(tree: BranchingTree, start: str) -> list[str]:
+    """Result labels the branching tree can give to a test begun at *start*."""
+
+    found, stack, seen = set(), [tree.start_state[start]], set()
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        for nxt in tree.next_state[2 * state:2 * state + 2]:
+            if nxt >= 0:
+                stack.append(nxt)
+            else:
+                found.add(~nxt)
+    return [tree.results[rid] for rid in sorted(found)]
+
+
+class _SkillPool:
+    __slots__ = ("offsets", "ids", "rank", "log_right", "log_wrong", "order", "bucket_b")
+
+    def __init__(self, engine: AdaptiveTestingEngine, offsets: list[int], params: dict):
+        questions = engine.questions
+        self.offsets = offsets
+        self.ids = [questions[o]["id"] for o in offsets]
+        self.rank = [bucket_rank(questions[o]["seniority"], questions[o]["level"]) for o in offsets]
+        a = np.array([params.get(qid, {}).get("a", DEFAULT_A) for qid in self.ids])
+        b = np.array([
+            params[qid]["b"] if qid in params
+            else default_difficulty(questions[o]["seniority"], questions[o]["level"])
+            for qid, o in zip(self.ids, offsets)
+        ])
+
+        z = a[None, :] * (GRID[:, None] - b[None, :])
+        p = 1 / (1 + np.exp(-z))
+        self.log_right = -np.logaddexp(0, -z)                    # (grid, item)
+        self.log_wrong = -np.logaddexp(0, z)
+        info = a[None, :] ** 2 * p * (1 - p)
+        self.order = np.argsort(-info, axis=1, kind="stable").tolist()  # per grid row
+
+        # Bucket difficulty = median b of its questions, gaps interpolated, kept increasing
+        bucket_b = np.full(N_BUCKETS, np.nan)
+        rank = np.array(self.rank)
+        for r in range(N_BUCKETS):
+            if (rank == r).any():
+                bucket_b[r] = np.median(b[rank == r])
+        known = ~np.isnan(bucket_b)
+        if known.any():
+            bucket_b = np.interp(np.arange(N_BUCKETS), np.flatnonzero(known), bucket_b[known])
+        else:
+            bucket_b = np.array([default_difficulty(*rank_bucket(r)) for r in range(N_BUCKETS)])
+        self.bucket_b = np.maximum.accumulate(bucket_b)
+
+
+class ItemPool:
+    """Information tables over ``GRID`` for every skill of an in-memory engine."""
+
+    def __init__(self, engine: AdaptiveTestingEngine, params: dict | None = None,
+                 tree: BranchingTree = DEFAULT_TREE):
+        self.engine = engine
+        self.tree = tree
+        params = load_item_params() if params is None else params
+        by_skill = {}
+        for offset, q in enumerate(engine.questions):
+            by_skill.setdefault(q["skill"], []).append(offset)
+        self.skills = {skill: _SkillPool(engine, offsets, params) for skill, offsets in by_skill.items()}
+
+        # Per start: allowed label range, like the branching tree's
+        self.label_range = {}
+        for start in tree.start_state:
+            labels = reachable_results(tree, start)
+            passed = [bucket_rank(*parse_state(lbl[5:])) for lbl in labels if lbl not in FAILED_RESULTS]
+            failed = [lbl for lbl in labels if lbl in FAILED_RESULTS]
+            self.label_range[start] = (min(passed), max(passed), failed[0] if failed else None)
+
+    def label(self, skill: str, start: str, theta: float) -> str:
+        """Highest bucket whose difficulty *theta* reaches, within *start*'s range."""
+
+        lo, hi, failed = self.label_range[start]
+        rank = int(np.searchsorted(self.skills[skill].bucket_b, theta, side="right")) - 1
+        if rank < lo:
+            if failed is not None:
+                return failed
+            rank = lo
+        seniority, level = rank_bucket(min(rank, hi))
+        return f"LEVEL{_SENIORITY_LETTERS[seniority]}{level}"
+
+
+class CatSession:
+    """One skill test driven by maximum information instead of a fixed tree."""
+
+    __slots__ = (
+        "pool", "engine", "skill", "starting_seniority", "seed", "seen_ids", "min_items",
+        "max_items", "se_threshold", "question_ids", "items", "perm_codes", "selected",
+        "correct_mask", "log_post", "label", "_current",
+    )
+
+    def __init__(self, pool: ItemPool, skill: str, start_seniority="middle", *,
+                 seed: int | None = None, seen_ids: set | None = None, se_threshold: float = 0.6,
+                 min_items: int = 2, max_items: int = 10):
+        if start_seniority not in pool.label_range:
+            raise ValueError(f"Invalid seniority: {start_seniority}")
+        if skill not in pool.skills:
+            raise ValueError(f"Unknown skill: {skill}")
+        self.pool = pool
+        self.engine = pool.engine
+        self.skill = skill
+        self.starting_seniority = start_seniority
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        self.seen_ids = seen_ids if seen_ids is not None else set()
+        self.se_threshold = se_threshold
+        self.min_items = min_items
+        self.max_items = min(max_items, 32)  # correctness is a 32-bit mask
+        self.question_ids = []
+        self.items = []        # index into the skill pool
+        self.perm_codes = []
+        self.selected = []
+        self.correct_mask = 0
+        self.label = None
+        self._current = None
+
+        # Prior N(difficulty of the tree's first bucket, 1) on the grid
+        mu = self.pool.skills[skill].bucket_b[bucket_rank(*self._start_bucket())]
+        self.log_post = -0.5 * (GRID - mu) ** 2
+
+    def _start_bucket(self) -> tuple[str, int]:
+        tree = self.pool.tree
+        return parse_state(tree.state_names[tree.start_state[self.starting_seniority]])
+
+    # --------------------------------------------------------------------- #
+    # Ability estimate
+
+    def _posterior(self):
+        w = np.exp(self.log_post - self.log_post.max())
+        return w / w.sum()
+
+    @property
+    def theta(self) -> float:
+        return float(self._posterior() @ GRID)
+
+    @property
+    def standard_error(self) -> float:
+        w = self._posterior()
+        mean = w @ GRID
+        return float(np.sqrt(max(w @ GRID ** 2 - mean * mean, 0.0)))
+
+    # --------------------------------------------------------------------- #
+    # Same read-only surface as AdaptiveTestSession
+
+    def _question(self, i: int):
+        return self.engine.questions[self.pool.skills[self.skill].offsets[self.items[i]]]
+
+    @property
+    def current_seniority(self) -> str:
+        return self._question(-1)["seniority"] if self.items else self._start_bucket()[0]
+
+    @property
+    def current_level(self) -> int:
+        return self._question(-1)["level"] if self.items else self._start_bucket()[1]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.label is not None
+
+    @property
+    def final_result(self) -> str | None:
+        return self.label
+
+    @property
+    def failed(self) -> bool:
+        return self.label == NO_QUESTION_LABEL or self.label in FAILED_RESULTS
+
+    @property
+    def answer_history(self) -> list[dict]:
+        return [
+            {
+                "question_id": self.question_ids[i],
+                "selected_index": idx,
+                "is_correct": bool(self.correct_mask >> i & 1),
+            }
+            for i, idx in enumerate(self.selected)
+        ]
+
+    @property
+    def current_question(self):
+        if self.is_finished or len(self.question_ids) == len(self.selected):
+            return None
+        if self._current is None:
+            q = self._question(-1)
+            self._current = shuffled_view(q, code_to_perm(self.perm_codes[-1], len(q["options"])))
+        return self._current
+
+    @property
+    def question_history(self) -> list[dict]:
+        history = []
+        for i in range(len(self.items)):
+            q = self._question(i)
+            history.append(shuffled_view(q, code_to_perm(self.perm_codes[i], len(q["options"]))))
+        return history
+
+    def _get_result(self):
+        answers = self.answer_history
+        return {
+            "is_finished": self.is_finished,
+            "final_result": self.final_result,
+            "failed": self.failed,
+            "answer_history": answers[-1] if answers else {},
+        }
+
+    # --------------------------------------------------------------------- #
+    # Public API
+
+    @timed("select_question")
+    def get_next_question(self):
+        if self.is_finished:
+            return None
+        if len(self.question_ids) > len(self.selected):
+            return self.current_question
+
+        sp = self.pool.skills[self.skill]
+        row = int(np.abs(GRID - self.theta).argmin())
+        used = set(self.items)
+        candidates = []
+        for item in sp.order[row]:
+            if item not in used and sp.ids[item] not in self.seen_ids:
+                candidates.append(item)
+                if len(candidates) == RANDOMESQUE:
+                    break
+        if not candidates:
+            self.label = NO_QUESTION_LABEL if not self.selected else self._final_label()
+            return None
+
+        rng = random.Random(self.seed * 1024 + len(self.question_ids))
+        if self.engine.exposure is not None:  # least recently served of the most informative few
+            offsets = [sp.offsets[c] for c in candidates]
+            item = candidates[offsets.index(self.engine.exposure.choose(offsets, rng))]
+        else:
+            item = rng.choice(candidates)
+        q = self.engine.questions[sp.offsets[item]]
+        self.engine.record_exposure(q["id"])
+        perm = list(range(len(q["options"])))
+        rng.shuffle(perm)
+        self.items.append(item)
+        self.question_ids.append(q["id"])
+        self.perm_codes.append(perm_to_code(perm))
+        self.seen_ids.update(self.engine.related_ids(q["id"]))
+        self._current = shuffled_view(q, perm)
+        return self._current
+
+    @timed("score_answer")
+    def submit_answer(self, selected_idx: int):
+        question = self.current_question
+        if question is None:
+            return {"error": "No active question"}
+
+        correct = question["options"][selected_idx]["isAnswerKey"]
+        self._apply(len(self.selected), bool(correct))
+        self.selected.append(selected_idx)
+        self._current = None
+        if self._should_stop():
+            self.label = self._final_label()
+        return self._get_result()
+
+    def _apply(self, i: int, correct: bool):
+        sp = self.pool.skills[self.skill]
+        table = sp.log_right if correct else sp.log_wrong
+        self.log_post = self.log_post + table[:, self.items[i]]
+        if correct:
+            self.correct_mask |= 1 << i
+
+    def _should_stop(self) -> bool:
+        n = len(self.selected)
+        return n >= self.max_items or (n >= self.min_items and self.standard_error < self.se_threshold)
+
+    def _final_label(self) -> str:
+        return self.pool.label(self.skill, self.starting_seniority, self.theta)
+
+    # --------------------------------------------------------------------- #
+    # Serialization (the posterior is replayed from the answers)
+
+    def encode(self) -> bytes:
+        parts = [_CAT_HEADER.pack(CAT_SESSION_FORMAT, self.seed, len(self.question_ids),
+                                  self.min_items, self.max_items, self.se_threshold,
+                                  self.correct_mask)]
+        for text in (self.skill, self.starting_seniority, self.label or ""):
+            raw = text.encode()
+            parts.append(bytes((len(raw),)) + raw)
+        for i, qid in enumerate(self.question_ids):
+            raw = qid.encode()
+            selected = self.selected[i] if i < len(self.selected) else _UNANSWERED
+            parts.append(bytes((len(raw),)) + raw + struct.pack("<HB", self.perm_codes[i], selected))
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes, pool: ItemPool, seen_ids: set | None = None):
+        fmt, seed, n_questions, min_items, max_items, se, mask = _CAT_HEADER.unpack_from(data)
+        if fmt != CAT_SESSION_FORMAT:
+            raise ValueError(f"Unsupported session format {fmt}")
+        pos = _CAT_HEADER.size
+        texts = []
+        for _ in range(3):
+            n = data[pos]
+            texts.append(data[pos + 1:pos + 1 + n].decode())
+            pos += 1 + n
+
+        session = cls(pool, texts[0], texts[1], seed=seed, seen_ids=seen_ids,
+                      se_threshold=float(se), min_items=min_items, max_items=max_items)
+        item_of = {qid: i for i, qid in enumerate(pool.skills[texts[0]].ids)}
+        for i in range(n_questions):
+            n = data[pos]
+            qid = data[pos + 1:pos + 1 + n].decode()
+            code, selected = struct.unpack_from("<HB", data, pos + 1 + n)
+            session.question_ids.append(qid)
+            session.items.append(item_of[qid])
+            session.perm_codes.append(code)
+            if selected != _UNANSWERED:
+                session.selected.append(selected)
+                session._apply(i, bool(mask >> i & 1))
+            pos += 1 + n + 3
+        session.label = texts[2] or None
+        for qid in session.question_ids:
+            session.seen_ids.update(session.engine.related_ids(qid))
+        return session
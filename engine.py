@@ -0,0 +1,462 @@
+"""Question bank engine and per-skill adaptive test session.
+
+Kept free of Streamlit so the same classes can be shared by every browser
+session (see ``get_bank`` in *resources.py*) and imported by tools.
+"""
+
+import json
+import random
+import struct
+import sys
+from array import array
+from types import MappingProxyType
+
+from branching import DEFAULT_TREE, SENIORITY_CODES, BranchingTree
+from exposure import EXPOSURE_FILE, ExposureTracker
+from metrics import timed
+
+QUESTIONS_FILE = "merged_file.json"
+SENIORITY_IDS = {seniority: i for i, seniority in enumerate(SENIORITY_CODES.values())}
+EMPTY_BUCKET = array("i")
+MAX_REJECTIONS = 8
+
+###############################################################################
+# --------------------------  FROZEN QUESTION BANK  ------------------------- #
+###############################################################################
+
+def freeze_question(q: dict) -> MappingProxyType:
+    """Return a read-only view of *q* with interned keys and tuple options."""
+
+    frozen = {sys.intern(k): v for k, v in q.items() if k != "options"}
+    for field in ("id", "skill", "category", "seniority", "type"):
+        if isinstance(frozen.get(field), str):
+            frozen[field] = sys.intern(frozen[field])
+    frozen["options"] = tuple(
+        MappingProxyType({sys.intern(k): v for k, v in opt.items()}) for opt in q["options"]
+    )
+    return MappingProxyType(frozen)
+
+
+def load_questions(path: str = QUESTIONS_FILE) -> tuple:
+    """Parse the question bank into a tuple of frozen question records."""
+
+    with open(path, "r", encoding="utf-8") as f_in:
+        return tuple(freeze_question(q) for q in json.load(f_in))
+
+
+def build_index(questions) -> tuple[dict, dict]:
+    """Group question offsets into ``(skill_id, seniority_id, level)`` buckets."""
+
+    skill_ids = {}
+    buckets = {}
+    for offset, q in enumerate(questions):
+        skill_id = skill_ids.setdefault(q["skill"], len(skill_ids))
+        key = (skill_id, SENIORITY_IDS[q["seniority"]], q["level"])
+        buckets.setdefault(key, array("i")).append(offset)
+    return skill_ids, buckets
+
+
+###############################################################################
+# ------------------------------  ENGINE  ----------------------------------- #
+###############################################################################
+
+class QuestionSource:
+    """What a test session needs from an engine.
+
+    Subclasses provide ``get_question(skill, seniority, level, exclude, rng,
+    record)`` and ``find_question(skill, seniority, level, question_id)``.
+    Exposure hooks are no-ops unless an ``ExposureTracker`` is attached, and
+    ``duplicates`` maps question ids to their near-duplicate cluster (see
+    *near_duplicates.py*); sessions treat a whole cluster as seen.
+    """
+
+    exposure: ExposureTracker | None = None
+    duplicates = MappingProxyType({})
+
+    def record_exposure(self, question_id: str):
+        """Count a question drawn with ``record=False``; the token is for ``release_exposure``."""
+        return None
+
+    def release_exposure(self, question_id: str, token):
+        """Give back a counted question that was not served (the other prefetched branch)."""
+
+    def related_ids(self, question_id: str) -> tuple:
+        """*question_id* and its near-duplicates: serving one uses them all up."""
+        return self.duplicates.get(question_id, (question_id,))
+
+    @staticmethod
+    def format_level_string(seniority: str, level: int):
+        reverse_map = {"fresher": "F", "junior": "J", "middle": "M", "senior": "S"}
+        return f"{reverse_map.get(seniority, '?')}{level}"
+
+
+class AdaptiveTestingEngine(QuestionSource):
+    """Holds all questions and returns one at random for a given skill/level.
+
+    The engine is read-only once built: ``questions`` is a tuple of frozen
+    records and ``buckets`` maps ``(skill_id, seniority_id, level)`` to an
+    array of offsets into it, so a single instance can be shared by every
+    session in the process.  With ``track_exposure`` the only mutable part is
+    an ``ExposureTracker`` that steers draws towards less-served questions.
+    """
+
+    def __init__(self, questions_data, track_exposure: bool = False,
+                 exposure_path: str | None = EXPOSURE_FILE, index: tuple | None = None,
+                 duplicates: dict | None = None):
+        self.questions = tuple(
+            q if isinstance(q, MappingProxyType) else freeze_question(q) for q in questions_data
+        )
+        self.exposure = (
+            ExposureTracker([q["id"] for q in self.questions], path=exposure_path)
+            if track_exposure else None
+        )
+        # A prebuilt index (e.g. from a snapshot) must match questions' order
+        self.skill_ids, buckets = index if index is not None else build_index(self.questions)
+        self.buckets = MappingProxyType(buckets)
+        self.offset_by_id = MappingProxyType({q["id"]: i for i, q in enumerate(self.questions)})
+        self.duplicates = MappingProxyType(dict(duplicates or {}))
+
+    def bucket(self, skill: str, seniority: str, level: int) -> array:
+        """Offsets of the questions in one skill/seniority/level bucket."""
+        key = (self.skill_ids.get(skill), SENIORITY_IDS.get(seniority), level)
+        return self.buckets.get(key, EMPTY_BUCKET)
+
+    def find_question(self, skill: str, seniority: str, level: int, question_id: str):
+        """Look a served question up again (used when resuming a session)."""
+        return self.questions[self.offset_by_id[question_id]]
+
+    def get_question(self, skill: str, seniority: str, level: int,
+                     exclude=frozenset(), rng: random.Random = random, record: bool = True):
+        """Draw one question, avoiding ids in *exclude* while the bucket allows.
+
+        Rejection sampling keeps the draw O(1) while most of the bucket is
+        unseen; a nearly exhausted bucket falls back to filtering, and a
+        fully seen one repeats rather than ending the test.  When exposure
+        is tracked, the least recently served eligible question wins and is
+        counted unless ``record=False`` (sessions count their own draws).
+        """
+
+        pool = self.bucket(skill, seniority, level)
+        if not pool:
+            return None
+        if self.exposure is not None:
+            if exclude:
+                pool = [offset for offset in pool if self.questions[offset]["id"] not in exclude] or pool
+            offset = self.exposure.choose(pool, rng)
+            if record:
+                self.exposure.record(offset)
+            return self.questions[offset]
+        for _ in range(MAX_REJECTIONS):
+            q = self.questions[pool[rng.randrange(len(pool))]]
+            if q["id"] not in exclude:
+                return q
+        fresh = [offset for offset in pool if self.questions[offset]["id"] not in exclude]
+        return self.questions[rng.choice(fresh or pool)]
+
+    def record_exposure(self, question_id: str):
+        if self.exposure is not None:
+            return self.exposure.record(self.offset_by_id[question_id])
+        return None
+
+    def release_exposure(self, question_id: str, token):
+        if self.exposure is not None and token is not None:
+            self.exposure.release(self.offset_by_id[question_id], token)
+
+
+###############################################################################
+# ------------------------------  SESSION  ---------------------------------- #
+###############################################################################
+
+NO_RESULT = -1
+NO_QUESTION_RESULT = -2
+NO_QUESTION_LABEL = "NO_QUESTION_AVAILABLE"
+SESSION_FORMAT = 1
+_SESSION_HEADER = struct.Struct("<BQHhBI")  # format, seed, state, result, n_questions, correct mask
+_UNANSWERED = 0xFF
+
+
+def perm_to_code(perm) -> int:
+    """Lehmer code of a permutation of ``range(len(perm))``."""
+
+    code = 0
+    items = list(range(len(perm)))
+    for i, value in enumerate(perm):
+        pos = items.index(value)
+        code = code * (len(perm) - i) + pos
+        items.pop(pos)
+    return code
+
+
+def code_to_perm(code: int, n: int) -> list[int]:
+    digits = []
+    for radix in range(1, n + 1):
+        digits.append(code % radix)
+        code //= radix
+    items = list(range(n))
+    return [items.pop(d) for d in reversed(digits)]
+
+
+def shuffled_view(q, perm) -> dict:
+    """Shallow copy of *q* with options reordered; option records stay shared."""
+
+    view = dict(q)
+    view["options"] = [q["options"][i] for i in perm]
+    return view
+
+
+class AdaptiveTestSession:
+    """Tracks state for a *single* skill run along a compiled branching tree.
+
+    The state is a few integers: the tree state, the served question ids with
+    their option permutation codes, the chosen indices and a correctness
+    bitmask.  Each draw uses an RNG derived from ``(seed, step)``, so nothing
+    else is needed to resume: ``encode`` packs a session into a few dozen bytes
+    and ``decode`` rebuilds it against any engine holding the same questions.
+
+    ``prefetch`` (called once the pending question is on screen) draws and
+    shuffles the questions for both successor states and reserves them with
+    the exposure tracker, so concurrent sessions steer away from them; the
+    answer then picks one and the other is released.
+    """
+
+    __slots__ = (
+        "engine", "tree", "skill", "starting_seniority", "seed", "seen_ids", "state",
+        "result", "question_ids", "perm_codes", "selected", "correct_mask", "_current",
+        "_branches", "_next",
+    )
+
+    def __init__(self, engine: QuestionSource, skill: str, start_seniority="middle",
+                 tree: BranchingTree = DEFAULT_TREE, seed: int | None = None,
+                 seen_ids: set | None = None):
+        if start_seniority not in tree.start_state:
+            raise ValueError(f"Invalid seniority: {start_seniority}")
+        self.engine = engine
+        self.skill = skill
+        self.tree = tree
+        # Seed is kept so a session's draws and shuffles can be replayed
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        # Question ids already served; pass one set across skills/retakes
+        self.seen_ids = seen_ids if seen_ids is not None else set()
+        self.starting_seniority = start_seniority
+        self.state = tree.start_state[start_seniority]
+        self.result = NO_RESULT
+        self.question_ids = []
+        self.perm_codes = []
+        self.selected = []
+        self.correct_mask = 0
+        self._current = None
+        self._branches = None  # prefetched (wrong, right) reserved draws for the pending question
+        self._next = None      # the branch picked by the last answer
+
+    @property
+    def current_seniority(self) -> str:
+        return self.tree.state_seniority[self.state]
+
+    @property
+    def current_level(self) -> int:
+        return self.tree.state_level[self.state]
+
+    @property
+    def path_state(self) -> str:
+        return self.tree.state_names[self.state]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.result != NO_RESULT
+
+    @property
+    def final_result(self) -> str | None:
+        if self.result == NO_RESULT:
+            return None
+        if self.result == NO_QUESTION_RESULT:
+            return NO_QUESTION_LABEL
+        return self.tree.results[self.result]
+
+    @property
+    def failed(self) -> bool:
+        return self.result == NO_QUESTION_RESULT or (
+            self.result >= 0 and self.tree.result_failed[self.result]
+        )
+
+    @property
+    def answer_history(self) -> list[dict]:
+        return [
+            {
+                "question_id": self.question_ids[i],
+                "selected_index": idx,
+                "is_correct": bool(self.correct_mask >> i & 1),
+            }
+            for i, idx in enumerate(self.selected)
+        ]
+
+    @property
+    def current_question(self):
+        """The served, not yet answered question (options shuffled), if any."""
+
+        if self.is_finished or len(self.question_ids) == len(self.selected):
+            return None
+        if self._current is None:
+            q = self.engine.find_question(
+                self.skill, self.current_seniority, self.current_level, self.question_ids[-1]
+            )
+            self._current = shuffled_view(q, code_to_perm(self.perm_codes[-1], len(q["options"])))
+        return self._current
+
+    @property
+    def question_history(self) -> list[dict]:
+        """Every served question as shown, rebuilt from ids and permutations."""
+
+        history = []
+        state = self.tree.start_state[self.starting_seniority]
+        for i, qid in enumerate(self.question_ids):
+            q = self.engine.find_question(
+                self.skill, self.tree.state_seniority[state], self.tree.state_level[state], qid
+            )
+            history.append(shuffled_view(q, code_to_perm(self.perm_codes[i], len(q["options"]))))
+            if i < len(self.selected):
+                nxt = self.tree.next_state[2 * state + (self.correct_mask >> i & 1)]
+                state = nxt if nxt >= 0 else state
+        return history
+
+    # --------------------------------------------------------------------- #
+    # Core helpers
+
+    def _draw(self, state: int, step: int):
+        """``(question, perm, shown view, exposure token)`` for *state* at *step*.
+
+        The draw is counted right away (and released if it is not served), so
+        the next session to draw already sees it as recently served.
+        """
+
+        rng = random.Random(self.seed * 1024 + step)
+        q = self.engine.get_question(self.skill, self.tree.state_seniority[state],
+                                     self.tree.state_level[state],
+                                     exclude=self.seen_ids, rng=rng, record=False)
+        if q is None:
+            return None
+        perm = list(range(len(q["options"])))
+        rng.shuffle(perm)
+        return q, perm, shuffled_view(q, perm), self.engine.record_exposure(q["id"])
+
+    def _release(self, drawn):
+        if drawn is not None and drawn[3] is not None:
+            self.engine.release_exposure(drawn[0]["id"], drawn[3])
+
+    def prefetch(self):
+        """Prepare the next question for both possible answers to the pending one."""
+
+        if self._branches is not None or self.current_question is None:
+            return
+        step = len(self.question_ids)
+        self._branches = tuple(
+            self._draw(nxt, step) if nxt >= 0 else None
+            for nxt in self.tree.next_state[2 * self.state:2 * self.state + 2]
+        )
+
+    def _get_result(self):
+        answers = self.answer_history
+        return {
+            "is_finished": self.is_finished,
+            "final_result": self.final_result,
+            "failed": self.failed,
+            "answer_history": answers[-1] if answers else {},
+        }
+
+    # --------------------------------------------------------------------- #
+    # Public API used by Streamlit app
+
+    @timed("select_question")
+    def get_next_question(self):
+        if self.is_finished:
+            return None
+        if len(self.question_ids) > len(self.selected):
+            return self.current_question  # still waiting for an answer
+
+        drawn, self._next = self._next, None
+        if drawn is not None and drawn[0]["id"] in self.seen_ids:  # taken by another skill since
+            self._release(drawn)
+            drawn = None
+        if drawn is None:
+            drawn = self._draw(self.state, len(self.question_ids))
+        if drawn is None:
+            # No question available → abort gracefully
+            self.result = NO_QUESTION_RESULT
+            return None
+
+        q, perm, view, _ = drawn
+        self.question_ids.append(q["id"])
+        self.perm_codes.append(perm_to_code(perm))
+        self.seen_ids.update(self.engine.related_ids(q["id"]))
+        self._current = view
+        return self._current
+
+    @timed("score_answer")
+    def submit_answer(self, selected_idx: int):
+        question = self.current_question
+        if question is None:
+            return {"error": "No active question"}
+
+        correct = question["options"][selected_idx]["isAnswerKey"]
+        if correct:
+            self.correct_mask |= 1 << len(self.selected)
+        self.selected.append(selected_idx)
+        self._current = None
+        if self._branches is not None:
+            self._next = self._branches[bool(correct)]
+            self._release(self._branches[not correct])
+            self._branches = None
+
+        next_state = self.tree.next_state[2 * self.state + bool(correct)]
+        if next_state >= 0:
+            self.state = next_state
+        else:
+            self.result = ~next_state
+        return self._get_result()
+
+    # --------------------------------------------------------------------- #
+    # Serialization
+
+    def encode(self) -> bytes:
+        """Pack the session state (engine, tree and seen-set excluded)."""
+
+        parts = [_SESSION_HEADER.pack(SESSION_FORMAT, self.seed, self.state, self.result,
+                                      len(self.question_ids), self.correct_mask)]
+        for text in (self.skill, self.starting_seniority):
+            raw = text.encode()
+            parts.append(bytes((len(raw),)) + raw)
+        for i, qid in enumerate(self.question_ids):
+            raw = qid.encode()
+            selected = self.selected[i] if i < len(self.selected) else _UNANSWERED
+            parts.append(bytes((len(raw),)) + raw + struct.pack("<HB", self.perm_codes[i], selected))
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes, engine: QuestionSource,
+               tree: BranchingTree = DEFAULT_TREE, seen_ids: set | None = None):
+        """Rebuild a session packed by ``encode`` (must use the same *tree*)."""
+
+        fmt, seed, state, result, n_questions, mask = _SESSION_HEADER.unpack_from(data)
+        if fmt != SESSION_FORMAT:
+            raise ValueError(f"Unsupported session format {fmt}")
+        pos = _SESSION_HEADER.size
+        texts = []
+        for _ in range(2):
+            n = data[pos]
+            texts.append(data[pos + 1:pos + 1 + n].decode())
+            pos += 1 + n
+
+        session = cls(engine, texts[0], texts[1], tree=tree, seed=seed, seen_ids=seen_ids)
+        for _ in range(n_questions):
+            n = data[pos]
+            session.question_ids.append(data[pos + 1:pos + 1 + n].decode())
+            code, selected = struct.unpack_from("<HB", data, pos + 1 + n)
+            session.perm_codes.append(code)
+            if selected != _UNANSWERED:
+                session.selected.append(selected)
+            pos += 1 + n + 3
+        session.state = state
+        session.result = result
+        session.correct_mask = mask
+        for qid in session.question_ids:
+            session.seen_ids.update(engine.related_ids(qid))
+        return session
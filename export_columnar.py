@@ -0,0 +1,161 @@
+"""Bulk export of stored results to columnar files for analysis jobs.
+
+Streams the result store in fixed-size chunks (memory stays bounded by
+``chunk_rows``) into two tables plus a code map:
+
+* ``results``   – one row per finished skill test
+* ``answers``   – one row per answer: ``result_id, position, question_code,
+  selected_index, is_correct``
+* ``question_codes`` – ``question_code -> question_id``
+
+An answer without a ``question_id`` (hand-edited or truncated legacy files)
+cannot be coded; it is left out and counted in ``skipped_answers``.  Its
+``position`` stays unused and ``n_answers`` counts exported answers only.
+
+Question ids become dense ``int32`` codes so answer columns are plain
+integer arrays.  The default Arrow IPC files can be memory-mapped for
+zero-copy reads (``pyarrow.ipc.open_file(pyarrow.memory_map(path))``);
+Parquet is available for archival.
+
+    python export_columnar.py [--store results/store] [--out exports] [--format arrow|parquet]
+"""
+
+import argparse
+import os
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from result_store import STORE_DIR, ResultStore
+
+RESULTS_SCHEMA = pa.schema([
+    ("result_id", pa.int64()),
+    ("account", pa.string()),
+    ("skill", pa.string()),
+    ("start_seniority", pa.string()),
+    ("final_result", pa.string()),
+    ("failed", pa.bool_()),
+    ("seed", pa.uint64()),
+    ("datetime", pa.string()),
+    ("n_answers", pa.int16()),
+])
+
+ANSWERS_SCHEMA = pa.schema([
+    ("result_id", pa.int64()),
+    ("position", pa.int8()),
+    ("question_code", pa.int32()),
+    ("selected_index", pa.int8()),
+    ("is_correct", pa.bool_()),
+])
+
+CODES_SCHEMA = pa.schema([("question_code", pa.int32()), ("question_id", pa.string())])
+
+
+class _TableWriter:
+    """Write record batches to an Arrow IPC or Parquet file."""
+
+    def __init__(self, path: str, schema: pa.Schema, fmt: str):
+        self.schema = schema
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = ipc.new_file(self._sink, schema)
+        self.fmt = fmt
+
+    def write(self, columns: dict):
+        batch = pa.record_batch(
+            [pa.array(columns[field.name], type=field.type) for field in self.schema],
+            schema=self.schema,
+        )
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        if self.fmt != "parquet":
+            self._sink.close()
+
+
+def export(store: ResultStore, out_dir: str = "exports", fmt: str = "arrow",
+           chunk_rows: int = 100_000) -> dict:
+    """Export every stored record; return row counts per table."""
+
+    os.makedirs(out_dir, exist_ok=True)
+    ext = "parquet" if fmt == "parquet" else "arrow"
+    results_w = _TableWriter(os.path.join(out_dir, f"results.{ext}"), RESULTS_SCHEMA, fmt)
+    answers_w = _TableWriter(os.path.join(out_dir, f"answers.{ext}"), ANSWERS_SCHEMA, fmt)
+
+    codes = {}
+    results = {f.name: [] for f in RESULTS_SCHEMA}
+    answers = {f.name: [] for f in ANSWERS_SCHEMA}
+    counts = {"results": 0, "answers": 0, "skipped_answers": 0}
+
+    def flush():
+        if results["result_id"]:
+            results_w.write(results)
+            for column in results.values():
+                column.clear()
+        if answers["result_id"]:
+            answers_w.write(answers)
+            for column in answers.values():
+                column.clear()
+
+    try:
+        for result_id, record in enumerate(store.iter_records()):
+            recorded = record.get("answer_history") or []
+            history = [(position, answer) for position, answer in enumerate(recorded)
+                       if isinstance(answer, dict) and answer.get("question_id") is not None]
+            counts["skipped_answers"] += len(recorded) - len(history)
+            results["result_id"].append(result_id)
+            results["account"].append(record.get("account"))
+            results["skill"].append(record.get("skill"))
+            results["start_seniority"].append(record.get("start_seniority"))
+            results["final_result"].append(record.get("final_result"))
+            results["failed"].append(bool(record.get("failed")))
+            results["seed"].append(record.get("seed"))
+            results["datetime"].append(record.get("datetime"))
+            results["n_answers"].append(len(history))
+            for position, answer in history:
+                code = codes.setdefault(answer["question_id"], len(codes))
+                answers["result_id"].append(result_id)
+                answers["position"].append(position)
+                answers["question_code"].append(code)
+                answers["selected_index"].append(answer.get("selected_index"))
+                answers["is_correct"].append(bool(answer.get("is_correct")))
+            counts["results"] += 1
+            counts["answers"] += len(history)
+            if len(answers["result_id"]) >= chunk_rows or len(results["result_id"]) >= chunk_rows:
+                flush()
+        flush()
+    finally:
+        results_w.close()
+        answers_w.close()
+
+    codes_w = _TableWriter(os.path.join(out_dir, f"question_codes.{ext}"), CODES_SCHEMA, fmt)
+    codes_w.write({"question_code": list(codes.values()), "question_id": list(codes)})
+    codes_w.close()
+    counts["question_codes"] = len(codes)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored results to columnar files")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--out", default="exports")
+    parser.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    counts = export(ResultStore(args.store), args.out, args.format, args.chunk_rows)
+    print(f"Exported {counts['results']} results, {counts['answers']} answers, "
+          f"{counts['question_codes']} question codes to {args.out}")
+    if counts["skipped_answers"]:
+        print(f"Skipped {counts['skipped_answers']} answers without a question_id")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Live question-exposure counters and least-recently-served selection.
+
+Every candidate draws from the same handful of questions per bucket, so a
+plain ``random.choice`` lets a few items be over-served by chance.  The
+tracker counts how often each question is served and hands out the one in
+the bucket that was served longest ago (ties broken at random), which keeps
+exposure flat across a bucket.  Counts, last-served stamps and the logical
+clock are flushed periodically to ``results/state/exposure.json`` (outside
+the result files) and reloaded on start.  Several processes (the app, the API
+server) share that file: a flush holds an exclusive ``flock`` on
+``exposure.json.lock``, adds what this process served since its last flush
+to the counts on disk and keeps the later of each last-served stamp.  When
+the bank is reloaded, the new engine's tracker ``adopt``s the old one: counts
+carry over by question id and whatever old sessions still record is
+forwarded.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: flushes from several processes may overwrite each other
+    fcntl = None
+
+EXPOSURE_FILE = os.path.join("results", "state", "exposure.json")
+
+
+class ExposureTracker:
+    """Serve counters indexed by question offset (engine order)."""
+
+    def __init__(self, question_ids, path: str | None = EXPOSURE_FILE,
+                 flush_interval: float = 30.0):
+        self.question_ids = tuple(question_ids)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.counts = [0] * len(self.question_ids)
+        self.last_served = [0] * len(self.question_ids)  # logical clock, 0 = never
+        self._clock = 0
+        self._flushed = [0] * len(self.question_ids)  # counts as of the last load/flush
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._successor: "ExposureTracker | None" = None
+        self._forward = None  # offset here -> offset in the successor (-1: gone)
+        if path:
+            self.load()
+
+    # --------------------------------------------------------------------- #
+    # Hot path
+
+    def choose(self, candidates, rng) -> int:
+        """Return the least recently served offset among *candidates*."""
+
+        n = len(candidates)
+        start = rng.randrange(n)  # random rotation breaks ties fairly
+        last = self.last_served
+        best = candidates[start]
+        for k in range(1, n):
+            offset = candidates[(start + k) % n]
+            if last[offset] < last[best]:
+                best = offset
+        return best
+
+    def record(self, offset: int) -> tuple[int, int] | None:
+        """Count one exposure of the question at *offset*; return a token for ``release``."""
+
+        with self._lock:
+            successor = self._successor
+            if successor is None:
+                self._clock += 1
+                previous = self.last_served[offset]
+                self.counts[offset] += 1
+                self.last_served[offset] = self._clock
+                return self._clock, previous
+        if self._forward[offset] >= 0:  # retired: the newer tracker owns the counts
+            return successor.record(self._forward[offset])
+        return None
+
+    def release(self, offset: int, token: tuple[int, int]):
+        """Undo a ``record`` whose question ended up not being served."""
+
+        stamp, previous = token
+        with self._lock:
+            successor = self._successor
+            if successor is None:
+                self.counts[offset] = max(0, self.counts[offset] - 1)
+                if self.last_served[offset] == stamp:  # not served again since
+                    self.last_served[offset] = previous
+                return
+        if self._forward[offset] >= 0:
+            successor.release(self._forward[offset], token)
+
+    # --------------------------------------------------------------------- #
+    # Reporting and persistence
+
+    def stats(self) -> dict:
+        """``{question_id: count}`` for every question, plus totals."""
+
+        counts = dict(zip(self.question_ids, self.counts))
+        served = sum(self.counts)
+        return {
+            "served": served,
+            "max": max(self.counts, default=0),
+            "never_served": sum(1 for c in self.counts if c == 0),
+            "counts": counts,
+        }
+
+    def _read(self) -> tuple[dict, dict, int]:
+        """``(counts, last_served, clock)`` saved in ``path``, empty if there is none."""
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f_in:
+                saved = json.load(f_in)
+            return saved["counts"], saved.get("last_served", {}), saved.get("clock", 0)
+        except (FileNotFoundError, KeyError, ValueError):
+            return {}, {}, 0
+
+    def load(self):
+        counts, last_served, clock = self._read()
+        with self._lock:
+            for i, qid in enumerate(self.question_ids):
+                self.counts[i] = self._flushed[i] = counts.get(qid, 0)
+                self.last_served[i] = last_served.get(qid, 0)
+            self._clock = max(clock, max(self.last_served, default=0))
+
+    def flush(self):
+        """Merge this process's counts into ``path`` and write it atomically."""
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)  # released when closed
+            saved_counts, saved_last, saved_clock = self._read()
+            with self._lock:
+                served = [c - f for c, f in zip(self.counts, self._flushed)]
+                clock = max(self._clock, saved_clock)
+                last_served = [max(mine, saved_last.get(qid, 0))
+                               for qid, mine in zip(self.question_ids, self.last_served)]
+            merged = [max(0, saved_counts.get(qid, 0) + n) for qid, n in zip(self.question_ids, served)]
+            payload = dict(saved_counts)
+            payload.update(zip(self.question_ids, merged))
+            last = dict(saved_last)
+            last.update((qid, t) for qid, t in zip(self.question_ids, last_served) if t)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f_out:
+                json.dump({"updated": datetime.now().isoformat(), "clock": clock,
+                           "counts": payload, "last_served": last}, f_out, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            with self._lock:  # keep what was served while the file was written
+                for i, n in enumerate(merged):
+                    self.counts[i] += n - self._flushed[i] - served[i]
+                    self._flushed[i] = n
+                    self.last_served[i] = max(self.last_served[i], last_served[i])
+                self._clock = max(self._clock, clock)
+
+    def start(self) -> "ExposureTracker":
+        """Flush every ``flush_interval`` seconds from a daemon thread."""
+
+        if self.path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="exposure-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def adopt(self, old: "ExposureTracker"):
+        """Take over *old*'s counts (by id) and retire it: it forwards from now on."""
+
+        offset_of = {qid: i for i, qid in enumerate(self.question_ids)}
+        forward = [offset_of.get(qid, -1) for qid in old.question_ids]
+        with old._lock, self._lock:
+            for i, j in enumerate(forward):
+                if j >= 0:
+                    self.counts[j] = old.counts[i]
+                    self.last_served[j] = old.last_served[i]
+                    self._flushed[j] = old._flushed[i]
+            self._clock = max(self._clock, old._clock)
+            old._forward = forward
+            old._successor = self
+        old.stop()
@@ -0,0 +1,256 @@
+"""Background, batched persistence of result files to a GitHub repository.
+
+``save_to_github`` used to do one blocking ``requests.put`` per result inside
+the Streamlit rerun.  ``GitHubResultWriter.submit`` now only drops the result
+into a durable outbox (``results/outbox/``) and returns; a worker thread
+commits everything pending in one go through the Git trees API, reusing a
+pooled HTTP session and backing off exponentially while GitHub is unreachable.
+Files left in the outbox by a crash are picked up on the next start.
+
+Metrics: ``github_commit`` times each batch commit; once a commit lands,
+every entry in it records ``remote_save`` with its skill and seniority,
+measured from ``submit`` to the moment the result is on GitHub.
+
+A batch GitHub keeps rejecting when the tree or commit is created (a 4xx
+such as 422 for a bad path) is retried one entry at a time, and an entry
+rejected ``max_rejections`` times in a row is moved to ``dead_letter.jsonl``
+in the outbox so the queue behind it moves on.  Everything else (network
+errors, 5xx, auth, rate limits, a missing branch, a ref moved under us) says
+nothing about the entries and is retried indefinitely.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+OUTBOX_DIR = os.path.join("results", "outbox")
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+RETRYABLE_STATUS = {401, 403, 408, 429}  # not about the entries themselves
+
+
+class GitHubError(Exception):
+    """A GitHub API call returned an unexpected status.
+
+    ``rejected`` is set when GitHub refused the content being committed, so
+    sending the same entries again will not help.
+    """
+
+    def __init__(self, message: str, status: int | None = None, rejected: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.rejected = rejected
+
+
+class GitHubResultWriter:
+    """Queue result files locally and commit them to GitHub in batches."""
+
+    def __init__(self, owner: str, repo: str, token: str, *, branch: str = "main",
+                 api_url: str = "https://api.github.com", outbox_dir: str = OUTBOX_DIR,
+                 batch_size: int = 50, flush_interval: float = 2.0, timeout: float = 10.0,
+                 backoff_base: float = 1.0, backoff_max: float = 300.0,
+                 max_rejections: int = 5):
+        self.repo_url = f"{api_url.rstrip('/')}/repos/{owner}/{repo}"
+        self.branch = branch
+        self.outbox_dir = outbox_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_rejections = max_rejections
+        self.dead_letter_path = os.path.join(outbox_dir, DEAD_LETTER_FILE)
+
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.http.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github.v3+json",
+        })
+
+        self.failures = 0
+        self.rejections = 0  # consecutive rejections of the current batch
+        self.dead_letters = 0
+        self.last_error: str | None = None
+        self._singles = 0  # entries left to send one by one after a rejected batch
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        os.makedirs(self.outbox_dir, exist_ok=True)
+
+    # --------------------------------------------------------------------- #
+    # Producer side (called from the UI thread)
+
+    def submit(self, path: str, content: dict, skill: str = "", seniority: str = "") -> str:
+        """Persist *content* for repo *path* in the outbox; never blocks on I/O to GitHub.
+
+        *skill* and *seniority* only label the ``remote_save`` metric.
+        """
+
+        entry = os.path.join(self.outbox_dir, f"{time.time_ns()}_{uuid.uuid4().hex[:8]}.json")
+        tmp = entry + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f_out:
+            json.dump({"path": path, "content": content, "skill": skill, "seniority": seniority,
+                       "queued": time.time()}, f_out, ensure_ascii=False)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.replace(tmp, entry)
+        self._wake.set()
+        return entry
+
+    def pending(self) -> list[str]:
+        """Outbox entries not yet committed, oldest first."""
+
+        return sorted(
+            os.path.join(self.outbox_dir, name)
+            for name in os.listdir(self.outbox_dir)
+            if name.endswith(".json")
+        )
+
+    # --------------------------------------------------------------------- #
+    # Worker
+
+    def start(self) -> "GitHubResultWriter":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="github-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None):
+        """Ask the worker to drain what it can and exit."""
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                while self.flush_once():
+                    pass
+            except Exception as e:  # keep the worker alive, retry later
+                self.failures += 1
+                self.last_error = str(e)
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+                delay *= random.uniform(0.5, 1.0)
+                log.warning("GitHub result push failed (%s); retrying in %.1fs", e, delay)
+                if self._stop.wait(delay):
+                    return
+                continue
+            if self._stop.is_set():
+                return
+
+    def flush_once(self) -> int:
+        """Commit up to ``batch_size`` outbox entries; return how many were sent."""
+
+        batch = self.pending()[: 1 if self._singles else self.batch_size]
+        if not batch:
+            return 0
+        files = []
+        for entry in batch:
+            with open(entry, "r", encoding="utf-8") as f_in:
+                files.append(json.load(f_in))
+
+        try:
+            with METRICS.span("github_commit"):
+                self._commit(files)
+        except GitHubError as e:
+            if not e.rejected:
+                raise
+            self.rejections += 1
+            if self.rejections < self.max_rejections:
+                raise
+            self.rejections = 0
+            if len(batch) > 1:  # find out which entries GitHub objects to
+                self._singles = len(batch)
+                log.warning("GitHub keeps rejecting a batch (%s); sending it one by one", e)
+                return 0
+            self._dead_letter(batch[0], files[0], str(e))
+        else:
+            self._observe_saves(files)
+        for entry in batch:
+            os.remove(entry)
+        self._singles = max(0, self._singles - 1)
+        self.failures = self.rejections = 0
+        self.last_error = None
+        return len(batch)
+
+    @staticmethod
+    def _observe_saves(files: list[dict]):
+        """``remote_save`` per committed entry: from ``submit`` until it landed."""
+
+        if not METRICS.enabled:
+            return
+        now = time.time()
+        for f in files:
+            if "queued" in f:  # entries queued before the labels were kept have no start
+                METRICS.observe("remote_save", f.get("skill", ""), f.get("seniority", ""),
+                                max(0.0, now - f["queued"]))
+
+    def _dead_letter(self, entry: str, payload: dict, reason: str):
+        """Set aside an entry GitHub will not accept, with the reason."""
+
+        line = {"entry": os.path.basename(entry), "error": reason, **payload}
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f_out:
+            f_out.write(json.dumps(line, ensure_ascii=False) + "\n")
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        self.dead_letters += 1
+        log.error("GitHub rejected %s %d times; moved to %s: %s", payload.get("path"),
+                  self.max_rejections, self.dead_letter_path, reason)
+
+    # --------------------------------------------------------------------- #
+    # Git data API: ref -> commit -> new tree -> new commit -> move ref
+
+    def _call(self, method: str, path: str, expect=(200, 201), content: bool = False,
+              **kwargs) -> dict:
+        """One API call; with *content*, a 4xx means GitHub refused the entries themselves."""
+
+        res = self.http.request(method, f"{self.repo_url}{path}", timeout=self.timeout, **kwargs)
+        if res.status_code not in expect:
+            status = res.status_code
+            rejected = content and 400 <= status < 500 and status not in RETRYABLE_STATUS
+            raise GitHubError(f"{method} {path}: {status} {res.text[:200]}", status, rejected)
+        return res.json()
+
+    def _commit(self, files: list[dict]):
+        ref = self._call("GET", f"/git/ref/heads/{self.branch}")
+        parent_sha = ref["object"]["sha"]
+        parent = self._call("GET", f"/git/commits/{parent_sha}")
+
+        tree = self._call("POST", "/git/trees", content=True, json={
+            "base_tree": parent["tree"]["sha"],
+            "tree": [
+                {
+                    "path": f["path"],
+                    "mode": "100644",
+                    "type": "blob",
+                    "content": json.dumps(f["content"], indent=2, ensure_ascii=False),
+                }
+                for f in files
+            ],
+        })
+        message = (f"Add {len(files)} results" if len(files) > 1
+                   else f"Add result {os.path.basename(files[0]['path'])}")
+        commit = self._call("POST", "/git/commits", content=True, json={
+            "message": message,
+            "tree": tree["sha"],
+            "parents": [parent_sha],
+        })
+        # Not forced: if someone else moved the branch, the 422 is retried
+        self._call("PATCH", f"/git/refs/heads/{self.branch}", json={"sha": commit["sha"]})
@@ -0,0 +1,193 @@
+"""Hot reload of the question bank without restarting the app.
+
+``BankReloader`` watches ``merged_file.json`` (a cheap ``os.stat`` poll from
+a daemon thread).  When the file's content changes it builds a complete new
+``BankVersion`` off the request path:
+
+1. the snapshot and the near-duplicate clusters are rebuilt in a spawned
+   worker process (so the parsing does not compete with requests for the GIL),
+2. the watcher thread then loads them and builds the engine, the CAT item
+   pool and the warmed render cache,
+3. ``current`` is replaced by a single reference assignment.
+
+Nothing is ever mutated in place: a session keeps the version it started
+with (the Streamlit app pins it in ``st.session_state["bank"]``) and finishes
+on it, while new sessions get the new one.  A version is freed by reference
+counting as soon as no session holds it; ``live_versions`` reports which are
+still in use.  Exposure counts move to the newest tracker and sessions on an
+old version keep counting through it.  A bank that fails to load (say, a
+half-written file) is logged and the current version stays in service.
+
+    python hot_reload.py [merged_file.json] [--interval 2]   # watch and log reloads
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from cat import ItemPool
+from engine import QUESTIONS_FILE, AdaptiveTestingEngine, QuestionSource
+from near_duplicates import load_duplicates
+from render_cache import RenderCache
+from search_index import QuestionSearchIndex
+from sharded_bank import ShardedTestingEngine
+from snapshot import build_snapshot, file_checksum, load_snapshot
+
+log = logging.getLogger(__name__)
+
+
+class BankVersion:
+    """One immutable generation of the bank and everything derived from it."""
+
+    __slots__ = ("number", "checksum", "loaded_at", "engine", "item_pool", "render_cache",
+                 "_search", "_lock", "__weakref__")
+
+    def __init__(self, number: int, checksum: str | None, engine: QuestionSource,
+                 item_pool: ItemPool | None = None, render_cache: RenderCache | None = None):
+        self.number = number
+        self.checksum = checksum
+        self.loaded_at = datetime.now()
+        self.engine = engine
+        self.item_pool = item_pool
+        self.render_cache = render_cache or RenderCache()
+        self._search = None
+        self._lock = threading.Lock()
+
+    def search_index(self) -> QuestionSearchIndex | None:
+        """Admin search index, built on first use (only the admin page needs it)."""
+
+        if isinstance(self.engine, ShardedTestingEngine):
+            return None
+        with self._lock:
+            if self._search is None:
+                self._search = QuestionSearchIndex(self.engine.questions)
+            return self._search
+
+
+def _prepare(source: str) -> str:
+    """Worker process: rebuild the snapshot and duplicate caches for *source*."""
+
+    payload = build_snapshot(source)
+    load_duplicates(source, questions=payload["questions"])
+    return payload["checksum"]
+
+
+def load_version(source: str, number: int) -> BankVersion:
+    """Build a version from the (already prepared) caches of *source*."""
+
+    checksum = file_checksum(source)
+    questions, index = load_snapshot(source)
+    engine = AdaptiveTestingEngine(questions, track_exposure=True, index=index,
+                                   duplicates=load_duplicates(source, questions=questions))
+    return BankVersion(number, checksum, engine, ItemPool(engine), RenderCache().warm(questions))
+
+
+class BankReloader:
+    """Holds the current ``BankVersion`` and swaps in new ones as the file changes."""
+
+    def __init__(self, source: str | None = QUESTIONS_FILE, interval: float = 2.0, *,
+                 version: BankVersion | None = None):
+        """Load *source* as version 1; ``source=None, version=...`` serves a fixed bank."""
+
+        self.source = source
+        self.interval = interval
+        self.reloads = 0
+        self.last_error: str | None = None
+        self._versions = weakref.WeakValueDictionary()  # number -> live BankVersion
+        self._stat = self._file_stat()
+        self._reload_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.current = self._install(version or load_version(source, 1))
+        if self.current.engine.exposure is not None:
+            self.current.engine.exposure.start()
+
+    def _install(self, version: BankVersion) -> BankVersion:
+        self._versions[version.number] = version
+        return version
+
+    def live_versions(self) -> list[int]:
+        """Numbers of the versions still referenced (current one included)."""
+        return sorted(self._versions.keys())
+
+    # --------------------------------------------------------------------- #
+    # Watching
+
+    def _file_stat(self):
+        if self.source is None:
+            return None
+        try:
+            st = os.stat(self.source)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self) -> "BankReloader":
+        if self.source and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bank-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stat = self._file_stat()
+            if stat is not None and stat != self._stat:
+                self._stat = stat
+                self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the file again if its content changed; return whether a swap happened."""
+
+        with self._reload_lock:
+            try:
+                if not force and file_checksum(self.source) == self.current.checksum:
+                    return False
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                    pool.submit(_prepare, self.source).result()
+                version = load_version(self.source, self.current.number + 1)
+            except Exception as e:  # keep serving the current version
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.exception("Question bank reload failed; keeping version %d",
+                              self.current.number)
+                return False
+
+            old = self.current
+            if old.engine.exposure is not None:
+                version.engine.exposure.adopt(old.engine.exposure)
+                version.engine.exposure.start()
+            self.current = self._install(version)
+            self.reloads += 1
+            self.last_error = None
+            log.info("Question bank v%d loaded (%d questions)", version.number,
+                     len(version.engine.questions))
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the question bank and reload on change")
+    parser.add_argument("source", nargs="?", default=QUESTIONS_FILE)
+    parser.add_argument("--interval", type=float, default=2.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    reloader = BankReloader(args.source, args.interval).start()
+    print(f"Watching {args.source} (v1, {len(reloader.current.engine.questions)} questions)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Incremental ingest of question files into ``merged_file.json``.
+
+Instead of re-merging every question file by hand, hand new or edited files to
+this tool.  Each source question is identified by ``<file path relative to
+the bank>#<its id in that file>`` and hashed over its content (everything but
+``id``):
+
+* same key, same hash   – unchanged, skipped
+* same key, new hash    – edited in place, keeps its bank id
+* new key               – appended with the next free bank id, unless the very
+  same content is already in the bank (then it is mapped to that id)
+
+A file that was moved or renamed keeps its questions' bank ids, edits
+included: when a file is new to the map but a known source file no longer
+exists and most of its source ids reappear in the new file, the old file's
+keys are carried over to the new path (reported under ``moved``).  A copy
+left at the old path is a separate source: identical questions map to the
+existing ids, edited ones are added as new questions.
+
+Bank ids therefore never change or get reused, so question ids saved in
+``answer_history`` stay valid.  The mapping lives in ``question_ids.json``
+next to the bank (bootstrapped from the current bank on first run), together
+with each source file's checksum so untouched files are skipped outright.
+Schema checks and hashing run in a process pool; invalid questions are
+reported and left out.  With ``--near-duplicates`` added and edited questions
+are also checked against the whole bank (*near_duplicates.py*) and questions
+that merely reword an existing one are listed.
+
+    python ingest.py react_new.json [--bank merged_file.json] [--near-duplicates] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from branching import SENIORITY_CODES
+from engine import QUESTIONS_FILE
+from near_duplicates import NearDuplicateIndex
+from snapshot import file_checksum
+
+LEVELS = range(1, 6)
+SENIORITIES = frozenset(SENIORITY_CODES.values())
+
+_WS = re.compile(r"[\s,]*")
+
+
+def source_name(path: str, bank_path: str) -> str:
+    """*path* relative to the bank's directory: ``a/react.json`` and ``b/react.json`` differ."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(bank_path)))
+    return rel.replace(os.sep, "/")
+
+
+def source_ids(questions: list) -> set:
+    """Ids that questions carry in their source file."""
+    return {str(q["id"]) for q in questions if isinstance(q, dict) and q.get("id") is not None}
+
+
+def find_moved(id_map: dict, name: str, questions: list, bank_path: str) -> str | None:
+    """Known source file that *name* replaces: gone from disk, sharing most source ids."""
+
+    ids = source_ids(questions)
+    if not ids or name in id_map["files"]:
+        return None
+    bank_dir = os.path.dirname(os.path.abspath(bank_path))
+    best, best_overlap = None, 0
+    for old in id_map["files"]:
+        if os.path.exists(os.path.join(bank_dir, old)):
+            continue
+        prefix = old + "#"
+        old_ids = {key[len(prefix):] for key in id_map["questions"] if key.startswith(prefix)}
+        overlap = len(ids & old_ids)
+        if overlap * 2 > min(len(ids), len(old_ids)) and overlap > best_overlap:
+            best, best_overlap = old, overlap
+    return best
+
+
+def rename_source(id_map: dict, old: str, new: str):
+    """Re-key every entry of source file *old* to *new*."""
+
+    prefix = old + "#"
+    for key in [k for k in id_map["questions"] if k.startswith(prefix)]:
+        id_map["questions"][new + key[len(old):]] = id_map["questions"].pop(key)
+    del id_map["files"][old]
+
+
+def default_id_map_path(bank: str) -> str:
+    return os.path.join(os.path.dirname(bank), "question_ids.json")
+
+
+def content_hash(q: dict) -> str:
+    """SHA-256 over the canonical JSON of everything but ``id``."""
+
+    body = {k: v for k, v in q.items() if k != "id"}
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def validate(q) -> list[str]:
+    """Schema problems with one question (empty list if valid)."""
+
+    if not isinstance(q, dict):
+        return ["not an object"]
+    errors = []
+    if not isinstance(q.get("skill"), str) or not q["skill"]:
+        errors.append("missing skill")
+    if q.get("seniority") not in SENIORITIES:
+        errors.append(f"invalid seniority {q.get('seniority')!r}")
+    if type(q.get("level")) is not int or q["level"] not in LEVELS:
+        errors.append(f"invalid level {q.get('level')!r}")
+    if not isinstance(q.get("question"), str) or not q["question"].strip():
+        errors.append("missing question text")
+    options = q.get("options")
+    if not isinstance(options, list) or len(options) < 2:
+        errors.append("needs at least two options")
+    else:
+        if not all(isinstance(o, dict) and isinstance(o.get("description"), str)
+                   and isinstance(o.get("isAnswerKey"), bool) for o in options):
+            errors.append("options need a description and a boolean isAnswerKey")
+        elif sum(o["isAnswerKey"] for o in options) != 1:
+            errors.append("exactly one option must be the answer key")
+    return errors
+
+
+def check_chunk(questions: list) -> list[tuple[str | None, list[str]]]:
+    """``(content hash, errors)`` per question; runs in a worker process."""
+    return [(content_hash(q) if isinstance(q, dict) else None, validate(q)) for q in questions]
+
+
+###############################################################################
+# --------------------------------  BANK  ----------------------------------- #
+###############################################################################
+
+def load_bank(path: str) -> tuple[list, list]:
+    """``(questions, raw)`` where ``raw[i]`` is question *i*'s text in the file.
+
+    Untouched questions are written back verbatim, so a merge only
+    re-serializes what changed (and the file diff shows just that).
+    """
+
+    with open(path, "r", encoding="utf-8") as f_in:
+        text = f_in.read()
+    decoder = json.JSONDecoder()
+    questions, raw = [], []
+    pos = text.index("[") + 1
+    while True:
+        pos = _WS.match(text, pos).end()
+        if text[pos] == "]":
+            return questions, raw
+        q, end = decoder.raw_decode(text, pos)
+        questions.append(q)
+        raw.append(text[pos:end])
+        pos = end
+
+
+def dump_question(q: dict) -> str:
+    """One bank entry as ``json.dump(bank, indent=4)`` lays it out."""
+    return json.dumps(q, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+
+
+def save_bank(path: str, raw: list):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f_out:
+        f_out.write("[\n    " + ",\n    ".join(raw) + "\n]\n" if raw else "[]\n")
+    os.replace(tmp, path)
+
+
+###############################################################################
+# -------------------------------  ID MAP  ---------------------------------- #
+###############################################################################
+
+def read_id_map(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f_in:
+            return json.load(f_in)
+    except FileNotFoundError:
+        return None
+
+
+def bootstrap_id_map(bank: list, bank_name: str) -> dict:
+    """First run: every bank question maps to its own id."""
+
+    numeric = [int(q["id"]) for q in bank if str(q["id"]).isdigit()]
+    return {
+        "next_id": max(numeric, default=0) + 1,
+        "files": {},
+        "questions": {f"{bank_name}#{q['id']}": [q["id"], content_hash(q)] for q in bank},
+    }
+
+
+def save_json(path: str, data, **kwargs):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f_out:
+        json.dump(data, f_out, ensure_ascii=False, **kwargs)
+    os.replace(tmp, path)
+
+
+###############################################################################
+# -------------------------------  INGEST  ---------------------------------- #
+###############################################################################
+
+def ingest(paths: list[str], bank_path: str = QUESTIONS_FILE, id_map_path: str | None = None,
+           workers: int | None = None, chunk_size: int = 2000, dry_run: bool = False,
+           near_duplicates: bool = False) -> dict:
+    """Merge *paths* into the bank; return a report of what changed."""
+
+    id_map_path = id_map_path or default_id_map_path(bank_path)
+    report = {"added": [], "changed": [], "unchanged": 0, "duplicates": [], "moved": [],
+              "near_duplicates": [], "invalid": [], "skipped_files": []}
+    id_map = read_id_map(id_map_path)
+    known_files = id_map["files"] if id_map else {}
+    pending = []
+    for path in paths:
+        name = source_name(path, bank_path)
+        checksum = file_checksum(path)
+        if known_files.get(name) == checksum:
+            report["skipped_files"].append(name)
+        else:
+            pending.append((path, name, checksum))
+    if not pending:  # nothing new: don't even read the bank
+        return report
+
+    bank, raw = load_bank(bank_path)
+    id_map = id_map or bootstrap_id_map(bank, source_name(bank_path, bank_path))
+    position = {q["id"]: i for i, q in enumerate(bank)}
+    id_by_hash = {h: bank_id for bank_id, h in id_map["questions"].values()}
+    owners = Counter(bank_id for bank_id, _ in id_map["questions"].values())
+
+    todo = []
+    for path, name, checksum in pending:
+        with open(path, "r", encoding="utf-8") as f_in:
+            todo.append((name, checksum, json.load(f_in)))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [qs[i:i + chunk_size] for _, _, qs in todo for i in range(0, len(qs), chunk_size)]
+    if len(chunks) > 1 and workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            checked = [item for part in pool.map(check_chunk, chunks) for item in part]
+    else:
+        checked = [item for chunk in chunks for item in check_chunk(chunk)]
+
+    results = iter(checked)
+    for name, checksum, questions in todo:
+        old = find_moved(id_map, name, questions, bank_path)
+        if old is not None:
+            rename_source(id_map, old, name)
+            report["moved"].append({"from": old, "to": name})
+        for n, q in enumerate(questions):
+            digest, errors = next(results)
+            source_id = q.get("id") if isinstance(q, dict) else None
+            if source_id is not None:
+                key = f"{name}#{source_id}"
+            else:  # no source id: only identical content is recognised again
+                key = f"{name}#sha:{digest}" if digest else f"{name}#{n}"
+            if errors:
+                report["invalid"].append({"key": key, "index": n, "errors": errors})
+                continue
+
+            entry = id_map["questions"].get(key)
+            if entry is not None and entry[1] == digest:
+                report["unchanged"] += 1
+                continue
+            record = {**q}
+            shared = False
+            if entry is not None:
+                owners[entry[0]] -= 1
+                shared = owners[entry[0]] > 0  # other sources still use the old text
+                if not shared and id_by_hash.get(entry[1]) == entry[0]:
+                    del id_by_hash[entry[1]]
+            if entry is not None and not shared:  # edited: same bank id, new content
+                bank_id = entry[0]
+                record["id"] = bank_id
+                bank[position[bank_id]] = record
+                raw[position[bank_id]] = dump_question(record)
+                report["changed"].append(bank_id)
+            elif digest in id_by_hash:            # identical content already banked
+                bank_id = id_by_hash[digest]
+                report["duplicates"].append({"key": key, "id": bank_id})
+            else:                                 # new question
+                bank_id = str(id_map["next_id"])
+                id_map["next_id"] += 1
+                record["id"] = bank_id
+                position[bank_id] = len(bank)
+                bank.append(record)
+                raw.append(dump_question(record))
+                report["added"].append(bank_id)
+            id_map["questions"][key] = [bank_id, digest]
+            id_by_hash[digest] = bank_id
+            owners[bank_id] += 1
+        id_map["files"][name] = checksum
+
+    if near_duplicates and (report["added"] or report["changed"]):
+        index = NearDuplicateIndex(bank)
+        for bank_id in report["added"] + report["changed"]:
+            similar = index.similar(bank[position[bank_id]])
+            if similar:
+                report["near_duplicates"].append({"id": bank_id, "similar": similar})
+
+    if not dry_run:
+        if report["added"] or report["changed"]:
+            save_bank(bank_path, raw)
+        save_json(id_map_path, id_map, separators=(",", ":"))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge new or edited question files into the bank")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--bank", default=QUESTIONS_FILE)
+    parser.add_argument("--id-map", help="default: question_ids.json next to the bank")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="list added/edited questions that reword existing ones")
+    parser.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    args = parser.parse_args()
+
+    report = ingest(args.files, args.bank, args.id_map, args.workers, dry_run=args.dry_run,
+                    near_duplicates=args.near_duplicates)
+    print(f"added {len(report['added'])}, changed {len(report['changed'])}, "
+          f"unchanged {report['unchanged']}, duplicates {len(report['duplicates'])}, "
+          f"invalid {len(report['invalid'])}, skipped files {len(report['skipped_files'])}")
+    for moved in report["moved"]:
+        print(f"  {moved['from']} moved to {moved['to']}: kept its question ids")
+    for near in report["near_duplicates"]:
+        similar = ", ".join(f"{qid} ({score:.2f})" for qid, score in near["similar"])
+        print(f"  {near['id']} resembles {similar}")
+    for bad in report["invalid"]:
+        print(f"  {bad['key']} (#{bad['index']}): {'; '.join(bad['errors'])}")
+    sys.exit(1 if report["invalid"] else 0)
+
+
+if __name__ == "__main__":
+    main()
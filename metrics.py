@@ -0,0 +1,125 @@
+"""Timing spans for the quiz hot paths, exported in Prometheus text format.
+
+Spans (question selection, answer scoring, local and remote saves) feed
+fixed-bucket latency histograms keyed by ``(span, skill, seniority)``.  Off by
+default: while disabled, ``span`` hands back a shared no-op context and the
+``timed`` wrapper is a single attribute check.  Turn it on with
+``QUIZ_METRICS=1`` (or ``METRICS.enable()``) and scrape
+``http://127.0.0.1:$QUIZ_METRICS_PORT/metrics`` (default port 9108).
+"""
+
+import contextlib
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NOOP = contextlib.nullcontext()
+
+
+class Metrics:
+    """Latency histograms; one ``[bucket counts..., sum]`` list per label set."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def observe(self, span: str, skill: str, seniority: str, seconds: float):
+        key = (span, skill, seniority)
+        slot = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(BUCKETS) + 2)  # +Inf, sum
+            series[slot] += 1
+            series[-1] += seconds
+
+    @contextlib.contextmanager
+    def _span(self, span: str, skill: str, seniority: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(span, skill, seniority, time.perf_counter() - t0)
+
+    def span(self, span: str, skill: str = "", seniority: str = ""):
+        """``with METRICS.span("local_save", skill, seniority): ...``"""
+        if not self.enabled:
+            return _NOOP
+        return self._span(span, skill, seniority)
+
+    def render(self) -> str:
+        """Prometheus text exposition of every histogram."""
+
+        lines = [
+            "# HELP quiz_span_seconds Time spent in quiz hot-path spans.",
+            "# TYPE quiz_span_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for (span, skill, seniority), series in items:
+            labels = f'span="{span}",skill="{skill}",seniority="{seniority}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f'quiz_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"quiz_span_seconds_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"quiz_span_seconds_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics(enabled=os.environ.get("QUIZ_METRICS", "") not in ("", "0"))
+
+
+def timed(span: str):
+    """Time a session method, labelled with the session's skill and start seniority."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not METRICS.enabled:
+                return method(self, *args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                METRICS.observe(span, self.skill, self.starting_seniority, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def start_http_server(port: int | None = None, host: str = "127.0.0.1",
+                      metrics: Metrics = METRICS) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread and return the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    if port is None:
+        port = int(os.environ.get("QUIZ_METRICS_PORT", "9108"))
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,181 @@
+"""Several skill tests run side by side, with start points taken from earlier results.
+
+``MultiSkillSession`` holds one ``AdaptiveTestSession`` per skill.  A skill
+starts as soon as the skills it depends on (``RELATED_SKILLS``: react waits
+for javascript, which waits for html, ...) have a result; its start seniority
+is then derived from those results instead of being asked for.  Every active
+skill has a question pending at once: ``next_questions`` returns them all
+and ``submit_answers`` takes one answer per skill, so a client needs one round
+trip per step instead of one per question.
+"""
+
+import random
+import struct
+
+from branching import DEFAULT_TREE, FAILED_RESULTS, BranchingTree, parse_state
+from calibration import bucket_rank, rank_bucket
+from engine import NO_QUESTION_LABEL, AdaptiveTestSession, QuestionSource
+
+MULTI_SESSION_FORMAT = 3
+
+# skill -> skills whose results choose its start point.  Also read by the
+# Streamlit app, whose SKILLS order must test the dependencies first.
+RELATED_SKILLS = {
+    "css": ("html",),
+    "javascript": ("html",),
+    "react": ("javascript",),
+}
+
+
+def result_rank(label: str) -> int | None:
+    """Bucket rank of a result label; ``LEVELJ0`` sits just below J1."""
+
+    if not label or label == NO_QUESTION_LABEL:
+        return None
+    seniority, level = parse_state(label[5:])
+    if label in FAILED_RESULTS:
+        return bucket_rank(seniority, 1) - 1
+    return bucket_rank(seniority, level)
+
+
+def start_from_results(labels, default: str = "middle") -> str:
+    """Start seniority matching the average level of *labels* (``default`` if none)."""
+
+    ranks = [r for r in map(result_rank, labels) if r is not None]
+    if not ranks:
+        return default
+    return rank_bucket(round(sum(ranks) / len(ranks)))[0]
+
+
+class MultiSkillSession:
+    """Interleaved tests for *skills*, scheduled by ``related`` dependencies."""
+
+    __slots__ = ("engine", "tree", "skills", "default_start", "seed", "seen_ids", "related",
+                 "sessions")
+
+    def __init__(self, engine: QuestionSource, skills, start_seniority="middle", *,
+                 tree: BranchingTree = DEFAULT_TREE, seed: int | None = None,
+                 seen_ids: set | None = None, related: dict = RELATED_SKILLS):
+        if start_seniority not in tree.start_state:
+            raise ValueError(f"Invalid seniority: {start_seniority}")
+        self.engine = engine
+        self.tree = tree
+        self.skills = list(skills)
+        self.default_start = start_seniority
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        self.seen_ids = seen_ids if seen_ids is not None else set()
+        self.related = related
+        self.sessions = {}  # skill -> AdaptiveTestSession, in start order
+
+    # --------------------------------------------------------------------- #
+    # Scheduling
+
+    @property
+    def waiting(self) -> list[str]:
+        return [skill for skill in self.skills if skill not in self.sessions]
+
+    @property
+    def active(self) -> list[str]:
+        return [skill for skill, s in self.sessions.items() if not s.is_finished]
+
+    @property
+    def is_finished(self) -> bool:
+        return not self.waiting and not self.active
+
+    @property
+    def results(self) -> dict:
+        """``{skill: final_result}`` for every finished skill."""
+        return {skill: s.final_result for skill, s in self.sessions.items() if s.is_finished}
+
+    def start_for(self, skill: str) -> str | None:
+        """Start seniority for *skill*, or ``None`` while a related skill is unfinished."""
+
+        deps = [d for d in self.related.get(skill, ()) if d in self.skills and d != skill]
+        if any(d not in self.sessions or not self.sessions[d].is_finished for d in deps):
+            return None
+        return start_from_results([self.sessions[d].final_result for d in deps], self.default_start)
+
+    def _start(self, skill: str, start: str):
+        seed = (self.seed * 31 + self.skills.index(skill)) % 2**63
+        self.sessions[skill] = AdaptiveTestSession(
+            self.engine, skill, start, tree=self.tree, seed=seed, seen_ids=self.seen_ids,
+        )
+
+    def _schedule(self):
+        for skill in self.waiting:
+            start = self.start_for(skill)
+            if start is not None:
+                self._start(skill, start)
+        if not self.active and self.waiting:  # circular dependencies: don't stall
+            self._start(self.waiting[0], self.default_start)
+
+    # --------------------------------------------------------------------- #
+    # Public API
+
+    def next_questions(self) -> dict:
+        """``{skill: question}`` for every active skill (drawn once, then repeated)."""
+
+        while True:
+            self._schedule()
+            questions = {skill: self.sessions[skill].get_next_question() for skill in self.active}
+            # A skill with no question left finishes now and may unblock others
+            if all(q is not None for q in questions.values()) and not any(
+                self.start_for(skill) is not None for skill in self.waiting
+            ):
+                return questions
+
+    def submit_answers(self, answers: dict) -> dict:
+        """Answer several skills at once; ``{skill: submit_answer result}``."""
+
+        out = {}
+        for skill, idx in answers.items():
+            session = self.sessions.get(skill)
+            if session is None or session.is_finished:
+                out[skill] = {"error": "No active question"}
+                continue
+            out[skill] = session.submit_answer(idx)
+        return out
+
+    # --------------------------------------------------------------------- #
+    # Serialization
+
+    def encode(self) -> bytes:
+        """Header, then per skill its name and (if started) the encoded session."""
+
+        parts = [struct.pack("<BQB", MULTI_SESSION_FORMAT, self.seed, len(self.skills))]
+        raw = self.default_start.encode()
+        parts.append(bytes((len(raw),)) + raw)
+        for skill in self.skills:
+            raw = skill.encode()
+            blob = self.sessions[skill].encode() if skill in self.sessions else b""
+            parts.append(bytes((len(raw),)) + raw + struct.pack("<H", len(blob)) + blob)
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes, engine: QuestionSource,
+               tree: BranchingTree = DEFAULT_TREE, seen_ids: set | None = None):
+        fmt, seed, n_skills = struct.unpack_from("<BQB", data)
+        if fmt != MULTI_SESSION_FORMAT:
+            raise ValueError(f"Unsupported session format {fmt}")
+        pos = struct.calcsize("<BQB")
+        n = data[pos]
+        default_start = data[pos + 1:pos + 1 + n].decode()
+        pos += 1 + n
+
+        skills, blobs = [], {}
+        for _ in range(n_skills):
+            n = data[pos]
+            skill = data[pos + 1:pos + 1 + n].decode()
+            (size,) = struct.unpack_from("<H", data, pos + 1 + n)
+            pos += 1 + n + 2
+            skills.append(skill)
+            if size:
+                blobs[skill] = data[pos:pos + size]
+            pos += size
+
+        session = cls(engine, skills, default_start, tree=tree, seed=seed, seen_ids=seen_ids)
+        for skill, blob in blobs.items():
+            session.sessions[skill] = AdaptiveTestSession.decode(
+                blob, engine, tree=tree, seen_ids=session.seen_ids
+            )
+        return session
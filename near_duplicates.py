@@ -0,0 +1,235 @@
+"""Near-duplicate questions via MinHash signatures and LSH banding.
+
+Many bank questions are small variations of one template ("identify the
+syntax issue" with a slightly different snippet).  Each question – text, code
+blocks and option descriptions (order ignored) – is reduced to a set of token
+bigrams and a 144-value MinHash signature; signatures are split into 48 bands
+of 3, and questions sharing any band are candidates, kept when their estimated
+Jaccard similarity reaches the threshold.  Candidates joined this way form
+clusters.  Everything is vectorized, so the bank is indexed in roughly linear
+time.
+
+On the current bank, unrelated questions stay below 0.26 bigram similarity
+(99.9th percentile) while rewordings of one item ("git status", the same
+DataFetcher component) score 0.45 and up, hence the default threshold.
+
+``load_duplicates`` caches the clusters next to the bank (rebuilt when the
+bank's checksum changes).  The engine takes them as ``duplicates=`` and a
+session marks a whole cluster as seen once one of its questions is served;
+``ingest.py --near-duplicates`` uses ``similar`` to flag new questions that
+copy existing ones.
+
+    python near_duplicates.py [merged_file.json] [--threshold 0.45]
+"""
+
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from engine import QUESTIONS_FILE, load_questions
+from snapshot import file_checksum
+
+BANDS = 48
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+THRESHOLD = 0.45
+SHINGLE = 2
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_CHUNK = 50_000  # shingles hashed at once: NUM_PERM x _CHUNK uint64 scratch
+
+
+def question_tokens(q) -> list[str]:
+    """Lowercase tokens of the text, then of the option descriptions (sorted)."""
+
+    tokens = _TOKEN.findall(q["question"].lower())
+    for text in sorted(opt["description"].lower() for opt in q["options"]):
+        tokens.append("\x00")  # keeps n-grams from spanning two fields
+        tokens.extend(_TOKEN.findall(text))
+    return tokens + ["\x00"] * (SHINGLE - len(tokens))
+
+
+class NearDuplicateIndex:
+    """MinHash signatures and LSH band keys for a list of questions."""
+
+    __slots__ = ("ids", "threshold", "signatures", "band_keys", "_vocab", "_a", "_b", "_mix")
+
+    def __init__(self, questions, threshold: float = THRESHOLD, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.ids = [q["id"] for q in questions]
+        self._vocab = {}
+        # random affine permutations of 32-bit shingle hashes: a * x + b mod 2**32
+        self._a = rng.integers(0, 2**31, NUM_PERM, dtype=np.uint32) * np.uint32(2) + np.uint32(1)
+        self._b = rng.integers(0, 2**32, NUM_PERM, dtype=np.uint32)
+        self._mix = rng.integers(0, 2**63, ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.signatures = self._signatures([question_tokens(q) for q in questions])
+        self.band_keys = self._band_keys(self.signatures)
+
+    # --------------------------------------------------------------------- #
+    # Hashing
+
+    def _shingles(self, token_lists) -> tuple[np.ndarray, np.ndarray]:
+        """Hashed token n-grams of every question, and where each question's start."""
+
+        tokens = [t for tokens in token_lists for t in tokens]
+        vocab = self._vocab
+        new = [t for t in dict.fromkeys(tokens) if t not in vocab]  # first-seen order
+        vocab.update(zip(new, range(len(vocab), len(vocab) + len(new))))
+        ids = np.fromiter(map(vocab.__getitem__, tokens), np.uint64, len(tokens))
+
+        lengths = np.fromiter(map(len, token_lists), np.int64, len(token_lists))
+        ends = np.cumsum(lengths)
+        h = ids[:len(ids) - SHINGLE + 1].copy()
+        for k in range(1, SHINGLE):
+            h = h * np.uint64(1_000_003) + ids[k:len(ids) - SHINGLE + 1 + k]
+        # drop the n-grams that run into the next question
+        counts = lengths - SHINGLE + 1
+        keep = np.ones(len(h), bool)
+        for k in range(1, SHINGLE):
+            keep[ends[:-1] - k] = False
+        h = h[keep] * np.uint64(0x9E3779B97F4A7C15)  # spread ids over the top bits
+        return (h >> np.uint64(32)).astype(np.uint32), np.r_[0, np.cumsum(counts)[:-1]]
+
+    def _signatures(self, token_lists) -> np.ndarray:
+        """``(n, NUM_PERM)`` MinHash matrix, hashing chunks of whole questions."""
+
+        shingles, starts = self._shingles(token_lists)
+        sig = np.empty((len(token_lists), NUM_PERM), np.uint32)
+        first = 0
+        while first < len(token_lists):
+            last = int(np.searchsorted(starts, starts[first] + _CHUNK, "right"))
+            last = max(last, first + 1)
+            lo = starts[first]
+            hi = starts[last] if last < len(starts) else len(shingles)
+            x = shingles[lo:hi]
+            values = self._a[:, None] * x[None, :] + self._b[:, None]
+            sig[first:last] = np.minimum.reduceat(values, starts[first:last] - lo, axis=1).T
+            first = last
+        return sig
+
+    def _band_keys(self, sig: np.ndarray) -> np.ndarray:
+        bands = sig.astype(np.uint64).reshape(len(sig), BANDS, ROWS)
+        return (bands * self._mix).sum(axis=2)  # (n, BANDS), wraps mod 2**64
+
+    # --------------------------------------------------------------------- #
+    # Queries
+
+    def candidate_pairs(self) -> np.ndarray:
+        """``(m, 2)`` index pairs sharing a band bucket, each pair once.
+
+        Every member of a bucket is paired with the bucket's first and its
+        previous member: linear in the bucket size, unlike all pairs.
+        """
+
+        n = len(self.ids)
+        pairs = []
+        for band in range(BANDS):
+            keys = self.band_keys[:, band]
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            new_group = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+            if new_group.all():
+                continue
+            member = ~new_group
+            leader = order[np.maximum.accumulate(np.where(new_group, np.arange(n), 0))]
+            previous = np.r_[order[:1], order[:-1]]
+            pairs.append(np.stack([leader[member], order[member]], axis=1))
+            pairs.append(np.stack([previous[member], order[member]], axis=1))
+        if not pairs:
+            return np.empty((0, 2), np.int64)
+        pairs = np.concatenate(pairs)
+        lo, hi = pairs.min(axis=1), pairs.max(axis=1)
+        keys = np.unique(lo[lo != hi] * n + hi[lo != hi])
+        return np.stack([keys // n, keys % n], axis=1)
+
+    def clusters(self) -> list[tuple[str, ...]]:
+        """Groups of near-duplicate question ids (singletons left out)."""
+
+        pairs = self.candidate_pairs()
+        a, b = pairs[:, 0], pairs[:, 1]
+        similar = (self.signatures[a] == self.signatures[b]).mean(axis=1) >= self.threshold
+        a, b = a[similar], b[similar]
+
+        # connected components: propagate the smallest index, with pointer jumping
+        label = np.arange(len(self.ids))
+        while True:
+            low = np.minimum(label[a], label[b])
+            new = label.copy()
+            np.minimum.at(new, a, low)
+            np.minimum.at(new, b, low)
+            new = new[new]
+            if np.array_equal(new, label):
+                break
+            label = new
+
+        order = np.argsort(label, kind="stable")
+        roots, starts, counts = np.unique(label[order], return_index=True, return_counts=True)
+        return [tuple(self.ids[i] for i in order[s:s + c])
+                for s, c in zip(starts.tolist(), counts.tolist()) if c > 1]
+
+    def related_ids(self) -> dict:
+        """``{question_id: ids of its cluster}`` for every clustered question."""
+        return {qid: cluster for cluster in self.clusters() for qid in cluster}
+
+    def similar(self, q, exclude_self: bool = True) -> list[tuple[str, float]]:
+        """Bank questions near-identical to *q* (which need not be in the bank)."""
+
+        sig = self._signatures([question_tokens(q)])
+        keys = self._band_keys(sig)[0]
+        candidates = np.flatnonzero((self.band_keys == keys).any(axis=1))
+        scores = (self.signatures[candidates] == sig[0]).mean(axis=1)
+        found = [(self.ids[i], float(s)) for i, s in zip(candidates, scores)
+                 if s >= self.threshold and not (exclude_self and self.ids[i] == q.get("id"))]
+        return sorted(found, key=lambda item: -item[1])
+
+
+def default_duplicates_path(source: str) -> str:
+    return os.path.splitext(source)[0] + ".duplicates.json"
+
+
+def load_duplicates(source: str = QUESTIONS_FILE, target: str | None = None,
+                    threshold: float = THRESHOLD, questions=None) -> dict:
+    """``{question_id: cluster ids}`` for *source*, from the cache when it is current."""
+
+    target = target or default_duplicates_path(source)
+    checksum = file_checksum(source)
+    try:
+        with open(target, "r", encoding="utf-8") as f_in:
+            cached = json.load(f_in)
+        if cached.get("checksum") == checksum and cached.get("threshold") == threshold:
+            return {qid: tuple(c) for c in cached["clusters"] for qid in c}
+    except (OSError, ValueError):
+        pass
+
+    clusters = NearDuplicateIndex(questions or load_questions(source), threshold).clusters()
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f_out:
+        json.dump({"checksum": checksum, "threshold": threshold, "clusters": clusters}, f_out)
+    os.replace(tmp, target)
+    return {qid: cluster for cluster in clusters for qid in cluster}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List near-duplicate question clusters")
+    parser.add_argument("questions", nargs="?", default=QUESTIONS_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    by_id = {q["id"]: q for q in questions}
+    clusters = NearDuplicateIndex(questions, args.threshold).clusters()
+    for cluster in sorted(clusters, key=len, reverse=True):
+        print(f"{len(cluster)} questions: {', '.join(cluster)}")
+        for qid in cluster:
+            q = by_id[qid]
+            print(f"  {qid:>6} {q['skill']} {q['seniority']} {q['level']}: "
+                  f"{q['question'][:70]!r}")
+    print(f"{len(clusters)} clusters, {sum(map(len, clusters))} of {len(questions)} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import streamlit as st
+
+from resources import get_bank, get_bank_reloader, require_admin
+
+st.set_page_config(page_title="Exposure stats", layout="wide")
+st.title("📈 Thống kê mức độ xuất hiện câu hỏi")
+require_admin()
+
+bank = get_bank()
+engine = bank.engine
+live = ", ".join(f"v{n}" for n in get_bank_reloader().live_versions())
+st.caption(f"Ngân hàng câu hỏi v{bank.number} · nạp lúc {bank.loaded_at:%H:%M:%S} · đang dùng: {live}")
+if engine.exposure is None:
+    st.info("Engine hiện tại không theo dõi mức độ xuất hiện (ngân hàng câu hỏi dạng shard).")
+    st.stop()
+stats = engine.exposure.stats()
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Tổng lượt hiển thị", stats["served"])
+col2.metric("Nhiều nhất / câu", stats["max"])
+col3.metric("Chưa từng hiển thị", stats["never_served"])
+
+rows = [
+    {
+        "id": q["id"],
+        "skill": q["skill"],
+        "level": engine.format_level_string(q["seniority"], q["level"]),
+        "served": count,
+    }
+    for q, count in zip(engine.questions, engine.exposure.counts)
+]
+skill = st.selectbox("Kỹ năng", ["all"] + list(engine.skill_ids), key="exposure_skill")
+if skill != "all":
+    rows = [r for r in rows if r["skill"] == skill]
+st.dataframe(sorted(rows, key=lambda r: -r["served"]), use_container_width=True)
+
+if st.button("💾 Ghi số liệu ra đĩa", key="exposure_flush"):
+    engine.exposure.flush()
+    st.success(f"Đã ghi {engine.exposure.path}")
@@ -0,0 +1,60 @@
+import time
+
+import streamlit as st
+
+from engine import AdaptiveTestingEngine
+from resources import get_render_cache, get_search_index, require_admin
+from search_index import FACETS
+
+PAGE_SIZE = 20
+FACET_LABELS = {"skill": "Kỹ năng", "category": "Nhóm", "seniority": "Seniority", "level": "Cấp độ"}
+
+st.set_page_config(page_title="Question search", layout="wide")
+st.title("🔎 Tìm kiếm câu hỏi")
+require_admin()  # the results show answer keys
+
+index = get_search_index()
+if index is None:
+    st.info("Tìm kiếm chưa hỗ trợ ngân hàng câu hỏi dạng shard.")
+    st.stop()
+
+query = st.text_input("Từ khoá (câu hỏi, code, đáp án)", key="search_query")
+filters = {field: st.session_state.get(f"search_{field}", "all") for field in FACETS}
+page = st.session_state.get("search_page", 1)
+
+active = {field: None if value == "all" else value for field, value in filters.items()}
+t0 = time.perf_counter()
+result = index.search(query, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE, **active)
+if page > 1 and not result.hits:  # the filters changed under a later page
+    page = st.session_state["search_page"] = 1
+    result = index.search(query, limit=PAGE_SIZE, **active)
+elapsed_ms = (time.perf_counter() - t0) * 1000
+
+# Facet counts come from the search itself, so the filters are drawn after it
+columns = st.columns(len(FACETS))
+for column, field in zip(columns, FACETS):
+    counts = result.facets[field]
+    column.selectbox(
+        FACET_LABELS[field],
+        ["all"] + index.facet_values[field],
+        key=f"search_{field}",
+        format_func=lambda v, counts=counts: v if v == "all" else f"{v} ({counts.get(v, 0)})",
+    )
+
+pages = max(1, -(-result.total // PAGE_SIZE))
+col1, col2 = st.columns([3, 1])
+col1.caption(f"{result.total} câu hỏi · {elapsed_ms:.2f} ms · {len(index)} câu trong ngân hàng")
+col2.number_input("Trang", min_value=1, max_value=pages, key="search_page")
+
+cache = get_render_cache()
+for q, score in result.hits:
+    level = AdaptiveTestingEngine.format_level_string(q["seniority"], q["level"])
+    title = f"#{q['id']} · {q['skill']} · {level} · {q.get('category', '')}"
+    with st.expander(f"{title} · {score:.2f}" if query.strip() else title):
+        for kind, lang, body in cache.get(q, 0).segments:
+            if kind == "code":
+                st.code(body, language=lang or None)
+            else:
+                st.markdown(body)
+        for opt in q["options"]:
+            st.markdown(f"{'✅' if opt['isAnswerKey'] else '▫️'} {opt['description']}")
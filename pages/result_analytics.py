@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+import streamlit as st
+
+from analytics import this_week
+from resources import get_aggregator, require_admin
+
+st.set_page_config(page_title="Result analytics", layout="wide")
+st.title("📊 Phân tích kết quả")
+require_admin()
+
+aggregator = get_aggregator()
+if st.button("🔄 Cập nhật", key="analytics_refresh"):
+    aggregator.refresh()
+
+skills = aggregator.skills()
+col1, col2, col3 = st.columns(3)
+skill = col1.selectbox("Kỹ năng", ["all"] + skills, key="analytics_skill")
+start = col2.selectbox("Cấp độ bắt đầu", ["all", "fresher", "junior", "middle", "senior"],
+                       key="analytics_start")
+period = col3.selectbox("Khoảng thời gian", ["Tuần này", "30 ngày", "Tất cả"], key="analytics_period")
+
+since = {"Tuần này": this_week(), "30 ngày": date.today() - timedelta(days=30)}.get(period)
+filters = dict(
+    skill=None if skill == "all" else skill,
+    start_seniority=None if start == "all" else start,
+    since=since,
+)
+
+dist = aggregator.level_distribution(**filters)
+st.metric("Số bài làm", sum(dist.values()))
+st.metric("Tỉ lệ trượt", f"{aggregator.failure_rate(**filters):.1%}")
+st.bar_chart(dist)
+
+st.subheader("Tỉ lệ trả lời đúng theo câu hỏi")
+stats = aggregator.question_stats(**filters)
+st.dataframe(
+    sorted(({"id": qid, **row} for qid, row in stats.items()), key=lambda r: r["p_correct"]),
+    use_container_width=True,
+)
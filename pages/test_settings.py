@@ -0,0 +1,18 @@
+import streamlit as st
+
+from resources import get_bank, get_settings, require_admin
+
+st.set_page_config(page_title="Test settings")
+st.title("⚙️ Cấu hình bài kiểm tra")
+require_admin()
+
+settings = get_settings()
+if get_bank().item_pool is None:
+    st.info("Chế độ CAT cần ngân hàng câu hỏi trong bộ nhớ (không dùng được với bản shard).")
+settings.cat_mode = st.toggle(
+    "Chế độ CAT (IRT – dừng sớm khi đủ chính xác)",
+    value=settings.cat_mode,
+    key="settings_cat_mode",
+    help="Áp dụng cho các bài kiểm tra bắt đầu sau khi thay đổi; khởi động lại sẽ về giá trị QUIZ_CAT_MODE.",
+)
+st.caption("Đang bật" if settings.cat_mode else "Đang tắt: dùng cây phân nhánh cố định")
@@ -0,0 +1,120 @@
+"""Ready-to-send question payloads, parsed once and cached.
+
+Question texts mix prose with fenced code blocks (```jsx ... ```).  Instead of
+handing the raw markdown to ``st.markdown`` on every rerun, each question is
+split once into prose and code segments (plus an HTML rendering for API
+clients).  Payloads for a served question — segments, options in the shown
+order, the public JSON view — are kept in a size-bounded LRU keyed by
+``(question_id, permutation code)``, so showing a question is a dict lookup.
+"""
+
+import html
+import re
+import threading
+from collections import OrderedDict
+
+from engine import AdaptiveTestingEngine
+
+_FENCE = re.compile(r"```([\w+-]*)[^\n]*\n(.*?)(?:```|\Z)", re.S)
+_INLINE_CODE = re.compile(r"`([^`\n]+)`")
+
+
+def split_fences(text: str) -> tuple:
+    """``(("text", "", prose), ("code", lang, source), ...)`` in order; empty prose dropped."""
+
+    segments = []
+    pos = 0
+    for m in _FENCE.finditer(text):
+        prose = text[pos:m.start()].strip()
+        if prose:
+            segments.append(("text", "", prose))
+        segments.append(("code", m.group(1), m.group(2).rstrip("\n")))
+        pos = m.end()
+    prose = text[pos:].strip()
+    if prose:
+        segments.append(("text", "", prose))
+    return tuple(segments)
+
+
+def inline_html(text: str) -> str:
+    return _INLINE_CODE.sub(r"<code>\1</code>", html.escape(text))
+
+
+def segments_html(segments) -> str:
+    out = []
+    for kind, lang, body in segments:
+        if kind == "code":
+            cls = f' class="language-{lang}"' if lang else ""
+            out.append(f"<pre><code{cls}>{html.escape(body)}</code></pre>")
+        else:
+            for para in re.split(r"\n\s*\n", body):
+                out.append("<p>" + inline_html(para).replace("\n", "<br>") + "</p>")
+    return "".join(out)
+
+
+class Payload:
+    """Everything needed to show one served question."""
+
+    __slots__ = ("segments", "options", "public")
+
+    def __init__(self, segments: tuple, options: tuple, public: dict):
+        self.segments = segments  # for st.markdown / st.code
+        self.options = options    # option labels in the shown order
+        self.public = public      # API view (no answer keys)
+
+
+class RenderCache:
+    """Parsed questions (one per id) plus an LRU of per-permutation payloads."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._parsed = {}               # question_id -> (segments, html)
+        self._payloads = OrderedDict()  # (question_id, perm_code) -> Payload
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, questions) -> "RenderCache":
+        """Parse every question up front (at load time)."""
+        for q in questions:
+            self._parse(q)
+        return self
+
+    def _parse(self, q) -> tuple:
+        parsed = self._parsed.get(q["id"])
+        if parsed is None:
+            segments = split_fences(q["question"])
+            parsed = self._parsed[q["id"]] = (segments, segments_html(segments))
+        return parsed
+
+    def get(self, q, perm_code: int) -> Payload:
+        """Payload for *q* as served (options already in the shown order)."""
+
+        key = (q["id"], perm_code)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        segments, question_html = self._parse(q)
+        options = tuple(opt["description"] for opt in q["options"])
+        payload = Payload(segments, options, {
+            "id": q["id"],
+            "skill": q["skill"],
+            "level": AdaptiveTestingEngine.format_level_string(q["seniority"], q["level"]),
+            "question": q["question"],
+            "question_html": question_html,
+            "options": list(options),
+            "options_html": [inline_html(text) for text in options],
+        })
+        with self._lock:
+            self._payloads[key] = payload
+            if len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        return payload
+
+    def __len__(self):
+        return len(self._payloads)
@@ -0,0 +1,132 @@
+"""Process-wide singletons shared by the main app and its pages.
+
+Kept out of *streamlit_app.py* so pages can import them without re-running
+the quiz script.
+"""
+
+import hmac
+import os
+
+import streamlit as st
+
+from analytics import ResultAggregator
+from cat import ItemPool
+from engine import QuestionSource
+from github_writer import GitHubResultWriter
+from hot_reload import BankReloader, BankVersion
+from metrics import start_http_server
+from render_cache import RenderCache
+from result_store import ResultStore
+from search_index import QuestionSearchIndex
+from sharded_bank import ShardedQuestionBank, ShardedTestingEngine
+
+
+@st.cache_resource
+def get_bank_reloader() -> BankReloader:
+    """Watches *merged_file.json* and swaps in a new bank version when it changes.
+
+    Set ``QUESTION_SHARDS`` to a directory built by *sharded_bank.py* to serve
+    a bank too large for memory from lazily loaded shards instead (no reload).
+    """
+    shard_dir = os.environ.get("QUESTION_SHARDS")
+    if shard_dir:
+        engine = ShardedTestingEngine(ShardedQuestionBank(shard_dir))
+        return BankReloader(None, version=BankVersion(1, None, engine))
+    return BankReloader().start()
+
+
+class QuizSettings:
+    """Test-delivery switches an admin sets on *pages/test_settings.py*.
+
+    Process-wide and not persisted: each restart starts from the environment
+    (``QUIZ_CAT_MODE=1`` turns CAT mode on).
+    """
+
+    __slots__ = ("cat_mode",)
+
+    def __init__(self):
+        self.cat_mode = os.environ.get("QUIZ_CAT_MODE", "") not in ("", "0")
+
+
+@st.cache_resource
+def get_settings() -> QuizSettings:
+    return QuizSettings()
+
+
+def get_bank() -> BankVersion:
+    """Newest bank version; a test session keeps the one it started on."""
+    return get_bank_reloader().current
+
+
+def get_engine() -> QuestionSource:
+    """Read-only engine of the newest version, shared by every browser session."""
+    return get_bank().engine
+
+
+def get_item_pool() -> ItemPool | None:
+    """IRT information tables for CAT mode (not available with a sharded bank)."""
+    return get_bank().item_pool
+
+
+def get_render_cache() -> RenderCache:
+    """Parsed question payloads of the newest version."""
+    return get_bank().render_cache
+
+
+def get_search_index() -> QuestionSearchIndex | None:
+    """Keyword index for the admin search page (not available with a sharded bank)."""
+    return get_bank().search_index()
+
+
+@st.cache_resource
+def get_github_writer() -> GitHubResultWriter:
+    """One background writer per process (requires secrets to be set)."""
+    return GitHubResultWriter(
+        owner=st.secrets.github_username,
+        repo=st.secrets.github_repo,
+        token=st.secrets.github_token,
+    ).start()
+
+
+@st.cache_resource
+def get_result_store() -> ResultStore:
+    """Append-only result log shared by every session in the process."""
+    return ResultStore()
+
+
+@st.cache_resource
+def get_metrics_server():
+    """Prometheus ``/metrics`` endpoint, started once when metrics are enabled."""
+    return start_http_server()
+
+
+@st.cache_resource
+def get_aggregator() -> ResultAggregator:
+    """Analytics counters tailing the shared result store."""
+    aggregator = ResultAggregator(get_result_store())
+    aggregator.refresh()
+    return aggregator.start()
+
+
+def require_admin():
+    """Stop the calling page unless this browser session entered the admin password.
+
+    Every file in *pages/* is listed in the sidebar for candidates too, so the
+    admin pages call this first.  The password is ``admin_password`` in
+    ``st.secrets``; without it the pages stay closed.
+    """
+    if st.session_state.get("is_admin"):
+        return
+    try:
+        password = st.secrets.get("admin_password")
+    except FileNotFoundError:
+        password = None
+    if not password:
+        st.error("Trang quản trị chưa được cấu hình (thiếu admin_password trong secrets).")
+        st.stop()
+    entered = st.text_input("🔑 Mật khẩu quản trị", type="password", key="admin_password_input")
+    if not hmac.compare_digest(entered.encode(), str(password).encode()):
+        if entered:
+            st.error("❌ Sai mật khẩu.")
+        st.stop()
+    st.session_state["is_admin"] = True
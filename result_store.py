@@ -0,0 +1,281 @@
+"""Append-only, segmented store for finished skill results.
+
+Each result is one compact JSON line appended to the active segment
+(``results/store/segment-000001.jsonl``).  Segments rotate once they reach
+``segment_max_bytes``, writes are flushed on every append but ``fsync``-ed in
+batches, and ``index.json`` records the sealed segments' sizes and counts.
+Readers stream records segment by segment and can resume from a position.
+
+Several processes may write the same store (the app, the API server,
+``bulk_grade``): every write holds an exclusive ``flock`` on the directory's
+``.lock`` file and picks up rotations and index changes made by the others
+before touching anything.  Without ``fcntl`` (Windows) only one process may
+write at a time.
+
+    python result_store.py import [results]   # load legacy per-file results
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer only
+    fcntl = None
+
+STORE_DIR = os.path.join("results", "store")
+SEGMENT_PATTERN = "segment-{:06d}.jsonl"
+
+
+def _segment_no(path: str) -> int:
+    return int(os.path.basename(path)[len("segment-"):-len(".jsonl")])
+
+
+class ResultStore:
+    """Thread- and process-safe appender plus streaming reader over one store directory."""
+
+    def __init__(self, directory: str = STORE_DIR, *, segment_max_bytes: int = 8 << 20,
+                 sync_every: int = 64, sync_interval: float = 1.0):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, ".lock"), "a")
+        self._index_stat = None
+        self.index = self._load_index()
+
+    # --------------------------------------------------------------------- #
+    # Layout helpers
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(number))
+
+    def segments(self) -> list[int]:
+        """Numbers of all segments on disk, oldest first."""
+        return sorted(_segment_no(p) for p in glob.glob(os.path.join(self.directory, "segment-*.jsonl")))
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f_in:
+                st = os.fstat(f_in.fileno())
+                self._index_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+                return json.load(f_in)
+        except FileNotFoundError:
+            return {"sealed": {}}
+
+    def _save_index(self):
+        tmp = self.index_path + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f_out:
+            json.dump(self.index, f_out)
+        os.replace(tmp, self.index_path)
+        st = os.stat(self.index_path)
+        self._index_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the thread lock and the directory lock, in sync with other writers."""
+
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                try:
+                    st = os.stat(self.index_path)
+                    if (st.st_ino, st.st_mtime_ns, st.st_size) != self._index_stat:
+                        self.index = self._load_index()
+                except FileNotFoundError:
+                    pass
+                # Another process sealed our segment and moved on to the next one
+                if self._file is not None and str(self._number) in self.index["sealed"]:
+                    self._file.close()
+                    self._file = None
+                elif self._file is not None:
+                    self._file.seek(0, os.SEEK_END)  # past what the others appended
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    # --------------------------------------------------------------------- #
+    # Writing
+
+    def _open_active(self):
+        numbers = self.segments()
+        number = numbers[-1] if numbers else 1
+        if str(number) in self.index["sealed"]:
+            number += 1
+        path = self.segment_path(number)
+        # Drop a torn last line left behind by a crash mid-write (live writers
+        # never leave one: they flush before giving up the directory lock)
+        if os.path.exists(path):
+            with open(path, "rb+") as f_fix:
+                data = f_fix.read()
+                if data and not data.endswith(b"\n"):
+                    f_fix.truncate(data.rfind(b"\n") + 1)
+        self._file = open(path, "ab")
+        self._number = number
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal(self):
+        self._sync()
+        path = self._file.name
+        self._file.close()
+        self._file = None
+        with open(path, "rb") as f_in:
+            records = sum(1 for _ in f_in)
+        self.index["sealed"][str(self._number)] = {"records": records, "bytes": os.path.getsize(path)}
+        self._save_index()
+
+    def _write(self, line: bytes):
+        """Write one line to the active segment, rotating first if it is full."""
+
+        if self._file is None:
+            self._open_active()
+        elif self._file.tell() + len(line) > self.segment_max_bytes and self._file.tell():
+            self._seal()
+            self._open_active()
+        self._file.write(line)
+
+    def append(self, record: dict) -> tuple[int, int]:
+        """Append one record; return its ``(segment, end_offset)`` position."""
+
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        with self._writing():
+            self._write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+            return self._number, self._file.tell()
+
+    def append_many(self, records) -> tuple[int, int]:
+        """Append a chunk of records under one lock with a single sync at the end."""
+
+        lines = [json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                 for r in records]
+        with self._writing():
+            for line in lines:
+                self._write(line)
+            self._sync()
+            return self._number, self._file.tell()
+
+    def flush(self):
+        """Force pending appends to stable storage."""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    # --------------------------------------------------------------------- #
+    # Reading
+
+    def scan(self, segment: int = 0, offset: int = 0, on_bad_line=None):
+        """Yield ``((segment, end_offset), record)`` from a position onwards.
+
+        Only complete lines are returned, so it is safe to call while another
+        thread or process is appending; resume with the last position seen.
+        A line that is not valid JSON raises, unless ``on_bad_line(position,
+        line)`` is given: then it is reported there and skipped.
+        """
+
+        for number in self.segments():
+            if number < segment:
+                continue
+            start = offset if number == segment else 0
+            with open(self.segment_path(number), "rb") as f_in:
+                f_in.seek(start)
+                pos = start
+                for line in f_in:
+                    if not line.endswith(b"\n"):
+                        break  # partially written, picked up next time
+                    pos += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        if on_bad_line is None:
+                            raise
+                        on_bad_line((number, pos), line)
+                        continue
+                    yield (number, pos), record
+
+    def iter_records(self):
+        for _, record in self.scan():
+            yield record
+
+
+###############################################################################
+# ---------------------------  LEGACY IMPORT  ------------------------------- #
+###############################################################################
+
+RESULT_KEYS = ("account", "skill", "final_result")
+
+
+def import_result_files(store: ResultStore, directory: str = "results") -> int:
+    """Append every legacy ``results/*.json`` file to *store*; return the count.
+
+    Files without the result keys (state files, exports) are skipped, and the
+    names of imported files are kept in the store index, so running the import
+    again only picks up new files.
+    """
+
+    count = 0
+    with store._writing():  # one writer decides what is new and records it
+        imported = store.index.setdefault("imported", [])
+        done = set(imported)
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            name = os.path.basename(path)
+            if name in done:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f_in:
+                    record = json.load(f_in)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or any(k not in record for k in RESULT_KEYS):
+                continue
+            # Files pushed to GitHub name the answers "history"
+            if "answer_history" not in record and "history" in record:
+                record["answer_history"] = record.pop("history")
+            record.setdefault("datetime", record.pop("timestamp", None))
+            store._write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n")
+            imported.append(name)
+            count += 1
+        if count:
+            store._sync()
+            store._save_index()
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        sys.exit("usage: python result_store.py import [results_dir]")
+    store = ResultStore()
+    n = import_result_files(store, sys.argv[2] if len(sys.argv) > 2 else "results")
+    store.close()
+    print(f"Imported {n} result files into {store.directory}")
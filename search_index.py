@@ -0,0 +1,240 @@
+"""Keyword search over the question bank for reviewers.
+
+``QuestionSearchIndex`` is built once from the engine's frozen questions: every
+question (text, code and option descriptions) is tokenized, and each token
+gets a posting list of question offsets with a precomputed BM25 weight, laid
+out as flat numpy arrays.  A query intersects the posting lists of its words
+(the last word also matches as a prefix, for search-as-you-type), sums their
+weights, and then works on facet *combinations* of (skill, category,
+seniority, level).  Questions are numbered grouped by combination, so every
+posting list is split into one run per combination: the facet counts of a
+match set are one ``searchsorted`` of the combination boundaries, and a filter
+keeps whole runs, without looking at the matches one by one.  Question
+records are only touched for the returned page.  Matches of recent queries are kept in a small LRU, so paging or
+changing filters does not re-run the intersection.
+
+    index = QuestionSearchIndex(engine.questions)
+    result = index.search("useEffect dependency", skill="react", level=3)
+    result.total, result.hits[0], result.facets["seniority"]
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+FACETS = ("skill", "category", "seniority", "level")
+K1 = 1.2
+B = 0.75
+MIN_PREFIX = 3       # shorter last words match whole terms only
+MAX_EXPANSIONS = 64  # a prefix covers at most this many terms (most frequent first)
+CACHED_QUERIES = 64
+
+_WORD = re.compile(r"\w+")
+
+
+def question_text(q) -> str:
+    return "\n".join([q["question"], *(opt["description"] for opt in q["options"])])
+
+
+def tokenize(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class SearchResult:
+    """One page of hits plus the total and per-facet counts of all matches."""
+
+    __slots__ = ("total", "hits", "facets")
+
+    def __init__(self, total: int, hits: list, facets: dict):
+        self.total = total
+        self.hits = hits      # [(question, score), ...] best first
+        self.facets = facets  # {field: {value: count}}, each ignoring its own filter
+
+
+class QuestionSearchIndex:
+    """Inverted index with BM25 ranking and faceted filters."""
+
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+        self._recent = OrderedDict()  # (words, prefix) -> (docs, scores)
+        self._lock = threading.Lock()
+        n = len(self.questions)
+
+        # facet value codes, folded into one combination id per question
+        self.facet_values = {}
+        codes = np.empty((n, len(FACETS)), np.int64)
+        for j, field in enumerate(FACETS):
+            column = [q.get(field) for q in self.questions]
+            values = sorted(set(column), key=lambda v: (v is None, str(v)))
+            code_of = {v: i for i, v in enumerate(values)}
+            self.facet_values[field] = values
+            codes[:, j] = np.fromiter(map(code_of.__getitem__, column), np.int64, n)
+        self._combo_codes, combo = np.unique(codes, axis=0, return_inverse=True)
+        self._combo_counts = np.bincount(combo.reshape(-1), minlength=len(self._combo_codes))
+        # "docs" are positions in combination-then-bank order; _offsets maps them back
+        self._combo_ptr = np.r_[0, np.cumsum(self._combo_counts)]
+        self._offsets = np.argsort(combo.reshape(-1), kind="stable").astype(np.int32)
+        doc_of = np.empty(n, np.int64)
+        doc_of[self._offsets] = np.arange(n)
+
+        # one flat token stream -> (term id, doc) pairs
+        token_lists = [tokenize(question_text(q)) for q in self.questions]
+        tokens = [t for tokens in token_lists for t in tokens]
+        vocab = dict.fromkeys(tokens)
+        self.terms = sorted(vocab)  # sorted for prefix lookups
+        vocab = {term: i for i, term in enumerate(self.terms)}
+        term_ids = np.fromiter(map(vocab.__getitem__, tokens), np.int64, len(tokens))
+        lengths = np.fromiter(map(len, token_lists), np.int64, n)
+        docs = np.repeat(doc_of, lengths)
+
+        # term frequencies, grouped by term then doc
+        pairs, tf = np.unique(term_ids * max(n, 1) + docs, return_counts=True)
+        post_terms, post_docs = pairs // max(n, 1), pairs % max(n, 1)
+        df = np.bincount(post_terms, minlength=len(self.terms))
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        avg_length = max(lengths.mean(), 1.0) if n else 1.0
+        norm = K1 * (1 - B + B * lengths[self._offsets] / avg_length)
+        self.weights = (idf[post_terms] * tf * (K1 + 1) / (tf + norm[post_docs])).astype(np.float32)
+        self.docs = post_docs.astype(np.int32)
+        self.term_ptr = np.r_[0, np.cumsum(df)]
+        self._vocab = vocab
+
+    def __len__(self):
+        return len(self.questions)
+
+    # --------------------------------------------------------------------- #
+    # Posting lists
+
+    def _postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        lo, hi = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+        return self.docs[lo:hi], self.weights[lo:hi]
+
+    def _prefix_postings(self, prefix: str) -> tuple[np.ndarray, np.ndarray]:
+        """Union of the postings of every term starting with *prefix* (best weight kept)."""
+
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\U0010ffff")
+        if hi - lo == 1:
+            return self._postings(lo)
+        if hi - lo > MAX_EXPANSIONS:
+            df = np.diff(self.term_ptr[lo:hi + 1])
+            term_ids = (lo + np.argpartition(-df, MAX_EXPANSIONS)[:MAX_EXPANSIONS]).tolist()
+            docs = np.concatenate([self._postings(t)[0] for t in term_ids])
+            weights = np.concatenate([self._postings(t)[1] for t in term_ids])
+        else:  # neighbouring terms: their postings are one slice
+            docs, weights = self.docs[self.term_ptr[lo]:self.term_ptr[hi]], \
+                self.weights[self.term_ptr[lo]:self.term_ptr[hi]]
+        best = np.zeros(len(self.questions), np.float32)
+        np.maximum.at(best, docs, weights)  # dense max-merge in one pass, no sort
+        docs = np.flatnonzero(best > 0).astype(np.int32)
+        return docs, best[docs]
+
+    def _match(self, words: tuple, prefix: bool) -> tuple[np.ndarray, np.ndarray]:
+        """Offsets containing every word, with their summed weights (LRU cached)."""
+
+        key = (words, prefix)
+        with self._lock:
+            found = self._recent.get(key)
+            if found is not None:
+                self._recent.move_to_end(key)
+                return found
+        found = self._intersect(words, prefix)
+        with self._lock:
+            self._recent[key] = found
+            if len(self._recent) > CACHED_QUERIES:
+                self._recent.popitem(last=False)
+        return found
+
+    def _intersect(self, words: tuple, prefix: bool) -> tuple[np.ndarray, np.ndarray]:
+        lists = []
+        for i, word in enumerate(words):
+            if prefix and i == len(words) - 1 and len(word) >= MIN_PREFIX:
+                lists.append(self._prefix_postings(word))
+            elif word in self._vocab:
+                lists.append(self._postings(self._vocab[word]))
+            else:
+                return self.docs[:0], self.weights[:0]
+        lists.sort(key=lambda p: len(p[0]))  # intersect starting from the rarest word
+        docs, scores = lists[0]
+        for other_docs, other_weights in lists[1:]:
+            if not len(docs):
+                break
+            pos = np.searchsorted(other_docs, docs).clip(max=len(other_docs) - 1)
+            hit = other_docs[pos] == docs
+            docs, scores = docs[hit], scores[hit] + other_weights[pos[hit]]
+        return docs, scores
+
+    # --------------------------------------------------------------------- #
+    # Public API
+
+    def search(self, query: str = "", *, limit: int = 20, offset: int = 0, prefix: bool = True,
+               **filters) -> SearchResult:
+        """Best matches for *query* among questions matching every filter.
+
+        Filters are facet fields (``skill="react"``, ``level=3``); ``None``
+        means any.  Equal scores rank in bank order, so pages never overlap.
+        An empty query lists the filtered questions in bank order.
+        """
+
+        unknown = set(filters) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown filter: {', '.join(sorted(unknown))}")
+        allowed = {}  # field -> which combinations pass that field's filter
+        for field, value in filters.items():
+            if value is not None:
+                values = self.facet_values[field]
+                code = values.index(value) if value in values else -1
+                allowed[field] = self._combo_codes[:, FACETS.index(field)] == code
+
+        words = tuple(tokenize(query))
+        if words:
+            docs, scores = self._match(words, prefix and not query[-1:].isspace())
+            counts = np.diff(np.searchsorted(docs, self._combo_ptr))
+        else:
+            docs, scores = None, None
+            counts = self._combo_counts
+
+        facets = {}
+        everything = np.ones(len(self._combo_codes), bool)
+        for j, field in enumerate(FACETS):
+            others = np.logical_and.reduce(
+                [mask for other, mask in allowed.items() if other != field] + [everything]
+            )
+            by_value = np.bincount(self._combo_codes[:, j], weights=counts * others,
+                                   minlength=len(self.facet_values[field]))
+            facets[field] = {v: int(c) for v, c in zip(self.facet_values[field], by_value) if c}
+
+        keep = np.logical_and.reduce(list(allowed.values()) + [everything])
+        end = offset + limit
+        if docs is None:  # no query: filtered questions in bank order
+            if not allowed:
+                total, page = len(self.questions), range(offset, min(end, len(self.questions)))
+            else:
+                # each kept combination is in bank order: its first `end` are enough
+                starts = self._combo_ptr[:-1][keep]
+                runs = [self._offsets[lo:lo + min(end, c)]
+                        for lo, c in zip(starts.tolist(), counts[keep].tolist())]
+                total = int(counts[keep].sum())
+                page = np.sort(np.concatenate(runs or [self._offsets[:0]]))[offset:end].tolist()
+            return SearchResult(total, [(self.questions[i], 0.0) for i in page], facets)
+
+        if allowed:
+            hit = np.repeat(keep, counts)
+            docs, scores = docs[hit], scores[hit]
+        if end < len(docs):  # only the first page needs sorting
+            cut = np.partition(scores, len(scores) - end)[len(scores) - end]
+            top, tied = np.flatnonzero(scores > cut), np.flatnonzero(scores == cut)
+            if len(top) + len(tied) > end:  # ties at the cut are taken in bank order
+                need = end - len(top)
+                tied = tied[np.argpartition(self._offsets[docs[tied]], need - 1)[:need]]
+            top = np.r_[top, tied]
+        else:
+            top = np.arange(len(docs))
+        offsets = self._offsets[docs[top]]
+        order = np.lexsort((offsets, -scores[top]))[offset:end]  # ties in bank order
+        hits = [(self.questions[i], round(float(s), 3))
+                for i, s in zip(offsets[order].tolist(), scores[top][order].tolist())]
+        return SearchResult(len(docs), hits, facets)
@@ -0,0 +1,215 @@
+"""Pluggable storage for encoded session state.
+
+Sessions are kept as the bytes produced by their ``encode`` method
+(``AdaptiveTestSession``, ``CatSession`` or ``MultiSkillSession``; the first
+byte tells them apart), so any replica holding the same question bank can
+pick a session up, and a restarted process resumes where it left off.  Backends only store opaque
+blobs with an idle TTL, plus a version number: ``put(key, blob, version)``
+only writes if the stored version is still *version* (0: create), so two
+replicas answering the same session cannot silently drop one answer.
+
+* ``MemoryBackend``  – dict in this process (single replica, tests)
+* ``SQLiteBackend``  – a local database file shared by processes on one host
+* ``RedisBackend``   – any redis-py compatible client (``get``/``set``/``delete``/``eval``)
+"""
+
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+
+from branching import DEFAULT_TREE, BranchingTree
+from cat import CAT_SESSION_FORMAT, CatSession, ItemPool
+from engine import AdaptiveTestSession, QuestionSource
+from multi_skill import MULTI_SESSION_FORMAT, MultiSkillSession
+
+
+class SessionNotFound(KeyError):
+    """No stored session under this id (never created, or expired)."""
+
+
+class SessionConflict(Exception):
+    """The session was saved by someone else since it was loaded."""
+
+
+###############################################################################
+# ------------------------------  BACKENDS  --------------------------------- #
+###############################################################################
+
+class MemoryBackend:
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._data = {}  # id -> (blob, last_write, version)
+        self._lock = threading.Lock()  # handlers run on a thread pool
+
+    def get(self, key: str) -> tuple[bytes, int] | None:
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic() - self.ttl:
+            return None
+        return entry[0], entry[2]
+
+    def put(self, key: str, blob: bytes, version: int = 0) -> int:
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[2] if entry is not None and entry[1] >= time.monotonic() - self.ttl else 0
+            if current != version:
+                raise SessionConflict(key)
+            self._data[key] = (blob, time.monotonic(), version + 1)
+        return version + 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def expire(self) -> int:
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            stale = [k for k, (_, ts) in self._data.items() if ts < cutoff]
+            for k in stale:
+                del self._data[k]
+        return len(stale)
+
+
+class SQLiteBackend:
+    def __init__(self, path: str = "results/sessions.sqlite3", ttl: float = 3600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions"
+            " (id TEXT PRIMARY KEY, data BLOB, updated REAL, version INTEGER NOT NULL DEFAULT 1)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:  # database from before versioning
+            self._db.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def get(self, key: str) -> tuple[bytes, int] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, version FROM sessions WHERE id = ? AND updated >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, blob: bytes, version: int = 0) -> int:
+        with self._lock:
+            if version == 0:
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO sessions (id, data, updated, version) VALUES (?, ?, ?, 1)",
+                    (key, blob, time.time()),
+                )
+            else:
+                cur = self._db.execute(
+                    "UPDATE sessions SET data = ?, updated = ?, version = version + 1"
+                    " WHERE id = ? AND version = ? AND updated >= ?",
+                    (blob, time.time(), key, version, time.time() - self.ttl),
+                )
+        if cur.rowcount != 1:
+            raise SessionConflict(key)
+        return version + 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (key,))
+
+    def expire(self) -> int:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+        return cur.rowcount
+
+
+_VERSION = struct.Struct("<Q")  # prefix of every Redis value
+
+# Compare the stored version prefix and replace the value in one step
+_REDIS_CAS = """
+local current = redis.call('GET', KEYS[1])
+if (current and string.sub(current, 1, 8) or ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+return 1
+"""
+
+
+class RedisBackend:
+    def __init__(self, client, prefix: str = "quiz:session:", ttl: float = 3600.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> tuple[bytes, int] | None:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return value[_VERSION.size:], _VERSION.unpack_from(value)[0]
+
+    def put(self, key: str, blob: bytes, version: int = 0) -> int:
+        absent = _VERSION.pack(0)
+        swapped = self.client.eval(_REDIS_CAS, 1, self.prefix + key, absent, _VERSION.pack(version),
+                                   _VERSION.pack(version + 1) + blob, int(self.ttl))
+        if not swapped:
+            raise SessionConflict(key)
+        return version + 1
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def expire(self) -> int:
+        return 0  # Redis drops keys on its own
+
+
+###############################################################################
+# -------------------------------  STORE  ----------------------------------- #
+###############################################################################
+
+class SessionStore:
+    """Create, load and save sessions (plus the candidate's account) by id.
+
+    ``load`` also returns the stored version; pass it back to ``save``, which
+    raises ``SessionConflict`` if the session was saved elsewhere meanwhile.
+    """
+
+    def __init__(self, engine: QuestionSource, backend=None,
+                 tree: BranchingTree = DEFAULT_TREE, pool: ItemPool | None = None):
+        self.engine = engine
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.tree = tree
+        self.pool = pool  # needed to load CAT sessions
+
+    @staticmethod
+    def _pack(session: AdaptiveTestSession, account: str) -> bytes:
+        raw = account.encode()[:255]
+        return bytes((len(raw),)) + raw + session.encode()
+
+    def create(self, session: AdaptiveTestSession, account: str = "") -> str:
+        session_id = uuid.uuid4().hex
+        self.save(session_id, session, account)
+        return session_id
+
+    def save(self, session_id: str, session: AdaptiveTestSession, account: str = "",
+             version: int = 0) -> int:
+        """Store *session* if it is still at *version* (0: new); return the new version."""
+        return self.backend.put(session_id, self._pack(session, account), version)
+
+    def load(self, session_id: str) -> tuple[AdaptiveTestSession, str, int]:
+        entry = self.backend.get(session_id)
+        if entry is None:
+            raise SessionNotFound(session_id)
+        blob, version = entry
+        n = blob[0]
+        account = blob[1:1 + n].decode(errors="ignore")
+        data = blob[1 + n:]
+        if data[0] == CAT_SESSION_FORMAT:
+            if self.pool is None:
+                raise ValueError("CAT session stored but no item pool configured")
+            return CatSession.decode(data, self.pool), account, version
+        if data[0] == MULTI_SESSION_FORMAT:
+            return MultiSkillSession.decode(data, self.engine, tree=self.tree), account, version
+        return AdaptiveTestSession.decode(data, self.engine, tree=self.tree), account, version
+
+    def delete(self, session_id: str):
+        self.backend.delete(session_id)
+
+    def expire(self) -> int:
+        return self.backend.expire()
@@ -0,0 +1,201 @@
+"""Per-skill/per-seniority shards for banks too large to keep in memory.
+
+``build_shards`` streams ``merged_file.json`` one question at a time (the
+array is never loaded whole) and appends each record to
+``<shard_dir>/<skill>/<seniority>.jsonl``; ``manifest.json`` lists the shards
+and their per-level counts.  ``ShardedQuestionBank`` loads a shard the first
+time one of its buckets is asked for and keeps only the ``max_shards`` most
+recently used ones, so resident memory follows the skills in use rather than
+the size of the bank.
+
+    python sharded_bank.py [merged_file.json] [bank_shards]
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+from collections import OrderedDict
+
+from engine import MAX_REJECTIONS, QUESTIONS_FILE, QuestionSource, freeze_question
+
+SHARD_DIR = "bank_shards"
+_NUMBER_TAIL = "0123456789.eE+-"
+
+
+###############################################################################
+# ---------------------------  STREAMING INGEST  ---------------------------- #
+###############################################################################
+
+def iter_json_array(f_in, chunk_size: int = 1 << 16):
+    """Yield the elements of a top-level JSON array read from text stream *f_in*."""
+
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def skip_ws(i):
+        while i < len(buf) and buf[i] in " \t\r\n":
+            i += 1
+        return i
+
+    def refill():
+        nonlocal buf, pos, eof
+        more = f_in.read(chunk_size)
+        if not more:
+            eof = True
+        buf, pos = buf[pos:] + more, 0
+
+    seen_open = False
+    while True:
+        pos = skip_ws(pos)
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Truncated JSON array")
+            refill()
+            continue
+        ch = buf[pos]
+        if not seen_open:
+            if ch != "[":
+                raise ValueError("Expected a JSON array")
+            seen_open = True
+            pos += 1
+            continue
+        if ch == "]":
+            return
+        if ch == ",":
+            pos += 1
+            continue
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        # A number that ends the buffer may be cut short, even right after
+        # "." or "e" ("2." then "5e3"): read on until a delimiter follows it
+        after = skip_ws(end)
+        if not eof and (after == len(buf) or not buf[end:].strip(_NUMBER_TAIL)):
+            refill()
+            continue
+        if after < len(buf) and buf[after] not in ",]":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buf, after)
+        yield value
+        pos = end
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def build_shards(source: str = QUESTIONS_FILE, shard_dir: str = SHARD_DIR) -> dict:
+    """Split *source* into JSON Lines shards and write ``manifest.json``."""
+
+    handles = {}
+    manifest = {"skills": [], "shards": {}}
+    try:
+        with open(source, "r", encoding="utf-8") as f_in:
+            for q in iter_json_array(f_in):
+                key = f"{q['skill']}/{q['seniority']}"
+                if key not in handles:
+                    os.makedirs(os.path.join(shard_dir, q["skill"]), exist_ok=True)
+                    handles[key] = open(os.path.join(shard_dir, f"{key}.jsonl"), "w", encoding="utf-8")
+                    manifest["shards"][key] = {"count": 0, "levels": {}}
+                    if q["skill"] not in manifest["skills"]:
+                        manifest["skills"].append(q["skill"])
+                handles[key].write(json.dumps(q, ensure_ascii=False) + "\n")
+                info = manifest["shards"][key]
+                info["count"] += 1
+                info["levels"][str(q["level"])] = info["levels"].get(str(q["level"]), 0) + 1
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    with open(os.path.join(shard_dir, "manifest.json"), "w", encoding="utf-8") as f_out:
+        json.dump(manifest, f_out, ensure_ascii=False, indent=2)
+    return manifest
+
+
+###############################################################################
+# ---------------------------  LAZY SHARD CACHE  ---------------------------- #
+###############################################################################
+
+class ShardedQuestionBank:
+    """LRU cache of shards, each a ``{level: tuple(frozen questions)}`` dict."""
+
+    def __init__(self, shard_dir: str = SHARD_DIR, max_shards: int = 32):
+        self.shard_dir = shard_dir
+        self.max_shards = max_shards
+        with open(os.path.join(shard_dir, "manifest.json"), "r", encoding="utf-8") as f_in:
+            self.manifest = json.load(f_in)
+        self.skills = self.manifest["skills"]
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def _load(self, key: str) -> dict:
+        levels = {}
+        with open(os.path.join(self.shard_dir, f"{key}.jsonl"), "r", encoding="utf-8") as f_in:
+            for line in f_in:
+                q = freeze_question(json.loads(line))
+                levels.setdefault(q["level"], []).append(q)
+        return {level: tuple(qs) for level, qs in levels.items()}
+
+    def shard(self, skill: str, seniority: str) -> dict:
+        key = f"{skill}/{seniority}"
+        with self._lock:
+            shard = self._cache.get(key)
+            if shard is not None:
+                self._cache.move_to_end(key)
+                return shard
+            if key not in self.manifest["shards"]:
+                return {}
+            shard = self._cache[key] = self._load(key)
+            self.loads += 1
+            while len(self._cache) > self.max_shards:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+            return shard
+
+    def resident(self) -> list[str]:
+        """Keys of the shards currently in memory, least recently used first."""
+        return list(self._cache)
+
+
+class ShardedTestingEngine(QuestionSource):
+    """Serves test sessions from a sharded bank.
+
+    It implements only the session-facing ``QuestionSource`` interface: there
+    is no global question tuple or offset index, so offset-based tools
+    (exposure tracking, ``simulate_batch``, the CAT pool, search, bulk
+    grading) take an ``AdaptiveTestingEngine`` instead.
+    """
+
+    def __init__(self, bank: ShardedQuestionBank):
+        self.bank = bank
+        self.skill_ids = {skill: i for i, skill in enumerate(bank.skills)}
+
+    def find_question(self, skill: str, seniority: str, level: int, question_id: str):
+        for q in self.bank.shard(skill, seniority).get(level, ()):
+            if q["id"] == question_id:
+                return q
+        raise KeyError(question_id)
+
+    def get_question(self, skill: str, seniority: str, level: int,
+                     exclude=frozenset(), rng: random.Random = random, record: bool = True):
+        pool = self.bank.shard(skill, seniority).get(level)
+        if not pool:
+            return None
+        for _ in range(MAX_REJECTIONS):
+            q = pool[rng.randrange(len(pool))]
+            if q["id"] not in exclude:
+                return q
+        fresh = [q for q in pool if q["id"] not in exclude]
+        return rng.choice(fresh or pool)
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else QUESTIONS_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else SHARD_DIR
+    info = build_shards(src, dst)
+    print(f"Wrote {len(info['shards'])} shards for {len(info['skills'])} skills to {dst}")
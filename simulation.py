@@ -0,0 +1,94 @@
+"""Vectorised candidate simulation for calibrating the question bank.
+
+Instead of driving one ``AdaptiveTestSession`` per synthetic candidate, the
+whole cohort walks the compiled branching tree together: every step is a
+handful of NumPy gathers over arrays of state ids.
+"""
+
+import numpy as np
+
+from branching import DEFAULT_TREE, SENIORITY_CODES, BranchingTree
+from engine import AdaptiveTestingEngine
+
+SENIORITIES = list(SENIORITY_CODES.values())  # fresher, junior, middle, senior
+LEVELS = 5
+NO_QUESTION = "NO_QUESTION_AVAILABLE"
+
+
+def _bucket_index(seniority: str, level: int) -> int:
+    return SENIORITIES.index(seniority) * LEVELS + (level - 1)
+
+
+def simulate_batch(skill: str, start_seniority: str, ability_matrix, *,
+                   engine: AdaptiveTestingEngine, tree: BranchingTree = DEFAULT_TREE,
+                   seed=None) -> dict:
+    """Run ``len(ability_matrix)`` candidates through one skill test.
+
+    ``ability_matrix[i, b]`` is the probability that candidate *i* answers a
+    question from bucket *b* correctly, buckets ordered seniority-major
+    (F1..F5, J1..J5, M1..M5, S1..S5); shape ``(N, 20)`` or ``(N, 4, 5)``.
+    Questions are drawn uniformly from each bucket, like ``get_question``
+    for a candidate who has not seen the bucket before.
+
+    Returns ``{"results": {label: count}, "failed": int,
+    "exposure": {question_id: count}}``.
+    """
+
+    if start_seniority not in tree.start_state:
+        raise ValueError(f"Invalid seniority: {start_seniority}")
+    ability = np.asarray(ability_matrix)
+    n = ability.shape[0]
+    ability = ability.reshape(n, len(SENIORITIES) * LEVELS)
+    rng = np.random.default_rng(seed)
+
+    # Flatten this skill's buckets into one array of questions
+    question_ids = []
+    bucket_offset = np.zeros(len(SENIORITIES) * LEVELS, dtype=np.int64)
+    bucket_size = np.zeros(len(SENIORITIES) * LEVELS, dtype=np.int64)
+    for seniority in SENIORITIES:
+        for level in range(1, LEVELS + 1):
+            b = _bucket_index(seniority, level)
+            pool = engine.bucket(skill, seniority, level)
+            bucket_offset[b] = len(question_ids)
+            bucket_size[b] = len(pool)
+            question_ids.extend(engine.questions[offset]["id"] for offset in pool)
+
+    next_state = np.asarray(tree.next_state, dtype=np.int64)
+    state_bucket = np.array(
+        [_bucket_index(s, lvl) for s, lvl in zip(tree.state_seniority, tree.state_level)],
+        dtype=np.int64,
+    )
+    no_question = len(tree.results)  # extra result slot
+
+    state = np.full(n, tree.start_state[start_seniority], dtype=np.int64)
+    active = np.arange(n)
+    result = np.full(n, -1, dtype=np.int64)
+    exposure = np.zeros(len(question_ids), dtype=np.int64)
+
+    for _ in range(tree.n_states):  # a tree can't be deeper than its state count
+        if active.size == 0:
+            break
+        bucket = state_bucket[state]
+        size = bucket_size[bucket]
+        empty = size == 0
+        if empty.any():
+            result[active[empty]] = no_question
+            active, state, bucket, size = active[~empty], state[~empty], bucket[~empty], size[~empty]
+
+        drawn = bucket_offset[bucket] + (rng.random(active.size) * size).astype(np.int64)
+        exposure += np.bincount(drawn, minlength=exposure.size)
+
+        correct = rng.random(active.size) < ability[active, bucket]
+        state = next_state[2 * state + correct]
+        done = state < 0
+        result[active[done]] = ~state[done]
+        active, state = active[~done], state[~done]
+
+    labels = list(tree.results) + [NO_QUESTION]
+    failed_flags = list(tree.result_failed) + [True]
+    counts = np.bincount(result[result >= 0], minlength=len(labels))
+    return {
+        "results": {label: int(c) for label, c in zip(labels, counts) if c},
+        "failed": int(sum(c for c, f in zip(counts, failed_flags) if f)),
+        "exposure": {qid: int(c) for qid, c in zip(question_ids, exposure)},
+    }
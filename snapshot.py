@@ -0,0 +1,93 @@
+"""Prebuilt binary snapshot of the question bank for fast cold starts.
+
+``merged_file.json`` is parsed, frozen and indexed once, then pickled to
+``merged_file.snapshot`` together with the SHA-256 of the JSON it came from.
+Pickle's memo stores each interned string (skills, seniorities, option keys)
+only once, and records unpickle straight into read-only mapping proxies, so
+loading skips both JSON parsing and bucket grouping.  A stale or missing
+snapshot is rebuilt automatically on load.
+
+    python snapshot.py [merged_file.json] [merged_file.snapshot]
+"""
+
+import copyreg
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+from types import MappingProxyType
+
+from engine import QUESTIONS_FILE, build_index, freeze_question
+
+SNAPSHOT_FORMAT = 1
+
+
+def default_snapshot_path(source: str) -> str:
+    return os.path.splitext(source)[0] + ".snapshot"
+
+
+def file_checksum(path: str) -> str:
+    with open(path, "rb") as f_in:
+        return hashlib.sha256(f_in.read()).hexdigest()
+
+
+def _proxy(mapping: dict) -> MappingProxyType:
+    return MappingProxyType(mapping)
+
+
+def _reduce_proxy(proxy):
+    # mappingproxy has no importable name, so pickle a module-level factory
+    return _proxy, (dict(proxy),)
+
+
+def build_snapshot(source: str = QUESTIONS_FILE, target: str | None = None) -> dict:
+    """Compile *source* into a snapshot file and return its payload."""
+
+    target = target or default_snapshot_path(source)
+    with open(source, "rb") as f_in:
+        raw = f_in.read()
+    questions = tuple(freeze_question(q) for q in json.loads(raw))
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "checksum": hashlib.sha256(raw).hexdigest(),
+        "questions": questions,
+        "index": build_index(questions),
+    }
+
+    buf = io.BytesIO()
+    pickler = pickle.Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[MappingProxyType] = _reduce_proxy
+    pickler.dump(payload)
+
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f_out:
+        f_out.write(buf.getvalue())
+    os.replace(tmp, target)
+    return payload
+
+
+def load_snapshot(source: str = QUESTIONS_FILE, target: str | None = None) -> tuple:
+    """Return ``(questions, index)``, rebuilding the snapshot if it is stale."""
+
+    target = target or default_snapshot_path(source)
+    checksum = file_checksum(source)
+    try:
+        with open(target, "rb") as f_in:
+            payload = pickle.load(f_in)
+        if payload.get("format") != SNAPSHOT_FORMAT or payload.get("checksum") != checksum:
+            payload = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        payload = None
+    if payload is None:
+        payload = build_snapshot(source, target)
+    return payload["questions"], payload["index"]
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else QUESTIONS_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else default_snapshot_path(src)
+    data = build_snapshot(src, dst)
+    print(f"Wrote {dst}: {len(data['questions'])} questions, {os.path.getsize(dst)} bytes")
@@ -1,17 +1,25 @@
 import streamlit as st
-import json
-import random
 from datetime import datetime, timedelta, timezone
-import os
-import requests
-import base64
+
+from cat import CatSession
+from engine import AdaptiveTestingEngine, AdaptiveTestSession
+from metrics import METRICS
+from multi_skill import RELATED_SKILLS, start_from_results
+from resources import (
+    get_bank,
+    get_github_writer,
+    get_metrics_server,
+    get_result_store,
+    get_settings,
+)
 
 ###############################################################################
 # -------------------------------  HELPERS  --------------------------------- #
 ###############################################################################
 
-def save_to_github(account: str, skill: str, final_result: str, history: list, failed: bool):
-    """Push one result file to GitHub (requires secrets to be set)."""
+def save_to_github(account: str, skill: str, final_result: str, history: list, failed: bool,
+                   seniority: str = ""):
+    """Queue one result file for GitHub; the commit happens in the background."""
 
     now_utc = datetime.now(timezone.utc)
     hanoi_time = now_utc.astimezone(timezone(timedelta(hours=7)))
@@ -27,564 +35,29 @@ def save_to_github(account: str, skill: str, final_result: str, history: list, f
         "timestamp": datetime.now().isoformat(),
     }
 
-    content_str = json.dumps(file_content, indent=2, ensure_ascii=False)
-    content_b64 = base64.b64encode(content_str.encode()).decode()
-
-    url = (
-        f"https://api.github.com/repos/{st.secrets.github_username}/"
-        f"{st.secrets.github_repo}/contents/{file_path}"
-    )
-
-    headers = {
-        "Authorization": f"Bearer {st.secrets.github_token}",
-        "Accept": "application/vnd.github.v3+json",
-    }
-
-    payload = {"message": f"Add {skill} result for {account}", "content": content_b64}
-    res = requests.put(url, headers=headers, json=payload)
+    # Only the outbox write happens here; "remote_save" is recorded by the
+    # writer once the commit has landed on GitHub.
+    with METRICS.span("outbox_write", skill, seniority):
+        get_github_writer().submit(file_path, file_content, skill, seniority)
+    st.success(f"📤 Đã xếp kết quả *{skill}* vào hàng đợi gửi lên GitHub (results/{filename})")
 
-    if res.status_code in (200, 201):
-        st.success(f"💾 Đã lưu kết quả *{skill}* tại results/{filename}")
-    else:
-        st.error(f"❌ Không thể lưu kết quả *{skill}* lên GitHub. Chi tiết: {res.text}")
-
-
-def save_result_to_file(account: str, skill: str, result: dict) -> str:
-    """Save result JSON to local *results/* folder and return the filepath."""
 
-    os.makedirs("results", exist_ok=True)
-    clean_account = account.strip().replace(" ", "_").lower()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{clean_account}_{skill}_{timestamp}.json"
-    filepath = os.path.join("results", filename)
+def save_result_to_file(account: str, skill: str, result: dict, seniority: str = "") -> str:
+    """Append result to the local *results/store* log and return the segment path."""
 
-    with open(filepath, "w", encoding="utf-8") as f_out:
-        json.dump(result, f_out, indent=2, ensure_ascii=False)
+    with METRICS.span("local_save", skill, seniority):
+        segment, _ = get_result_store().append(result)
+    return get_result_store().segment_path(segment)
 
-    return filepath
-
-
-###############################################################################
-# ------------------------------  ENGINE  ----------------------------------- #
-###############################################################################
-
-class AdaptiveTestingEngine:
-    """Holds all questions and returns one at random for a given skill/level."""
-
-    def __init__(self, questions_data):
-        self.questions_by_key = {}
-        for q in questions_data:
-            key = f"{q['skill']}_{q['seniority']}_{q['level']}"
-            self.questions_by_key.setdefault(key, []).append(q)
-
-    def get_question(self, skill: str, seniority: str, level: int):
-        key = f"{skill}_{seniority}_{level}"
-        pool = self.questions_by_key.get(key, [])
-        return random.choice(pool) if pool else None
-
-    @staticmethod
-    def format_level_string(seniority: str, level: int):
-        reverse_map = {"fresher": "F", "junior": "J", "middle": "M", "senior": "S"}
-        return f"{reverse_map.get(seniority, '?')}{level}"
-
-
-class AdaptiveTestSession:
-    """Tracks state for a *single* skill run (max five questions)."""
-
-    def __init__(self, engine: AdaptiveTestingEngine, skill: str, start_seniority="middle"):
-        self.engine = engine
-        self.skill = skill
-        self.starting_seniority = start_seniority
-        self.current_seniority = start_seniority
-        self.current_level = 3  # Always start at level 3
-        self.answer_history = []
-        self.question_history = []
-        self.is_finished = False
-        self.final_result: str | None = None
-        self.failed = False
-        self.path_state = "initial"
-
-    # --------------------------------------------------------------------- #
-    # Core helpers
-
-    def _finish_test(self, label: str, failed: bool = False):
-        self.is_finished = True
-        self.final_result = label
-        self.failed = failed
-
-    def _get_result(self):
-        return {
-            "is_finished": self.is_finished,
-            "final_result": self.final_result,
-            "failed": self.failed,
-            "answer_history": self.answer_history[-1] if self.answer_history else {},
-        }
-
-    # --------------------------------------------------------------------- #
-    # Public API used by Streamlit app
-
-    def get_next_question(self):
-        if self.is_finished:
-            return None
-        q = self.engine.get_question(self.skill, self.current_seniority, self.current_level)
-        if q is None:
-            # No question available → abort gracefully
-            self._finish_test("NO_QUESTION_AVAILABLE", failed=True)
-            return None
-
-        shuffled_q = q.copy()
-        shuffled_options = q["options"].copy()
-        random.shuffle(shuffled_options)
-        shuffled_q["options"] = shuffled_options
-        self.question_history.append(shuffled_q)
-        return shuffled_q
-
-    def submit_answer(self, selected_idx: int):
-        if self.is_finished or not self.question_history:
-            return {"error": "No active question"}
-
-        question = self.question_history[-1]
-        correct = question["options"][selected_idx]["isAnswerKey"]
-
-        self.answer_history.append(
-            {
-                "question_id": question["id"],
-                "selected_index": selected_idx,
-                "is_correct": correct,
-            }
-        )
-
-        # Dispatch to the correct branching algorithm
-        if self.starting_seniority == "fresher":
-            return self._update_state_after_answer_fresher(correct)
-        if self.starting_seniority == "junior":
-            return self._update_state_after_answer_junior(correct)
-        if self.starting_seniority == "middle":
-            return self._update_state_after_answer_middle(correct)
-        if self.starting_seniority == "senior":
-            return self._update_state_after_answer_senior(correct)
-        return {"error": "Invalid seniority"}
-
-    def _update_state_after_answer_middle(self, is_correct):
-
-        if len(self.answer_history) == 1:
-            if is_correct:
-                self.current_seniority = 'middle'
-                self.current_level = 5
-                self.path_state = 'M5'
-            else:
-                self.current_seniority = 'middle'
-                self.current_level = 1
-                self.path_state = 'M1'
-
-        # Q2 – M5 hoặc M1
-        elif len(self.answer_history) == 2:
-            if self.path_state == 'M5':
-                if is_correct:
-                    self.current_seniority = 'senior'
-                    self.current_level = 3
-                    self.path_state = 'S3'
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 4
-                    self.path_state = 'M4'
-            elif self.path_state == 'M1':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 2
-                    self.path_state = 'M2'
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 3
-                    self.path_state = 'J3'
-
-        # Q3 – M2 / M4 / S3 / J3
-        elif len(self.answer_history) == 3:
-            if self.path_state == 'M2':
-                if is_correct:
-                    self._finish_test("LEVELM2")
-                else:
-                    self._finish_test("LEVELM1")
-                return self._get_result()
-            elif self.path_state == 'M4':
-                if is_correct:
-                    self._finish_test("LEVELM4")
-                else:
-                    self._finish_test("LEVELM3")
-                return self._get_result()
-            elif self.path_state == 'S3':
-                if is_correct:
-                    self.current_seniority = 'senior'
-                    self.current_level = 5
-                    self.path_state = 'S5'
-                else:
-                    self.current_seniority = 'senior'
-                    self.current_level = 1
-                    self.path_state = 'S1'
-            elif self.path_state == 'J3':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 5
-                    self.path_state = 'J5'
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 1
-                    self.path_state = 'J1'
-
-        # Q4 – S5 / S1 / J5 / J1
-        elif len(self.answer_history) == 4:
-            if self.path_state == 'S5':
-                if is_correct:
-                    self._finish_test("LEVELS5")
-                else:
-                    self.current_seniority = 'senior'
-                    self.current_level = 4
-                    self.path_state = 'S4'
-            elif self.path_state == 'S1':
-                if is_correct:
-                    self.current_seniority = 'senior'
-                    self.current_level = 2
-                    self.path_state = 'S2'
-                else:
-                    self._finish_test("LEVELM5")
-                return self._get_result()
-            elif self.path_state == 'J5':
-                if is_correct:
-                    self._finish_test("LEVELJ5")
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 4
-                    self.path_state = 'J4'
-            elif self.path_state == 'J1':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 2
-                    self.path_state = 'J2'
-                else:
-                    self._finish_test("LEVELJ0", failed=True)
-                return self._get_result()
-
-        # Q5 – S4 / S2 / J4 / J2
-        elif len(self.answer_history) == 5:
-            if self.path_state == 'S4':
-                if is_correct:
-                    self._finish_test("LEVELS4")
-                else:
-                    self._finish_test("LEVELS3")
-            elif self.path_state == 'S2':
-                if is_correct:
-                    self._finish_test("LEVELS2")
-                else:
-                    self._finish_test("LEVELS1")
-            elif self.path_state == 'J4':
-                if is_correct:
-                    self._finish_test("LEVELJ4")
-                else:
-                    self._finish_test("LEVELJ3")
-            elif self.path_state == 'J2':
-                if is_correct:
-                    self._finish_test("LEVELJ2")
-                else:
-                    self._finish_test("LEVELJ1")
-
-        return self._get_result()
-
-
-    def _update_state_after_answer_senior(self, is_correct):
-        """
-        Cập nhật trạng thái bài test sau mỗi câu trả lời,
-        theo cây nhánh: bắt đầu từ S3, rồi xuống S1, rồi M3 nếu cần.
-        """
-        if len(self.answer_history) == 1:  # Q1: S3
-            if is_correct:
-                self.current_seniority = 'senior'
-                self.current_level = 5
-                self.path_state = 'S5'
-            else:
-                self.current_seniority = 'senior'
-                self.current_level = 1
-                self.path_state = 'S1'
-
-        elif len(self.answer_history) == 2:
-            if self.path_state == 'S5':
-                if is_correct:
-                    self._finish_test("LEVELS5")
-                else:
-                    self.current_seniority = 'senior'
-                    self.current_level = 4
-                    self.path_state = 'S4'
-            elif self.path_state == 'S1':
-                if is_correct:
-                    self.current_seniority = 'senior'
-                    self.current_level = 2
-                    self.path_state = 'S2'
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 3
-                    self.path_state = 'M3'
-
-        elif len(self.answer_history) == 3:
-            if self.path_state == 'S4':
-                if is_correct:
-                    self._finish_test("LEVELS4")
-                else:
-                    self._finish_test("LEVELS3")
-                return self._get_result()
-            elif self.path_state == 'S2':
-                if is_correct:
-                    self._finish_test("LEVELS2")
-                else:
-                    self._finish_test("LEVELS1")
-                return self._get_result()
-            elif self.path_state == 'M3':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 5
-                    self.path_state = 'M5'
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 1
-                    self.path_state = 'M1'
-
-        elif len(self.answer_history) == 4:
-            if self.path_state == 'M5':
-                if is_correct:
-                    self._finish_test("LEVELM5")
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 4
-                    self.path_state = 'M4'
-            elif self.path_state == 'M1':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 2
-                    self.path_state = 'M2'
-                else:
-                    self._finish_test("LEVELM0", failed=True)
-
-        elif len(self.answer_history) == 5:
-            if self.path_state == 'M4':
-                if is_correct:
-                    self._finish_test("LEVELM4")
-                else:
-                    self._finish_test("LEVELM3")
-            elif self.path_state == 'M2':
-                if is_correct:
-                    self._finish_test("LEVELM2")
-                else:
-                    self._finish_test("LEVELM1")
-
-        return self._get_result()
-
-
-    def _update_state_after_answer_fresher(self, is_correct):
-        if len(self.answer_history) == 1:  # Q1: F3
-            if is_correct:
-                self.current_seniority = 'fresher'
-                self.current_level = 5
-                self.path_state = 'F5'
-            else:
-                self.current_seniority = 'fresher'
-                self.current_level = 1
-                self.path_state = 'F1'
-
-        elif len(self.answer_history) == 2:
-            if self.path_state == 'F5':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 3
-                    self.path_state = 'J3'
-                else:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 4
-                    self.path_state = 'F4'
-            elif self.path_state == 'F1':
-                if is_correct:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 2
-                    self.path_state = 'F2'
-                else:
-                    self._finish_test("LEVELF0", failed=True)
-                    return self._get_result()
-
-        elif len(self.answer_history) == 3:
-            if self.path_state == 'F4':
-                if is_correct:
-                    self._finish_test("LEVELF4")
-                else:
-                    self._finish_test("LEVELF3")
-                return self._get_result()
-            elif self.path_state == 'F2':
-                if is_correct:
-                    self._finish_test("LEVELF2")
-                else:
-                    self._finish_test("LEVELF1")
-                return self._get_result()
-            elif self.path_state == 'J3':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 5
-                    self.path_state = 'J5'
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 1
-                    self.path_state = 'J1'
-
-        elif len(self.answer_history) == 4:
-            if self.path_state == 'J5':
-                if is_correct:
-                    self._finish_test("LEVELJ5")
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 4
-                    self.path_state = 'J4'
-            elif self.path_state == 'J1':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 2
-                    self.path_state = 'J2'
-                else:
-                    self._finish_test("LEVELF5")
-
-        elif len(self.answer_history) == 5:
-            if self.path_state == 'J4':
-                if is_correct:
-                    self._finish_test("LEVELJ4")
-                else:
-                    self._finish_test("LEVELJ3")
-            elif self.path_state == 'J2':
-                if is_correct:
-                    self._finish_test("LEVELJ2")
-                else:
-                    self._finish_test("LEVELJ1")
-
-        return self._get_result()
-
-
-
-    def _update_state_after_answer_junior(self, is_correct):
-        if len(self.answer_history) == 1:
-            if is_correct:
-                self.current_seniority = 'junior'
-                self.current_level = 5
-                self.path_state = 'J5'
-            else:
-                self.current_seniority = 'junior'
-                self.current_level = 1
-                self.path_state = 'J1'
-
-        elif len(self.answer_history) == 2:
-            if self.path_state == 'J5':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 3
-                    self.path_state = 'M3'
-                else:
-                    self.current_seniority = 'junior'
-                    self.current_level = 4
-                    self.path_state = 'J4'
-            elif self.path_state == 'J1':
-                if is_correct:
-                    self.current_seniority = 'junior'
-                    self.current_level = 2
-                    self.path_state = 'J2'
-                else:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 3
-                    self.path_state = 'F3'
-
-        elif len(self.answer_history) == 3:
-            if self.path_state == 'J2':
-                if is_correct:
-                    self._finish_test("LEVELJ2")
-                else:
-                    self._finish_test("LEVELJ1")
-                return self._get_result()
-            elif self.path_state == 'J4':
-                if is_correct:
-                    self._finish_test("LEVELJ4")
-                else:
-                    self._finish_test("LEVELJ3")
-                return self._get_result()
-            elif self.path_state == 'M3':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 5
-                    self.path_state = 'M5'
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 1
-                    self.path_state = 'M1'
-            elif self.path_state == 'F3':
-                if is_correct:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 5
-                    self.path_state = 'F5'
-                else:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 1
-                    self.path_state = 'F1'
-
-        elif len(self.answer_history) == 4:
-            if self.path_state == 'M5':
-                if is_correct:
-                    self._finish_test("LEVELM5")
-                else:
-                    self.current_seniority = 'middle'
-                    self.current_level = 4
-                    self.path_state = 'M4'
-            elif self.path_state == 'M1':
-                if is_correct:
-                    self.current_seniority = 'middle'
-                    self.current_level = 2
-                    self.path_state = 'M2'
-                else:
-                    self._finish_test("LEVELJ5")
-                return self._get_result()
-            elif self.path_state == 'F5':
-                if is_correct:
-                    self._finish_test("LEVELF5")
-                else:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 4
-                    self.path_state = 'F4'
-            elif self.path_state == 'F1':
-                if is_correct:
-                    self.current_seniority = 'fresher'
-                    self.current_level = 2
-                    self.path_state = 'F2'
-                else:
-                    self._finish_test("LEVELF0", failed=True)
-                return self._get_result()
-
-        elif len(self.answer_history) == 5:
-            if self.path_state == 'M4':
-                if is_correct:
-                    self._finish_test("LEVELM4")
-                else:
-                    self._finish_test("LEVELM3")
-            elif self.path_state == 'M2':
-                if is_correct:
-                    self._finish_test("LEVELM2")
-                else:
-                    self._finish_test("LEVELM1")
-            elif self.path_state == 'F4':
-                if is_correct:
-                    self._finish_test("LEVELF4")
-                else:
-                    self._finish_test("LEVELF3")
-            elif self.path_state == 'F2':
-                if is_correct:
-                    self._finish_test("LEVELF2")
-                else:
-                    self._finish_test("LEVELF1")
-
-        return self._get_result()
 
 ###############################################################################
 # -------------------------  STREAMLIT USER INTERFACE  ---------------------- #
 ###############################################################################
 
+# Tested in this order.  The suggested start for a skill comes from the
+# results of the skills listed for it in multi_skill.RELATED_SKILLS (css and
+# javascript from html, react from javascript), so a skill listed there must
+# come after the ones it depends on here; github has none and starts fresh.
 SKILLS = ["html", "css", "javascript", "react", "github"]
 
 st.set_page_config(page_title="Adaptive Multi‑Skill Quiz", layout="centered")
@@ -593,14 +66,8 @@ st.markdown("<span style='color:green; font-weight:bold;'>Seniority: fresher, ju
 st.markdown("<span style='color:green; font-weight:bold;'>Mỗi Seniority có 5 cấp độ từ 1 đến 5, với cấp độ 1 là thấp nhất và 5 là cao nhất.</span>", unsafe_allow_html=True)
 st.markdown("<span style='color:green; font-weight:bold;'>Ví dụ: fresher cấp độ 1 là F1, junior cấp độ 2 là J2, ...", unsafe_allow_html=True)
 
-# Load questions exactly once -------------------------------------------------
-
-@st.cache_data
-def load_questions():
-    with open("merged_file.json", "r", encoding="utf-8") as f_in:
-        return json.load(f_in)
-
-questions_data = load_questions()
+if METRICS.enabled:
+    get_metrics_server()
 
 # --------------------------  SESSION STATE SETUP  --------------------------- #
 
@@ -611,9 +78,12 @@ if "initialized" not in st.session_state:
     st.session_state["results_per_skill"] = {}
     st.session_state["session"] = None
     st.session_state["question"] = None
+    # Bank version the session started on; it finishes there across reloads
+    st.session_state["bank"] = None
     st.session_state["account"] = ""
-    st.session_state["engine"] = AdaptiveTestingEngine(questions_data)
     st.session_state["result_saved"] = False
+    # Question ids served to this candidate, kept across skills and retakes
+    st.session_state.setdefault("seen_questions", set())
 
 # Move to next skill if needed -----------------------------------------------
 if st.session_state["current_skill"] is None and st.session_state["skills_queue"]:
@@ -635,24 +105,45 @@ if st.session_state["session"] is None:
         key="account_input",
     )
 
-    # Choose starting seniority for *this* skill
+    # Choose starting seniority for *this* skill, suggested by related results
+    seniorities = ["fresher", "junior", "middle", "senior"]
+    related = {
+        skill: label for skill, label in st.session_state["results_per_skill"].items()
+        if skill in RELATED_SKILLS.get(current_skill, ())
+    }
+    suggested = start_from_results(related.values(), seniorities[0])
     seniority = st.selectbox(
         "Chọn cấp độ bắt đầu:",
-        ["fresher", "junior", "middle", "senior"],
+        seniorities,
+        index=seniorities.index(suggested),
         key="seniority_select",
     )
+    if related:
+        st.caption(f"Gợi ý dựa trên kết quả: {', '.join(related)}")
+    bank = get_bank()
+    use_cat = bank.item_pool is not None and get_settings().cat_mode  # set by an admin
 
     if st.button("🚀 Bắt đầu kiểm tra", key="start_btn"):
         if not account.strip():
             st.warning("❌ Vui lòng nhập tên hoặc email của bạn.")
         else:
             st.session_state["account"] = account.strip()
-            session = AdaptiveTestSession(
-                engine=st.session_state["engine"],
-                skill=current_skill,
-                start_seniority=seniority,
-            )
+            if use_cat:
+                session = CatSession(
+                    bank.item_pool,
+                    current_skill,
+                    seniority,
+                    seen_ids=st.session_state["seen_questions"],
+                )
+            else:
+                session = AdaptiveTestSession(
+                    engine=bank.engine,
+                    skill=current_skill,
+                    start_seniority=seniority,
+                    seen_ids=st.session_state["seen_questions"],
+                )
             st.session_state["session"] = session
+            st.session_state["bank"] = bank
             st.session_state["question"] = session.get_next_question()
             st.rerun()
 
@@ -669,10 +160,17 @@ elif not st.session_state["session"].is_finished:
     )
 
     st.subheader(f"📌 Câu hỏi mức độ: {level_str} ({current_skill})")
-    st.markdown(f"**❓ {question['question']}**")
+    payload = st.session_state["bank"].render_cache.get(question, session.perm_codes[-1])
+    # The marker is its own element: wrapping prose in ** breaks on blank lines or "*"
+    st.markdown("**❓**")
+    for kind, lang, body in payload.segments:
+        if kind == "code":
+            st.code(body, language=lang or None)
+        else:
+            st.markdown(body)
 
-    for idx, option in enumerate(question["options"]):
-        if st.button(option["description"], key=f"opt_{idx}"):
+    for idx, label in enumerate(payload.options):
+        if st.button(label, key=f"opt_{idx}"):
             result = session.submit_answer(idx)
             if result.get("answer_history"):
                 if result["answer_history"]["is_correct"]:
@@ -686,6 +184,10 @@ elif not st.session_state["session"].is_finished:
             else:
                 st.rerun()
 
+    # Question is on screen: prepare both possible follow-ups meanwhile
+    if isinstance(session, AdaptiveTestSession):
+        session.prefetch()
+
 # --------------------------------------------------------------------------- #
 #  STEP 3 – Session finished (save + move on / summary)
 # --------------------------------------------------------------------------- #
@@ -704,20 +206,26 @@ else:
         final_result_dict = {
             "account": account,
             "skill": current_skill,
+            "start_seniority": session.starting_seniority,
+            "mode": "cat" if isinstance(session, CatSession) else "tree",
             "final_result": result_label,
             "failed": failed_flag,
             "answer_history": session.answer_history,
+            "seed": session.seed,
             "datetime": datetime.now().isoformat(),
         }
 
         try:
-            local_path = save_result_to_file(account, current_skill, final_result_dict)
+            local_path = save_result_to_file(
+                account, current_skill, final_result_dict, session.starting_seniority
+            )
             # st.info(f"💾 Đã lưu file cục bộ: {local_path}")
         except Exception as e:
             st.error(f"❌ Lưu file cục bộ thất bại: {e}")
 
         try:
-            save_to_github(account, current_skill, result_label, session.answer_history, failed_flag)
+            save_to_github(account, current_skill, result_label, session.answer_history, failed_flag,
+                           session.starting_seniority)
         except Exception as e:
             st.error(f"❌ Lưu GitHub thất bại: {e}")
 
@@ -730,6 +238,7 @@ else:
             # Reset per‑skill state, keep account & summary
             st.session_state["session"] = None
             st.session_state["question"] = None
+            st.session_state["bank"] = None  # next skill starts on the newest version
             st.session_state["result_saved"] = False
             st.session_state["current_skill"] = None  # Trigger pop in next cycle
             st.rerun()
@@ -740,5 +249,6 @@ else:
         # Optionally allow restart ------------------------------------------------
         if st.button("🔄 Làm lại từ đầu", key="restart_all"):
             for key in list(st.session_state.keys()):
-                del st.session_state[key]
+                if key != "seen_questions":
+                    del st.session_state[key]
             st.rerun()
@@ -0,0 +1,101 @@
+"""ResultAggregator: checkpoint/resume, bad store lines and filters."""
+
+import json
+from datetime import date
+
+import pytest
+
+from analytics import ResultAggregator
+from result_store import ResultStore
+
+
+def _result(account: str, skill: str = "react", day: str = "2026-03-02", start: str = "junior",
+            answers=(("q1", True), ("q2", False))) -> dict:
+    return {
+        "account": account, "skill": skill, "start_seniority": start,
+        "final_result": "LEVELJ3", "datetime": f"{day}T10:00:00",
+        "answer_history": [{"question_id": q, "is_correct": c} for q, c in answers],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultStore(str(tmp_path / "store"), sync_every=1)
+    yield s
+    s.close()
+
+
+def test_resumes_from_the_checkpoint(store, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    for n in range(3):
+        store.append(_result(f"a{n}"))
+    first = ResultAggregator(store, checkpoint_path=checkpoint)
+    assert first.refresh() == 3
+
+    store.append(_result("a3"))
+    resumed = ResultAggregator(store, checkpoint_path=checkpoint)
+    assert resumed.records == 3 and resumed.position == first.position
+    assert resumed.refresh() == 1
+    assert resumed.records == 4
+    assert resumed.question_stats()["q1"] == {"asked": 4, "correct": 4, "p_correct": 1.0}
+    assert resumed.level_distribution() == {"LEVELJ3": 4}
+
+
+def test_checkpoints_while_scanning(store, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    store.append_many(_result(f"a{n}") for n in range(25))
+    aggregator = ResultAggregator(store, checkpoint_path=checkpoint, checkpoint_every=10)
+    saved = []
+    aggregator.save_checkpoint = lambda: saved.append(aggregator.records)
+    aggregator.refresh(chunk=5)
+    assert saved == [10, 20, 25]
+
+
+@pytest.mark.parametrize("payload", [
+    {"position": [1, 100], "records": 7},                       # cut short
+    {"version": 1, "position": [1, 100], "records": 7, "bad_lines": 0,
+     "outcomes": [], "questions": {"q1": [1, 1]}},              # older layout
+    {"version": 2, "position": [1, 100], "records": 7, "bad_lines": 0,
+     "outcomes": [], "questions": [7]},                          # garbled row
+])
+def test_partial_checkpoint_means_rescan(store, tmp_path, payload):
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(json.dumps(payload))
+    store.append(_result("a"))
+
+    aggregator = ResultAggregator(store, checkpoint_path=str(checkpoint))
+    assert aggregator.position == (0, 0) and aggregator.records == 0
+    assert aggregator.refresh() == 1
+    assert aggregator.records == 1
+
+
+def test_corrupt_line_is_skipped_and_counted(store, tmp_path):
+    store.append(_result("a"))
+    store.close()
+    with open(store.segment_path(1), "ab") as f_out:
+        f_out.write(b'{"account": "torn\n')
+    store.append(_result("b"))
+
+    aggregator = ResultAggregator(store, checkpoint_path=str(tmp_path / "checkpoint.json"))
+    assert aggregator.refresh() == 3
+    assert aggregator.records == 2 and aggregator.bad_lines == 1
+
+    # moved past it: the next refresh only sees new records
+    store.append(_result("c"))
+    assert aggregator.refresh() == 1
+    assert aggregator.records == 3 and aggregator.bad_lines == 1
+
+
+def test_question_stats_follow_the_filters(store):
+    store.append(_result("a", skill="react", day="2026-03-02", answers=[("q1", True)]))
+    store.append(_result("b", skill="css", day="2026-03-02", answers=[("q1", False)]))
+    store.append(_result("c", skill="react", day="2026-01-05", start="senior",
+                         answers=[("q1", False), ("q2", True)]))
+    aggregator = ResultAggregator(store, checkpoint_path=None)
+    aggregator.refresh()
+
+    assert aggregator.question_stats()["q1"]["asked"] == 3
+    assert aggregator.question_stats(skill="react")["q1"] == {"asked": 2, "correct": 1, "p_correct": 0.5}
+    assert aggregator.question_stats(skill="react", since=date(2026, 3, 1)) == {
+        "q1": {"asked": 1, "correct": 1, "p_correct": 1.0}}
+    assert set(aggregator.question_stats(start_seniority="senior")) == {"q1", "q2"}
@@ -0,0 +1,184 @@
+"""HTTP/JSON API over a synthetic bank, through a real socket."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from api_server import QuizService, handle_connection
+from branching import SENIORITY_CODES
+from engine import AdaptiveTestingEngine
+from result_store import ResultStore
+
+
+def _engine():
+    questions = [
+        {
+            "id": f"{skill}-{seniority}{level}-{k}", "skill": skill, "seniority": seniority,
+            "level": level, "question": f"{skill} {seniority} {level} #{k}?",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}],
+        }
+        for skill in ("react", "css") for seniority in SENIORITY_CODES.values()
+        for level in range(1, 6) for k in range(3)
+    ]
+    return AdaptiveTestingEngine(questions)
+
+
+class Client:
+    """Keep-alive HTTP/1.1 client on the test's event loop."""
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    async def send(self, raw: bytes) -> tuple[int, dict]:
+        self.writer.write(raw)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode().split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        length = next(int(line.split(":")[1]) for line in lines if line.lower().startswith("content-length"))
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def call(self, method: str, path: str, body=None) -> tuple[int, dict]:
+        data = b"" if body is None else json.dumps(body).encode()
+        return await self.send(
+            f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+
+
+@pytest.fixture
+def service(tmp_path):
+    results = ResultStore(str(tmp_path / "store"))
+    yield QuizService(_engine(), results=results)
+    results.close()
+
+
+def _run(service, scenario):
+    async def main():
+        server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w),
+                                            "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = Client(*await asyncio.open_connection("127.0.0.1", port))
+        try:
+            return await scenario(client)
+        finally:
+            client.writer.close()
+            server.close()
+            await server.wait_closed()
+    return asyncio.run(main())
+
+
+def _correct_index(service, question) -> int:
+    q = service.engine.questions[service.engine.offset_by_id[question["id"]]]
+    keys = {opt["description"]: opt["isAnswerKey"] for opt in q["options"]}
+    return [keys[text] for text in question["options"]].index(True)
+
+
+def test_start_answer_finish(service):
+    async def scenario(client):
+        status, started = await client.call("POST", "/sessions",
+                                            {"skill": "react", "start_seniority": "junior",
+                                             "account": "a@b.c", "seed": 5})
+        assert status == 201
+        sid, question = started["session_id"], started["question"]
+        assert "isAnswerKey" not in json.dumps(question)
+        answered = 0
+        while question is not None:
+            status, reply = await client.call("POST", f"/sessions/{sid}/answer",
+                                              {"selected_index": _correct_index(service, question)})
+            assert status == 200 and reply["is_correct"]
+            question = reply["question"]
+            answered += 1
+        assert reply["is_finished"] and reply["final_result"]
+        status, summary = await client.call("GET", f"/sessions/{sid}/summary")
+        assert status == 200 and len(summary["answer_history"]) == answered
+        status, _ = await client.call("POST", f"/sessions/{sid}/answer", {"selected_index": 0})
+        assert status == 409
+        return summary
+
+    summary = _run(service, scenario)
+    (saved,) = service.results.iter_records()
+    assert saved["account"] == "a@b.c" and saved["final_result"] == summary["final_result"]
+
+
+@pytest.mark.parametrize("body", [
+    {"selected_index": True}, {"selected_index": 2}, {"selected_index": -1},
+    {"selected_index": "0"}, {},
+])
+def test_bad_answer_is_rejected(service, body):
+    async def scenario(client):
+        _, started = await client.call("POST", "/sessions", {"skill": "react"})
+        sid = started["session_id"]
+        status, reply = await client.call("POST", f"/sessions/{sid}/answer", body)
+        assert status == 400 and reply == {"error": "selected_index out of range"}
+        status, summary = await client.call("GET", f"/sessions/{sid}/summary")
+        assert summary["answer_history"] == []
+
+    _run(service, scenario)
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("POST", "/sessions", {"skill": "cobol"}, 400),
+    ("POST", "/sessions", {"skill": "react", "start_seniority": "guru"}, 400),
+    ("POST", "/sessions", {"skill": "react", "seed": -1}, 400),
+    ("POST", "/sessions", {"skill": "react", "mode": "cat"}, 400),
+    ("GET", "/sessions", None, 405),
+    ("GET", "/sessions/nope/question", None, 404),
+    ("POST", "/multi-sessions", {"skills": ["react", "react"]}, 400),
+    ("GET", "/elsewhere", None, 404),
+])
+def test_bad_requests(service, method, path, body, status):
+    async def scenario(client):
+        got, reply = await client.call(method, path, body)
+        assert got == status and reply["error"]
+
+    _run(service, scenario)
+
+
+def test_invalid_json_and_non_object_bodies(service):
+    async def scenario(client):
+        raw = b"POST /sessions HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops"
+        assert await client.send(raw) == (400, {"error": "Invalid JSON"})
+        assert (await client.call("POST", "/sessions", [1]))[0] == 400
+
+    _run(service, scenario)
+
+
+def test_handler_bug_gives_a_generic_500(service, caplog):
+    def broken(*args):
+        raise RuntimeError("secret internals")
+    service.start_session = broken
+
+    async def scenario(client):
+        status, reply = await client.call("POST", "/sessions", {"skill": "react"})
+        assert status == 500 and reply == {"error": "Internal server error"}
+        assert (await client.call("GET", "/sessions/nope/summary"))[0] == 404  # still serving
+
+    _run(service, scenario)
+    assert "secret internals" in caplog.text
+
+
+def test_oversized_header_gets_431(service):
+    async def scenario(client):
+        raw = b"GET /sessions/x/question HTTP/1.1\r\nX-Big: " + b"a" * (1 << 17) + b"\r\n\r\n"
+        return await client.send(raw)
+
+    assert _run(service, scenario)[0] == 431
+
+
+def test_handlers_run_off_the_event_loop(service):
+    threads = []
+    original = service.dispatch
+
+    def dispatch(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+    service.dispatch = dispatch
+
+    async def scenario(client):
+        await client.call("POST", "/sessions", {"skill": "react"})
+
+    _run(service, scenario)
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,159 @@
+"""The compiled branching table against the hand-written ladders it replaced.
+
+``LEGACY_OUTCOMES`` was recorded from the old ``_update_state_after_answer_*``
+methods by walking every answer path to its end: answers as ``1``/``0``
+(correct/wrong) -> (states asked, final result, failed).
+"""
+
+import pytest
+
+from branching import DEFAULT_TREE, TRANSITIONS, compile_tree
+from engine import AdaptiveTestSession
+
+LEGACY_OUTCOMES = {
+    # fresher
+    ('fresher', '00'): ('F3 F1', 'LEVELF0', True),
+    ('fresher', '010'): ('F3 F1 F2', 'LEVELF1', False),
+    ('fresher', '011'): ('F3 F1 F2', 'LEVELF2', False),
+    ('fresher', '100'): ('F3 F5 F4', 'LEVELF3', False),
+    ('fresher', '101'): ('F3 F5 F4', 'LEVELF4', False),
+    ('fresher', '1100'): ('F3 F5 J3 J1', 'LEVELF5', False),
+    ('fresher', '11010'): ('F3 F5 J3 J1 J2', 'LEVELJ1', False),
+    ('fresher', '11011'): ('F3 F5 J3 J1 J2', 'LEVELJ2', False),
+    ('fresher', '11100'): ('F3 F5 J3 J5 J4', 'LEVELJ3', False),
+    ('fresher', '11101'): ('F3 F5 J3 J5 J4', 'LEVELJ4', False),
+    ('fresher', '1111'): ('F3 F5 J3 J5', 'LEVELJ5', False),
+    # junior
+    ('junior', '0000'): ('J3 J1 F3 F1', 'LEVELF0', True),
+    ('junior', '00010'): ('J3 J1 F3 F1 F2', 'LEVELF1', False),
+    ('junior', '00011'): ('J3 J1 F3 F1 F2', 'LEVELF2', False),
+    ('junior', '00100'): ('J3 J1 F3 F5 F4', 'LEVELF3', False),
+    ('junior', '00101'): ('J3 J1 F3 F5 F4', 'LEVELF4', False),
+    ('junior', '0011'): ('J3 J1 F3 F5', 'LEVELF5', False),
+    ('junior', '010'): ('J3 J1 J2', 'LEVELJ1', False),
+    ('junior', '011'): ('J3 J1 J2', 'LEVELJ2', False),
+    ('junior', '100'): ('J3 J5 J4', 'LEVELJ3', False),
+    ('junior', '101'): ('J3 J5 J4', 'LEVELJ4', False),
+    ('junior', '1100'): ('J3 J5 M3 M1', 'LEVELJ5', False),
+    ('junior', '11010'): ('J3 J5 M3 M1 M2', 'LEVELM1', False),
+    ('junior', '11011'): ('J3 J5 M3 M1 M2', 'LEVELM2', False),
+    ('junior', '11100'): ('J3 J5 M3 M5 M4', 'LEVELM3', False),
+    ('junior', '11101'): ('J3 J5 M3 M5 M4', 'LEVELM4', False),
+    ('junior', '1111'): ('J3 J5 M3 M5', 'LEVELM5', False),
+    # middle
+    ('middle', '0000'): ('M3 M1 J3 J1', 'LEVELJ0', True),
+    ('middle', '00010'): ('M3 M1 J3 J1 J2', 'LEVELJ1', False),
+    ('middle', '00011'): ('M3 M1 J3 J1 J2', 'LEVELJ2', False),
+    ('middle', '00100'): ('M3 M1 J3 J5 J4', 'LEVELJ3', False),
+    ('middle', '00101'): ('M3 M1 J3 J5 J4', 'LEVELJ4', False),
+    ('middle', '0011'): ('M3 M1 J3 J5', 'LEVELJ5', False),
+    ('middle', '010'): ('M3 M1 M2', 'LEVELM1', False),
+    ('middle', '011'): ('M3 M1 M2', 'LEVELM2', False),
+    ('middle', '100'): ('M3 M5 M4', 'LEVELM3', False),
+    ('middle', '101'): ('M3 M5 M4', 'LEVELM4', False),
+    ('middle', '1100'): ('M3 M5 S3 S1', 'LEVELM5', False),
+    ('middle', '11010'): ('M3 M5 S3 S1 S2', 'LEVELS1', False),
+    ('middle', '11011'): ('M3 M5 S3 S1 S2', 'LEVELS2', False),
+    ('middle', '11100'): ('M3 M5 S3 S5 S4', 'LEVELS3', False),
+    ('middle', '11101'): ('M3 M5 S3 S5 S4', 'LEVELS4', False),
+    ('middle', '1111'): ('M3 M5 S3 S5', 'LEVELS5', False),
+    # senior
+    ('senior', '0000'): ('S3 S1 M3 M1', 'LEVELM0', True),
+    ('senior', '00010'): ('S3 S1 M3 M1 M2', 'LEVELM1', False),
+    ('senior', '00011'): ('S3 S1 M3 M1 M2', 'LEVELM2', False),
+    ('senior', '00100'): ('S3 S1 M3 M5 M4', 'LEVELM3', False),
+    ('senior', '00101'): ('S3 S1 M3 M5 M4', 'LEVELM4', False),
+    ('senior', '0011'): ('S3 S1 M3 M5', 'LEVELM5', False),
+    ('senior', '010'): ('S3 S1 S2', 'LEVELS1', False),
+    ('senior', '011'): ('S3 S1 S2', 'LEVELS2', False),
+    ('senior', '100'): ('S3 S5 S4', 'LEVELS3', False),
+    ('senior', '101'): ('S3 S5 S4', 'LEVELS4', False),
+    ('senior', '11'): ('S3 S5', 'LEVELS5', False),
+}
+
+CODES = {"fresher": "F", "junior": "J", "middle": "M", "senior": "S"}
+
+
+def _tree_paths(tree, start: str) -> dict:
+    """Every answer path from *start* to a result, walked on the compiled arrays."""
+
+    paths = {}
+    stack = [(tree.start_state[start], "", ())]
+    while stack:
+        state, answers, asked = stack.pop()
+        asked += (tree.state_names[state],)
+        for correct in (0, 1):
+            nxt = tree.next_state[2 * state + correct]
+            if nxt >= 0:
+                stack.append((nxt, answers + str(correct), asked))
+            else:
+                result = ~nxt
+                paths[answers + str(correct)] = (
+                    " ".join(asked), tree.results[result], tree.result_failed[result],
+                )
+    return paths
+
+
+class _OneQuestionPerLevel:
+    """Stand-in engine: question ``"M3"`` for middle level 3, option 0 is right."""
+
+    def get_question(self, skill, seniority, level, **_):
+        return {
+            "id": f"{CODES[seniority]}{level}",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}],
+        }
+
+    def record_exposure(self, question_id):
+        pass
+
+    def related_ids(self, question_id):
+        return (question_id,)
+
+
+@pytest.mark.parametrize("start", list(CODES))
+def test_compiled_table_matches_legacy_ladders(start):
+    legacy = {answers: outcome for (s, answers), outcome in LEGACY_OUTCOMES.items() if s == start}
+    assert _tree_paths(DEFAULT_TREE, start) == legacy
+
+
+@pytest.mark.parametrize("start, answers", list(LEGACY_OUTCOMES))
+def test_session_replays_legacy_path(start, answers):
+    session = AdaptiveTestSession(_OneQuestionPerLevel(), "react", start, seen_ids=set())
+    asked = []
+    for answer in answers:
+        question = session.get_next_question()
+        asked.append(question["id"])
+        correct_idx = [opt["isAnswerKey"] for opt in question["options"]].index(True)
+        session.submit_answer(correct_idx if answer == "1" else 1 - correct_idx)
+
+    expected_asked, result, failed = LEGACY_OUTCOMES[(start, answers)]
+    assert session.is_finished
+    assert (" ".join(asked), session.final_result, session.failed) == (expected_asked, result, failed)
+
+
+def test_new_start_point_needs_only_table_rows():
+    tree = compile_tree({
+        **TRANSITIONS,
+        ("intern", "F1", True): "F2",
+        ("intern", "F1", False): "LEVELF0",
+        ("intern", "F2", True): "LEVELF2",
+        ("intern", "F2", False): "LEVELF1",
+    })
+    assert _tree_paths(tree, "intern") == {
+        "0": ("F1", "LEVELF0", True),
+        "10": ("F1 F2", "LEVELF1", False),
+        "11": ("F1 F2", "LEVELF2", False),
+    }
+    assert _tree_paths(tree, "middle") == _tree_paths(DEFAULT_TREE, "middle")
+
+
+@pytest.mark.parametrize("table, message", [
+    ({("x", "F1", True): "LEVELF1"}, "Missing transition"),
+    ({("x", "F1", True): "F2", ("x", "F1", False): "F2",
+      ("x", "F2", True): "F1", ("x", "F2", False): "LEVELF1"}, "exactly one root"),
+    ({("x", "F1", True): "F9", ("x", "F1", False): "LEVELF0"}, "Undefined target"),
+])
+def test_compile_rejects_broken_tables(table, message):
+    with pytest.raises(ValueError, match=message):
+        compile_tree(table)
@@ -0,0 +1,64 @@
+"""Item calibration on simulated answers, and mismatch flagging."""
+
+import numpy as np
+import pytest
+
+from calibration import Responses, bucket_rank, calibrate, flag_mismatches, rank_bucket
+
+
+def _bank(planted: dict, seed=0):
+    """25 questions per bucket F1..S5, ``b`` rising with the rank, some moved."""
+
+    rng = np.random.default_rng(seed + 100)
+    questions, b = [], []
+    for rank in range(20):
+        seniority, level = rank_bucket(rank)
+        for k in range(25):
+            qid = f"{seniority[0].upper()}{level}-{k}"
+            questions.append({"id": qid, "skill": "react", "seniority": seniority, "level": level})
+            b.append(planted.get(qid, -2.5 + rank * 0.25 + rng.normal(0, 0.3)))
+    return questions, np.array(b)
+
+
+def _simulate(b, n_persons=3000, per_person=25, seed=0) -> Responses:
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0, 1.2, n_persons)
+    person = np.repeat(np.arange(n_persons), per_person)
+    item = np.concatenate([rng.choice(len(b), per_person, replace=False) for _ in range(n_persons)])
+    correct = rng.random(len(item)) < 1 / (1 + np.exp(-(theta[person] - b[item])))
+    return person, item, correct
+
+
+@pytest.fixture(scope="module")
+def calibrated():
+    questions, b = _bank({"F2-3": 2.0, "S4-1": -2.0})
+    person, item, correct = _simulate(b)
+    report = calibrate(Responses(person, item, correct, [q["id"] for q in questions]),
+                       questions, model="1pl")
+    return report, b
+
+
+def test_difficulty_is_recovered(calibrated):
+    report, b = calibrated
+    fitted = np.array([row["b"] for row in report.values()])
+    assert np.corrcoef(fitted, b)[0, 1] > 0.95
+
+
+def test_only_planted_mismatches_are_flagged(calibrated):
+    report, _ = calibrated
+    flags = {f["id"]: f for f in flag_mismatches(report)}
+    assert set(flags) == {"F2-3", "S4-1"}
+    assert flags["F2-3"]["direction"] == "harder"
+    assert bucket_rank(**flags["F2-3"]["suggested"]) >= bucket_rank("middle", 3)
+    assert flags["S4-1"]["direction"] == "easier"
+    assert bucket_rank(**flags["S4-1"]["suggested"]) <= bucket_rank("junior", 3)
+
+
+def test_clean_bank_flags_nothing():
+    # 500 questions: an uncorrected 1% test would flag about five of them
+    for seed in range(3):
+        questions, b = _bank({}, seed)
+        person, item, correct = _simulate(b, seed=seed)
+        report = calibrate(Responses(person, item, correct, [q["id"] for q in questions]),
+                           questions, model="1pl")
+        assert flag_mismatches(report) == []
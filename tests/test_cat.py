@@ -0,0 +1,47 @@
+"""CAT sessions over a synthetic bank."""
+
+from branching import SENIORITY_CODES
+from cat import CatSession, ItemPool
+from engine import AdaptiveTestingEngine
+
+
+def _engine():
+    questions = [
+        {
+            "id": f"{seniority}{level}-{k}", "skill": "react", "seniority": seniority,
+            "level": level, "question": f"{seniority} {level} #{k}?",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}],
+        }
+        for seniority in SENIORITY_CODES.values() for level in range(1, 6) for k in range(4)
+    ]
+    return AdaptiveTestingEngine(questions, track_exposure=True, exposure_path=None)
+
+
+def _run(pool, seed: int) -> list[str]:
+    session = CatSession(pool, "react", "middle", seed=seed)
+    served = []
+    while (q := session.get_next_question()) is not None:
+        served.append(q["id"])
+        keys = [opt["isAnswerKey"] for opt in q["options"]]
+        session.submit_answer(keys.index(seed % 2 == 0))
+    return served
+
+
+def test_cat_sessions_record_exposure():
+    engine = _engine()
+    pool = ItemPool(engine, params={})
+    served = [qid for seed in range(20) for qid in _run(pool, seed)]
+
+    stats = engine.exposure.stats()
+    assert stats["served"] == len(served)
+    for qid in set(served):
+        assert stats["counts"][qid] == served.count(qid)
+
+
+def test_cat_spreads_exposure_over_equally_informative_items():
+    engine = _engine()
+    pool = ItemPool(engine, params={})
+    firsts = [_run(pool, seed)[0] for seed in range(40)]
+    counts = sorted((firsts.count(qid) for qid in set(firsts)), reverse=True)
+    assert counts[0] - counts[-1] <= 1
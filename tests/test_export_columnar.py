@@ -0,0 +1,64 @@
+"""Columnar export of the result store."""
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+
+from export_columnar import ANSWERS_SCHEMA, CODES_SCHEMA, RESULTS_SCHEMA, export
+from result_store import ResultStore
+
+
+def _answer(qid, idx, correct):
+    return {"question_id": qid, "selected_index": idx, "is_correct": correct}
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultStore(str(tmp_path / "store"))
+    s.append({"account": "a", "skill": "react", "start_seniority": "junior",
+              "final_result": "LEVELJ3", "failed": False, "seed": 2**63 - 1,
+              "datetime": "2026-03-02T10:00:00",
+              "answer_history": [_answer("q1", 0, True), _answer("q2", 3, False)]})
+    s.append({"account": "b", "skill": "css", "final_result": "LEVELF0", "failed": True,
+              "answer_history": [_answer("q2", 1, True), {"selected_index": 2, "is_correct": False},
+                                 "garbage", _answer("q3", 0, True)]})
+    s.append({"account": "c", "skill": "html"})  # legacy: no answers at all
+    s.flush()
+    yield s
+    s.close()
+
+
+def _read(path: str, fmt: str) -> pa.Table:
+    if fmt == "parquet":
+        return pq.read_table(path)
+    return ipc.open_file(pa.memory_map(path)).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_exported_schema_and_rows(store, tmp_path, fmt):
+    out = str(tmp_path / "out")
+    counts = export(store, out, fmt, chunk_rows=2)
+    assert counts == {"results": 3, "answers": 4, "skipped_answers": 2, "question_codes": 3}
+
+    ext = "parquet" if fmt == "parquet" else "arrow"
+    results = _read(f"{out}/results.{ext}", fmt)
+    answers = _read(f"{out}/answers.{ext}", fmt)
+    codes = _read(f"{out}/question_codes.{ext}", fmt)
+    assert results.schema.equals(RESULTS_SCHEMA)
+    assert answers.schema.equals(ANSWERS_SCHEMA)
+    assert codes.schema.equals(CODES_SCHEMA)
+
+    assert results.column("account").to_pylist() == ["a", "b", "c"]
+    assert results.column("n_answers").to_pylist() == [2, 2, 0]
+    assert results.column("seed").to_pylist() == [2**63 - 1, None, None]
+    assert results.column("start_seniority").to_pylist() == ["junior", None, None]
+
+    code_of = dict(zip(codes.column("question_id").to_pylist(), codes.column("question_code").to_pylist()))
+    assert answers.to_pylist() == [
+        {"result_id": 0, "position": 0, "question_code": code_of["q1"], "selected_index": 0, "is_correct": True},
+        {"result_id": 0, "position": 1, "question_code": code_of["q2"], "selected_index": 3, "is_correct": False},
+        {"result_id": 1, "position": 0, "question_code": code_of["q2"], "selected_index": 1, "is_correct": True},
+        {"result_id": 1, "position": 3, "question_code": code_of["q3"], "selected_index": 0, "is_correct": True},
+    ]
+    assert sorted(code_of.values()) == [0, 1, 2]
@@ -0,0 +1,136 @@
+"""Exposure control with sessions drawing concurrently, and its persistence."""
+
+import json
+import multiprocessing
+import random
+from collections import Counter
+
+from branching import SENIORITY_CODES
+from engine import AdaptiveTestingEngine, AdaptiveTestSession
+from exposure import ExposureTracker
+
+PER_BUCKET = 5
+
+
+def _bank():
+    questions = []
+    for seniority in SENIORITY_CODES.values():
+        for level in range(1, 6):
+            for k in range(PER_BUCKET):
+                questions.append({
+                    "id": f"{seniority}{level}-{k}",
+                    "skill": "react",
+                    "seniority": seniority,
+                    "level": level,
+                    "question": f"{seniority} {level} #{k}?",
+                    "options": [{"description": "yes", "isAnswerKey": True},
+                                {"description": "no", "isAnswerKey": False}],
+                })
+    return questions
+
+
+def _engine():
+    return AdaptiveTestingEngine(_bank(), track_exposure=True, exposure_path=None)
+
+
+def _answer(session, correct: bool):
+    question = session.current_question
+    keys = [opt["isAnswerKey"] for opt in question["options"]]
+    session.submit_answer(keys.index(correct))
+
+
+def _second_questions(engine, n_sessions: int, prefetch: bool) -> Counter:
+    """Start *n_sessions* side by side (each prefetching while its first
+    question is on screen), answer them all correctly, count the M5 draws."""
+
+    rng = random.Random(7)
+    sessions = [AdaptiveTestSession(engine, "react", "middle", seed=rng.randrange(2**63))
+                for _ in range(n_sessions)]
+    for session in sessions:
+        session.get_next_question()
+        if prefetch:
+            session.prefetch()
+    for session in sessions:
+        _answer(session, True)
+    return Counter(session.get_next_question()["id"] for session in sessions)
+
+
+def _warm_up(engine):
+    for _ in range(3):
+        _second_questions(engine, PER_BUCKET, prefetch=False)
+
+
+def test_prefetching_sessions_spread_over_the_bucket():
+    engine = _engine()
+    _warm_up(engine)
+    served = _second_questions(engine, 40, prefetch=True)
+    assert sorted(served.values()) == [8] * PER_BUCKET
+
+
+def test_branch_not_taken_is_released():
+    engine = _engine()
+    session = AdaptiveTestSession(engine, "react", "middle", seed=1)
+    session.get_next_question()
+    session.prefetch()
+    right, wrong = (b[0]["id"] for b in reversed(session._branches))
+    counts = engine.exposure.stats()["counts"]
+    assert counts[right] == counts[wrong] == 1
+
+    _answer(session, True)
+    served = session.get_next_question()["id"]
+    counts = engine.exposure.stats()["counts"]
+    assert served == right
+    assert counts[right] == 1 and counts[wrong] == 0
+    assert engine.exposure.last_served[engine.offset_by_id[wrong]] == 0
+    assert sum(counts.values()) == 2  # M3 + M5, nothing left reserved
+
+
+def test_reload_keeps_least_recently_served_order(tmp_path):
+    path = str(tmp_path / "exposure.json")
+    before = ExposureTracker(["a", "b", "c"], path=path)
+    for offset in (2, 0, 1, 0):
+        before.record(offset)
+    before.flush()
+
+    after = ExposureTracker(["a", "b", "c"], path=path)
+    assert after.counts == [2, 1, 1]
+    assert after.last_served == before.last_served == [4, 3, 1]
+    after.record(2)
+    assert after.last_served[2] == 5  # the clock carried on too
+
+
+def _serve(path: str, offsets: list[int]):
+    tracker = ExposureTracker(["a", "b", "c"], path=path)
+    for offset in offsets:
+        tracker.record(offset)
+        tracker.flush()
+
+
+def test_processes_flushing_one_file_add_up(tmp_path):
+    path = str(tmp_path / "exposure.json")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_serve, args=(path, [k % 3] * 20)) for k in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    with open(path, encoding="utf-8") as f_in:
+        saved = json.load(f_in)
+    assert saved["counts"] == {"a": 20, "b": 20, "c": 20}
+
+
+def test_flush_merges_counts_from_another_tracker(tmp_path):
+    path = str(tmp_path / "exposure.json")
+    app, api = ExposureTracker(["a", "b"], path=path), ExposureTracker(["a", "b"], path=path)
+    app.record(0)
+    app.flush()
+    api.record(0)
+    api.record(1)
+    api.flush()
+    app.record(1)
+    app.flush()
+
+    assert app.counts == [2, 2]
+    assert ExposureTracker(["a", "b"], path=path).counts == [2, 2]
@@ -0,0 +1,231 @@
+"""GitHubResultWriter against a local stand-in for the Git data API."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import github_writer
+from github_writer import GitHubError, GitHubResultWriter
+from metrics import Metrics
+
+
+class FakeGitHub:
+    """Just enough of ``/repos/{owner}/{repo}/git/...`` to commit trees."""
+
+    def __init__(self):
+        self.head = "c0"
+        self.commits = {"c0": {"tree": "t0", "files": {}}}
+        self.trees = {"t0": {}}
+        self.fail_next = 0  # answer this many calls with a 502
+        self.race_next = 0  # someone else moves main before this many of our PATCHes
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def files(self) -> dict:
+        return self.commits[self.head]["files"]
+
+    def history(self) -> list[str]:
+        return [sha for sha in self.commits if sha != "c0"]
+
+    def _handle(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        self.calls += 1
+        if self.fail_next:
+            self.fail_next -= 1
+            return 502, {"message": "Bad Gateway"}
+        path = path.split("/git/", 1)[1]
+        if method == "GET" and path == "ref/heads/main":
+            return 200, {"object": {"sha": self.head}}
+        if method == "GET" and path.startswith("commits/"):
+            return 200, {"sha": path[8:], "tree": {"sha": self.commits[path[8:]]["tree"]}}
+        if method == "POST" and path == "trees":
+            files = dict(self.trees[body["base_tree"]])
+            for item in body["tree"]:
+                if ".." in item["path"].split("/"):
+                    return 422, {"message": "tree.path contains a malformed path component"}
+                files[item["path"]] = json.loads(item["content"])
+            sha = f"t{len(self.trees)}"
+            self.trees[sha] = files
+            return 201, {"sha": sha}
+        if method == "POST" and path == "commits":
+            sha = f"c{len(self.commits)}"
+            self.commits[sha] = {"tree": body["tree"], "files": self.trees[body["tree"]],
+                                 "message": body["message"], "parent": body["parents"][0]}
+            return 201, {"sha": sha}
+        if method == "PATCH" and path == "refs/heads/main":
+            if self.race_next:
+                self.race_next -= 1
+                self._foreign_commit()
+            if self.commits[body["sha"]]["parent"] != self.head:
+                return 422, {"message": "Update is not a fast forward"}
+            self.head = body["sha"]
+            return 200, {"object": {"sha": self.head}}
+        return 404, {"message": "Not Found"}
+
+    def _foreign_commit(self):
+        sha = f"c{len(self.commits)}"
+        self.commits[sha] = {"tree": self.commits[self.head]["tree"], "files": self.files(),
+                             "message": "Someone else", "parent": self.head}
+        self.head = sha
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                with fake._lock:
+                    status, payload = fake._handle(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _serve
+
+        return Handler
+
+
+@pytest.fixture
+def github():
+    fake = FakeGitHub()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+@pytest.fixture
+def writer(github, tmp_path):
+    w = GitHubResultWriter("me", "repo", "token", api_url=github.url,
+                           outbox_dir=str(tmp_path / "outbox"), batch_size=10,
+                           flush_interval=0.01, backoff_base=0.01, backoff_max=0.05,
+                           max_rejections=3)
+    yield w
+    w.stop(timeout=5)
+
+
+def _flush_all(writer, attempts: int = 50):
+    """Drive flush_once by hand, swallowing errors like the worker loop does."""
+    for _ in range(attempts):
+        try:
+            if not writer.flush_once() and not writer.pending():
+                return
+        except GitHubError:
+            pass
+    raise AssertionError(f"outbox not drained: {writer.pending()}")
+
+
+def test_submit_only_writes_the_outbox(github, writer):
+    writer.submit("results/a.json", {"account": "a"})
+    assert len(writer.pending()) == 1
+    assert github.calls == 0
+
+
+def test_pending_results_go_out_in_one_commit(github, writer):
+    for name in "abc":
+        writer.submit(f"results/{name}.json", {"account": name})
+
+    assert writer.flush_once() == 3
+    assert writer.pending() == []
+    assert github.history() == ["c1"]
+    assert github.commits["c1"]["message"] == "Add 3 results"
+    assert github.files() == {f"results/{n}.json": {"account": n} for n in "abc"}
+
+
+def test_worker_backs_off_and_retries_while_github_fails(github, writer):
+    github.fail_next = 4
+    writer.submit("results/a.json", {"account": "a"})
+    writer.start()
+    deadline = time.monotonic() + 10
+    while writer.pending() and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert writer.pending() == []
+    assert github.files() == {"results/a.json": {"account": "a"}}
+    assert writer.failures == 0 and writer.dead_letters == 0
+
+
+def test_server_errors_never_dead_letter(github, writer):
+    github.fail_next = 100
+    writer.submit("results/a.json", {"account": "a"})
+    for _ in range(2 * writer.max_rejections):
+        with pytest.raises(GitHubError):
+            writer.flush_once()
+    assert len(writer.pending()) == 1
+    assert writer.dead_letters == 0
+
+
+def test_rejected_entry_is_dead_lettered_and_the_rest_go_through(github, writer):
+    writer.submit("results/a.json", {"account": "a"})
+    writer.submit("results/../b.json", {"account": "b"})
+    writer.submit("results/c.json", {"account": "c"})
+
+    _flush_all(writer)
+
+    assert github.files() == {"results/a.json": {"account": "a"}, "results/c.json": {"account": "c"}}
+    assert writer.dead_letters == 1
+    with open(writer.dead_letter_path, encoding="utf-8") as f_in:
+        (dead,) = [json.loads(line) for line in f_in]
+    assert dead["path"] == "results/../b.json"
+    assert dead["content"] == {"account": "b"}
+    assert "422" in dead["error"]
+
+    # the queue keeps moving in full batches afterwards
+    writer.submit("results/d.json", {"account": "d"})
+    writer.submit("results/e.json", {"account": "e"})
+    assert writer.flush_once() == 2
+
+
+def test_missing_branch_is_retried_not_dead_lettered(github, tmp_path):
+    w = GitHubResultWriter("me", "repo", "token", api_url=github.url, branch="dev",
+                           outbox_dir=str(tmp_path / "outbox"), max_rejections=3)
+    w.submit("results/a.json", {"account": "a"})
+    for _ in range(2 * w.max_rejections):
+        with pytest.raises(GitHubError) as err:
+            w.flush_once()
+        assert err.value.status == 404 and not err.value.rejected
+    assert len(w.pending()) == 1
+    assert w.dead_letters == 0
+
+
+def test_ref_race_is_retried_until_it_lands(github, writer):
+    github.race_next = 2 * writer.max_rejections
+    writer.submit("results/a.json", {"account": "a"})
+
+    _flush_all(writer)
+
+    assert writer.dead_letters == 0
+    assert github.files() == {"results/a.json": {"account": "a"}}
+    assert github.commits[github.head]["message"] == "Add result a.json"
+
+
+def test_remote_save_is_timed_per_result_once_committed(github, writer, monkeypatch):
+    metrics = Metrics(enabled=True)
+    monkeypatch.setattr(github_writer, "METRICS", metrics)
+    writer.submit("results/a.json", {"account": "a"}, "react", "junior")
+    writer.submit("results/b.json", {"account": "b"}, "css", "senior")
+    github.fail_next = 1
+    with pytest.raises(GitHubError):
+        writer.flush_once()
+    assert 'span="remote_save"' not in metrics.render()
+
+    assert writer.flush_once() == 2
+    text = metrics.render()
+    assert 'quiz_span_seconds_count{span="remote_save",skill="react",seniority="junior"} 1' in text
+    assert 'quiz_span_seconds_count{span="remote_save",skill="css",seniority="senior"} 1' in text
+    assert 'quiz_span_seconds_count{span="github_commit",skill="",seniority=""} 2' in text
+    assert github.files() == {"results/a.json": {"account": "a"}, "results/b.json": {"account": "b"}}
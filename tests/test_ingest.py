@@ -0,0 +1,86 @@
+"""Bank ids across re-ingest, edits and moved source files."""
+
+import json
+import os
+
+import pytest
+
+from ingest import ingest
+
+
+def _q(source_id, text, level=1):
+    return {"id": source_id, "skill": "react", "seniority": "junior", "level": level,
+            "question": text,
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}]}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = tmp_path / "merged_file.json"
+    path.write_text(json.dumps([{**_q("1", "Existing question?"), "id": "1"}]), encoding="utf-8")
+    return str(path)
+
+
+def _write(path, questions):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f_out:
+        json.dump(questions, f_out)
+    return path
+
+
+def _bank_ids(bank) -> dict:
+    with open(bank, encoding="utf-8") as f_in:
+        return {q["question"]: q["id"] for q in json.load(f_in)}
+
+
+def test_reingest_keeps_ids(bank, tmp_path):
+    src = _write(str(tmp_path / "new" / "react.json"), [_q("a", "What is JSX?"), _q("b", "What is a hook?")])
+    first = ingest([src], bank, workers=1)
+    assert first["added"] == ["2", "3"]
+
+    assert ingest([src], bank, workers=1)["skipped_files"] == ["new/react.json"]
+    _write(src, [_q("a", "What is JSX, exactly?"), _q("b", "What is a hook?")])
+    again = ingest([src], bank, workers=1)
+    assert again["changed"] == ["2"] and again["added"] == [] and again["unchanged"] == 1
+    assert _bank_ids(bank)["What is JSX, exactly?"] == "2"
+
+
+def test_moved_and_edited_file_keeps_ids(bank, tmp_path):
+    old = _write(str(tmp_path / "new" / "react.json"), [_q("a", "What is JSX?"), _q("b", "What is a hook?")])
+    ingest([old], bank, workers=1)
+    os.remove(old)
+    moved = _write(str(tmp_path / "topics" / "react-basics.json"),
+                   [_q("a", "What is JSX, exactly?"), _q("b", "What is a hook?"), _q("c", "What is state?")])
+
+    report = ingest([moved], bank, workers=1)
+    assert report["moved"] == [{"from": "new/react.json", "to": "topics/react-basics.json"}]
+    assert report["changed"] == ["2"] and report["added"] == ["4"] and report["unchanged"] == 1
+    assert report["duplicates"] == []
+    assert _bank_ids(bank) == {"Existing question?": "1", "What is JSX, exactly?": "2",
+                               "What is a hook?": "3", "What is state?": "4"}
+
+    with open(os.path.join(tmp_path, "question_ids.json"), encoding="utf-8") as f_in:
+        id_map = json.load(f_in)
+    assert "new/react.json" not in id_map["files"]
+    assert not any(key.startswith("new/react.json#") for key in id_map["questions"])
+
+
+def test_copy_is_a_separate_source(bank, tmp_path):
+    old = _write(str(tmp_path / "new" / "react.json"), [_q("a", "What is JSX?")])
+    ingest([old], bank, workers=1)
+    copy = _write(str(tmp_path / "copy" / "react.json"), [_q("a", "What is JSX?")])
+
+    report = ingest([copy], bank, workers=1)
+    assert report["moved"] == [] and report["added"] == []
+    assert report["duplicates"] == [{"key": "copy/react.json#a", "id": "2"}]
+
+
+def test_unrelated_new_file_is_not_taken_for_a_move(bank, tmp_path):
+    old = _write(str(tmp_path / "new" / "react.json"), [_q("a", "What is JSX?"), _q("b", "What is a hook?")])
+    ingest([old], bank, workers=1)
+    os.remove(old)
+    other = _write(str(tmp_path / "css.json"), [_q("x", "What is flexbox?"), _q("y", "What is grid?")])
+
+    report = ingest([other], bank, workers=1)
+    assert report["moved"] == [] and report["added"] == ["4", "5"]
@@ -0,0 +1,72 @@
+"""Multi-skill sessions and their results through the API service."""
+
+from api_server import QuizService
+from branching import SENIORITY_CODES
+from engine import NO_QUESTION_LABEL, AdaptiveTestingEngine
+from multi_skill import MultiSkillSession, start_from_results
+from result_store import ResultStore
+
+
+def _engine():
+    """html has every bucket; css only senior level 5, so it runs out at once."""
+
+    def question(skill, seniority, level, k):
+        return {
+            "id": f"{skill}-{seniority}{level}-{k}", "skill": skill, "seniority": seniority,
+            "level": level, "question": f"{skill} {seniority} {level} #{k}?",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}],
+        }
+
+    questions = [question("html", s, level, k) for s in SENIORITY_CODES.values()
+                 for level in range(1, 6) for k in range(3)]
+    questions += [question("css", "senior", 5, k) for k in range(3)]
+    return AdaptiveTestingEngine(questions)
+
+
+def _service(tmp_path):
+    return QuizService(_engine(), results=ResultStore(str(tmp_path / "store")))
+
+
+def _saved(service) -> dict:
+    records = list(service.results.iter_records())
+    assert len(records) == len({r["skill"] for r in records})  # each skill saved once
+    return {r["skill"]: r["final_result"] for r in records}
+
+
+def test_start_from_results():
+    assert start_from_results([]) == "middle"
+    assert start_from_results(["LEVELS5", "LEVELS3"]) == "senior"
+    assert start_from_results([NO_QUESTION_LABEL], "junior") == "junior"
+
+
+def test_dependent_skill_waits_for_its_related_result():
+    session = MultiSkillSession(_engine(), ["css", "html"], seed=1)
+    assert list(session.next_questions()) == ["html"]
+    assert session.waiting == ["css"]
+
+
+def test_skill_without_questions_is_saved_when_the_session_starts(tmp_path):
+    service = _service(tmp_path)
+    status, started = service.start_multi({"skills": ["css"], "account": "a", "seed": 2})
+
+    assert status == 201 and started["questions"] == {}
+    assert _saved(service) == {"css": NO_QUESTION_LABEL}
+
+
+def test_skill_that_runs_out_after_an_answer_is_saved(tmp_path):
+    service = _service(tmp_path)
+    _, started = service.start_multi({"skills": ["html", "css"], "account": "a", "seed": 3})
+    sid, questions = started["session_id"], started["questions"]
+    assert list(questions) == ["html"]
+
+    while questions:
+        _, reply = service.multi_answers(sid, {"answers": {"html": 0}})
+        questions = reply["questions"]
+    assert reply["is_finished"]
+
+    saved = _saved(service)
+    assert saved["css"] == NO_QUESTION_LABEL and saved["html"].startswith("LEVEL")
+    # reading the finished session again saves nothing more
+    service.multi_questions(sid)
+    assert len(list(service.results.iter_records())) == 2
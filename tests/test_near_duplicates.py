@@ -0,0 +1,81 @@
+"""MinHash/LSH near-duplicate clusters and their use in sessions."""
+
+import random
+
+from branching import SENIORITY_CODES
+from engine import AdaptiveTestingEngine, AdaptiveTestSession
+from near_duplicates import NearDuplicateIndex, load_duplicates
+
+WORDS = [f"w{i}" for i in range(2000)]
+
+
+def _question(qid, words, seniority="junior", level=1):
+    return {"id": qid, "skill": "react", "seniority": seniority, "level": level,
+            "question": " ".join(words) + "?",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}]}
+
+
+def _planted_bank(n_distinct=300, n_planted=30, seed=7):
+    """Random distinct questions plus one-word rewordings of the first few."""
+
+    rng = random.Random(seed)
+    texts = [rng.sample(WORDS, 20) for _ in range(n_distinct)]
+    questions = [_question(f"d{i}", words) for i, words in enumerate(texts)]
+    planted = []
+    for i in range(n_planted):
+        words = list(texts[i])
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+        questions.append(_question(f"p{i}", words))
+        planted.append((f"d{i}", f"p{i}"))
+    return questions, planted
+
+
+def test_planted_rewordings_are_found():
+    questions, planted = _planted_bank()
+    related = NearDuplicateIndex(questions).related_ids()
+    for original, variant in planted:
+        assert related.get(original) == related.get(variant) == tuple(sorted((original, variant)))
+
+
+def test_different_texts_are_not_clustered():
+    questions, _ = _planted_bank(n_planted=0)
+    assert NearDuplicateIndex(questions).clusters() == []
+
+
+def test_similar_scores_an_unseen_question():
+    questions, _ = _planted_bank(n_planted=0)
+    index = NearDuplicateIndex(questions)
+    words = questions[5]["question"][:-1].split()
+    words[0] = "changed"
+    (hit,) = index.similar(_question("new", words))
+    assert hit[0] == "d5" and index.threshold <= hit[1] < 1
+    assert index.similar(_question("other", WORDS[-20:])) == []
+
+
+def test_clusters_are_cached_next_to_the_bank(tmp_path):
+    questions, planted = _planted_bank(n_distinct=50, n_planted=3)
+    source = tmp_path / "merged_file.json"
+    source.write_text("[]", encoding="utf-8")
+    built = load_duplicates(str(source), questions=questions)
+    assert set(built) == {qid for pair in planted for qid in pair}
+    assert load_duplicates(str(source), questions=[]) == built  # read back from the cache
+
+
+def test_serving_one_question_marks_its_cluster_seen():
+    # every bucket holds a copy "-0" of one template and an unrelated "-1"
+    questions = [
+        _question(f"{seniority[0]}{level}-{k}", [seniority, str(level), str(k)], seniority, level)
+        for seniority in SENIORITY_CODES.values() for level in range(1, 6) for k in range(2)
+    ]
+    cluster = tuple(q["id"] for q in questions if q["id"].endswith("-0"))
+    engine = AdaptiveTestingEngine(questions, duplicates={qid: cluster for qid in cluster})
+
+    for seed in range(20):
+        session = AdaptiveTestSession(engine, "react", "junior", seed=seed)
+        served = []
+        while (q := session.get_next_question()) is not None:
+            served.append(q["id"])
+            assert set(engine.related_ids(q["id"])) <= session.seen_ids
+            session.submit_answer(seed % 2)
+        assert len(served) > 1 and sum(qid in cluster for qid in served) <= 1
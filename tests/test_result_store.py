@@ -0,0 +1,63 @@
+"""ResultStore with several processes appending to the same directory."""
+
+import json
+import multiprocessing
+
+from result_store import ResultStore
+
+WRITERS = 3
+CHUNKS = 40
+PER_CHUNK = 5
+
+
+def _write(directory: str, writer: int):
+    store = ResultStore(directory, segment_max_bytes=4096, sync_every=8)
+    for chunk in range(CHUNKS):
+        if chunk % 2:
+            store.append_many({"writer": writer, "n": chunk * PER_CHUNK + i, "pad": "x" * 40}
+                              for i in range(PER_CHUNK))
+        else:
+            for i in range(PER_CHUNK):
+                store.append({"writer": writer, "n": chunk * PER_CHUNK + i, "pad": "x" * 40})
+    store.close()
+
+
+def test_processes_writing_one_store_lose_nothing(tmp_path):
+    directory = str(tmp_path / "store")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write, args=(directory, w)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    store = ResultStore(directory)
+    seen = {(r["writer"], r["n"]) for r in store.iter_records()}
+    total = sum(1 for _ in store.iter_records())
+    assert total == len(seen) == WRITERS * CHUNKS * PER_CHUNK
+
+    # every sealed segment is complete and matches its index entry
+    segments = store.segments()
+    assert len(segments) > 1
+    for number in segments[:-1]:
+        path = store.segment_path(number)
+        with open(path, "rb") as f_in:
+            data = f_in.read()
+        assert data.endswith(b"\n")
+        assert all(json.loads(line) for line in data.splitlines())
+        assert store.index["sealed"][str(number)] == {"records": data.count(b"\n"), "bytes": len(data)}
+        assert len(data) <= 4096
+
+
+def test_segment_sealed_elsewhere_is_not_written_again(tmp_path):
+    directory = str(tmp_path / "store")
+    first = ResultStore(directory, segment_max_bytes=200)
+    second = ResultStore(directory, segment_max_bytes=200)
+    first.append({"n": 0})
+    for n in range(1, 10):  # second fills segment 1, seals it and moves on
+        second.append({"n": n, "pad": "x" * 30})
+    segment, _ = first.append({"n": 10})
+
+    assert str(segment) not in ResultStore(directory).index["sealed"]
+    assert [r["n"] for r in ResultStore(directory).iter_records()] == list(range(11))
@@ -0,0 +1,81 @@
+"""BM25 ranking, prefixes, paging and facet filters of the question search."""
+
+import pytest
+
+from engine import freeze_question
+from search_index import QuestionSearchIndex
+
+
+def _q(qid, text, skill="react", seniority="junior", level=1, category="framework"):
+    return freeze_question({
+        "id": qid, "skill": skill, "category": category, "seniority": seniority, "level": level,
+        "question": text,
+        "options": [{"description": "yes", "isAnswerKey": True},
+                    {"description": "no", "isAnswerKey": False}],
+    })
+
+
+@pytest.fixture(scope="module")
+def index():
+    questions = [
+        _q("1", "What does useEffect do with an empty dependency array?"),
+        _q("2", "useEffect useEffect useEffect: when does the cleanup run?", level=3),
+        _q("3", "How do you center a div with flexbox?", skill="css", category="styling"),
+        _q("4", "Explain the dependency array of useMemo", seniority="middle", level=3),
+        _q("5", "What is a flex container?", skill="css", category="styling", level=3),
+        _q("6", "Which hook replaces componentDidMount?", seniority="middle"),
+    ]
+    # filler so that common words carry little weight
+    questions += [_q(str(i), f"What is the filler question number {i}?", skill="git", category="tools")
+                  for i in range(7, 40)]
+    return QuestionSearchIndex(questions)
+
+
+def _ids(result):
+    return [q["id"] for q, _ in result.hits]
+
+
+def test_rare_words_and_repeats_rank_first(index):
+    assert _ids(index.search("useEffect")) == ["2", "1"]  # term frequency wins
+    result = index.search("dependency array", prefix=False)
+    assert set(_ids(result)) == {"1", "4"} and result.total == 2
+    scores = [score for _, score in index.search("what useEffect", prefix=False).hits]
+    assert _ids(index.search("what useEffect", prefix=False)) == ["1"] and scores[0] > 0
+
+
+def test_last_word_matches_as_a_prefix(index):
+    assert set(_ids(index.search("fle"))) == {"3", "5"}
+    assert index.search("fle ").total == 0  # a finished word must match whole
+    assert index.search("fl").total == 0    # too short to expand
+
+
+def test_ties_page_in_bank_order(index):
+    pages = [_ids(index.search("filler", limit=5, offset=offset)) for offset in range(0, 35, 5)]
+    flat = [qid for page in pages for qid in page]
+    assert flat == [str(i) for i in range(7, 40)]
+
+
+def test_filters_and_facet_counts(index):
+    result = index.search("what", skill="css")
+    assert _ids(result) == ["5"]
+    # each facet counts matches under the *other* filters only
+    assert result.facets["skill"] == {"css": 1, "git": 33, "react": 1}
+    assert result.facets["level"] == {3: 1}
+    result = index.search("", skill="react", level=3)
+    assert _ids(result) == ["2", "4"] and result.total == 2
+    assert result.facets["seniority"] == {"junior": 1, "middle": 1}
+    assert result.facets["level"] == {1: 2, 3: 2}
+    assert index.search("useEffect", seniority="senior").total == 0
+    assert index.search("", skill="cobol").hits == []
+
+
+def test_listing_without_query_pages_in_bank_order(index):
+    result = index.search("", limit=3, offset=4)
+    assert result.total == 39 and _ids(result) == ["5", "6", "7"]
+    result = index.search("", category="styling")
+    assert _ids(result) == ["3", "5"]
+
+
+def test_unknown_filter_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search("what", colour="red")
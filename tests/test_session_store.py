@@ -0,0 +1,124 @@
+"""Session encoding and versioned session storage."""
+
+import itertools
+import sqlite3
+
+import pytest
+
+from branching import SENIORITY_CODES
+from engine import AdaptiveTestingEngine, AdaptiveTestSession, code_to_perm, perm_to_code
+from session_store import MemoryBackend, SessionConflict, SessionStore, SQLiteBackend
+
+
+def _engine():
+    questions = [
+        {
+            "id": f"q-{seniority[0]}{level}-{k:03d}", "skill": "react", "seniority": seniority,
+            "level": level, "question": f"{seniority} {level} #{k}?",
+            "options": [{"description": f"option {i}", "isAnswerKey": i == 0} for i in range(4)],
+        }
+        for seniority in SENIORITY_CODES.values() for level in range(1, 6) for k in range(3)
+    ]
+    return AdaptiveTestingEngine(questions)
+
+
+def _answer(session, correct: bool):
+    keys = [opt["isAnswerKey"] for opt in session.current_question["options"]]
+    return session.submit_answer(keys.index(correct))
+
+
+# --------------------------------------------------------------------------- #
+# Encoding
+
+@pytest.mark.parametrize("n", range(1, 7))
+def test_lehmer_code_round_trips_every_permutation(n):
+    codes = set()
+    for perm in itertools.permutations(range(n)):
+        code = perm_to_code(perm)
+        assert code_to_perm(code, n) == list(perm)
+        codes.add(code)
+    assert codes == set(range(len(codes)))  # dense: 0 .. n!-1
+
+
+def test_one_question_session_is_43_bytes():
+    engine = _engine()
+    session = AdaptiveTestSession(engine, "react", "middle", seed=3)
+    session.get_next_question()
+    # header 18 + "react" 1+5 + "middle" 1+6 + one question: id 1+8, perm code 2, selected 1
+    data = session.encode()
+    assert len(session.question_ids[0]) == 8
+    assert len(data) == 43
+
+    resumed = AdaptiveTestSession.decode(data, engine)
+    assert resumed.encode() == data
+    assert resumed.current_question == session.current_question
+
+
+def test_decoded_session_carries_on_identically():
+    engine = _engine()
+    session = AdaptiveTestSession(engine, "react", "junior", seed=42)
+    for correct in (True, False, True):
+        session.get_next_question()
+        _answer(session, correct)
+    session.get_next_question()
+
+    resumed = AdaptiveTestSession.decode(session.encode(), engine)
+    assert resumed.answer_history == session.answer_history
+    assert [q["options"] for q in resumed.question_history] == \
+        [q["options"] for q in session.question_history]
+    while not session.is_finished:
+        _answer(session, False)
+        _answer(resumed, False)
+        assert session.get_next_question() == resumed.get_next_question()
+    assert resumed.final_result == session.final_result
+
+
+# --------------------------------------------------------------------------- #
+# Versioned saves
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "sessions.sqlite3"))
+
+
+def test_stale_save_is_refused(backend):
+    engine = _engine()
+    app, api = SessionStore(engine, backend), SessionStore(engine, backend)
+    session = AdaptiveTestSession(engine, "react", "middle", seed=9)
+    session.get_next_question()
+    sid = app.create(session, "cand")
+
+    first, _, v1 = app.load(sid)
+    second, _, v2 = api.load(sid)
+    assert v1 == v2 == 1
+    _answer(first, True)
+    _answer(second, False)
+    assert app.save(sid, first, "cand", v1) == 2
+    with pytest.raises(SessionConflict):
+        api.save(sid, second, "cand", v2)
+
+    stored, account, version = api.load(sid)
+    assert account == "cand" and version == 2
+    assert [a["is_correct"] for a in stored.answer_history] == [True]
+
+
+def test_create_never_overwrites(backend):
+    backend.put("s", b"\x00one", 0)
+    with pytest.raises(SessionConflict):
+        backend.put("s", b"\x00two", 0)
+    assert backend.get("s") == (b"\x00one", 1)
+
+
+def test_sqlite_table_from_before_versioning_is_upgraded(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE sessions (id TEXT PRIMARY KEY, data BLOB, updated REAL)")
+    db.execute("INSERT INTO sessions VALUES ('old', x'00', strftime('%s', 'now'))")
+    db.commit()
+    db.close()
+
+    backend = SQLiteBackend(path)
+    assert backend.get("old") == (b"\x00", 1)
+    assert backend.put("old", b"\x00\x01", 1) == 2
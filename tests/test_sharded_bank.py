@@ -0,0 +1,65 @@
+"""Streaming ingest and the sharded engine."""
+
+import io
+import json
+
+import pytest
+
+from branching import SENIORITY_CODES
+from engine import AdaptiveTestingEngine, AdaptiveTestSession, QuestionSource
+from sharded_bank import ShardedQuestionBank, ShardedTestingEngine, build_shards, iter_json_array
+
+
+@pytest.mark.parametrize("text", [
+    "[1, 2.5e3]",
+    '[ -0.5E-2 ,{"a": [1.25, "x\\"y"]}, true, null, 17 ]',
+    "[123456789, 1e10]",
+    "[]",
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 1 << 16])
+def test_iter_json_array_across_chunk_boundaries(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["[1 2]", "[1, 2.]", "[1,", "{}"])
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 16])
+def test_iter_json_array_rejects_malformed_input(text, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    questions = [
+        {
+            "id": f"{seniority}{level}-{k}", "skill": "react", "seniority": seniority,
+            "level": level, "question": f"{seniority} {level} #{k}?",
+            "options": [{"description": "yes", "isAnswerKey": True},
+                        {"description": "no", "isAnswerKey": False}],
+        }
+        for seniority in SENIORITY_CODES.values() for level in range(1, 6) for k in range(3)
+    ]
+    source = tmp_path / "merged_file.json"
+    source.write_text(json.dumps(questions), encoding="utf-8")
+    build_shards(str(source), str(tmp_path / "shards"))
+    return ShardedTestingEngine(ShardedQuestionBank(str(tmp_path / "shards"), max_shards=2))
+
+
+def test_sharded_engine_is_a_question_source_only(sharded):
+    assert isinstance(sharded, QuestionSource)
+    assert not isinstance(sharded, AdaptiveTestingEngine)
+    assert not hasattr(sharded, "questions") and not hasattr(sharded, "bucket")
+
+
+def test_sessions_run_and_resume_on_the_sharded_engine(sharded):
+    session = AdaptiveTestSession(sharded, "react", "middle", seed=11)
+    seen = []
+    while (q := session.get_next_question()) is not None:
+        seen.append(q["id"])
+        keys = [opt["isAnswerKey"] for opt in session.current_question["options"]]
+        session.submit_answer(keys.index(len(seen) % 2 == 0))
+        resumed = AdaptiveTestSession.decode(session.encode(), sharded)
+        assert resumed.answer_history == session.answer_history
+    assert session.is_finished and session.final_result
+    assert len(set(seen)) == len(seen)
+    assert len(sharded.bank.resident()) <= 2